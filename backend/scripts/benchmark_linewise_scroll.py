@@ -0,0 +1,81 @@
+"""
+Time linewise scrolling caption updates as a long utterance comes in word by
+word, against wrapping the whole text on every partial.
+
+Run from the backend directory:
+    PYTHONPATH=src python scripts/benchmark_linewise_scroll.py
+"""
+import argparse
+import time
+
+import cjkwrap
+
+from services.captioning import CaptioningConfig, CaptioningRequest
+from services.captioning.linewise_scroll import LinewiseScrollStrategy
+from services.captioning.pswrap import pswrap
+
+SENTENCES = {
+    "en-US": "So, I think the meeting we had yesterday was productive for everyone.",
+    "zh": "我觉得，昨天的会议对大家来说都很有成效。",
+}
+
+
+def main(args):
+    for language, sentence in SENTENCES.items():
+        words = (list(sentence) if language == "zh" else sentence.split()) * (
+            args.num_sentences
+        )
+        separator = "" if language == "zh" else " "
+        partials = [separator.join(words[:i]) for i in range(1, len(words) + 1)]
+
+        for punctuation_sensitive, text_wrapper in (
+            (False, cjkwrap.wrap),
+            (True, pswrap),
+        ):
+            config = CaptioningConfig(
+                strategy="linewise_scroll",
+                num_lines=args.num_lines,
+                characters_per_line=args.characters_per_line,
+                punctuation_sensitive=punctuation_sensitive,
+            )
+            strategy = LinewiseScrollStrategy(config)
+            requests = [
+                CaptioningRequest(
+                    session_id="benchmark",
+                    message_id=0,
+                    language=language,
+                    utterance=partial,
+                    utterance_complete=False,
+                )
+                for partial in partials
+            ]
+
+            start_time = time.perf_counter()
+            for request in requests:
+                strategy(request)
+            incremental = (time.perf_counter() - start_time) / len(requests)
+
+            start_time = time.perf_counter()
+            for partial in partials:
+                text_wrapper(partial, args.characters_per_line)
+            full = (time.perf_counter() - start_time) / len(requests)
+
+            print(
+                f"{language} {text_wrapper.__module__}.{text_wrapper.__name__}"
+                + f" ({len(partials[-1])} characters):"
+                + f" caption update {1e6 * incremental:.0f} µs,"
+                + f" wrapping the whole text {1e6 * full:.0f} µs"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="linewise scroll benchmark")
+    parser.add_argument(
+        "--num-sentences", type=int, default=20, help="Sentences in the utterance"
+    )
+    parser.add_argument("--num-lines", type=int, default=2, help="Caption lines")
+    parser.add_argument(
+        "--characters-per-line", type=int, default=40, help="Caption line width"
+    )
+    args = parser.parse_args()
+    main(args)
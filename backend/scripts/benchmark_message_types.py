@@ -0,0 +1,149 @@
+"""
+Compare the slotted request and response types of services/*/interface.py with
+the plain dataclasses they replaced, by allocating the messages of one second of
+audio per speaker: 10 audio chunks, and 4 ASR partials, each translated,
+post-processed and captioned into every target language.
+
+Run from the backend directory:
+    PYTHONPATH=src python scripts/benchmark_message_types.py
+"""
+import argparse
+import dataclasses
+import gc
+import timeit
+import tracemalloc
+
+from services.asr import SpeechRecognitionRequest, SpeechRecognitionResponse
+from services.captioning import CaptioningRequest, CaptioningResponse
+from services.post_translation import PostTranslationRequest, PostTranslationResponse
+from services.speech_translation import SpeechTranslationRequest
+from services.translation import TranslationRequest, TranslationResponse
+
+MESSAGE_TYPES = [
+    SpeechTranslationRequest,
+    SpeechRecognitionRequest,
+    SpeechRecognitionResponse,
+    TranslationRequest,
+    TranslationResponse,
+    PostTranslationRequest,
+    PostTranslationResponse,
+    CaptioningRequest,
+    CaptioningResponse,
+]
+
+CHUNKS_PER_SECOND = 10
+PARTIALS_PER_SECOND = 4
+CHUNK = bytes(3200)
+
+
+def plain_dataclass(cls):
+    """
+    The type as a regular dataclass, with a __dict__
+    """
+    return dataclasses.make_dataclass(
+        cls.__name__,
+        [
+            (
+                f.name,
+                f.type,
+                dataclasses.field(default=f.default, default_factory=f.default_factory),
+            )
+            for f in dataclasses.fields(cls)
+        ],
+    )
+
+
+def one_second(types, num_languages):
+    """
+    Returns the messages allocated for one second of a speaker's audio
+    """
+    messages = []
+
+    for _ in range(CHUNKS_PER_SECOND):
+        messages.append(types["SpeechTranslationRequest"]("session", CHUNK))
+        messages.append(types["SpeechRecognitionRequest"]("session", CHUNK))
+
+    for message_id in range(PARTIALS_PER_SECOND):
+        text = "So I think the meeting we had yesterday"
+        messages.append(types["SpeechRecognitionResponse"](text, message_id, False))
+
+        for language in range(num_languages):
+            language = f"language {language}"
+            messages.append(
+                types["TranslationRequest"](
+                    "session", message_id, text, "en-US", language, False
+                )
+            )
+            messages.append(types["TranslationResponse"](text))
+            messages.append(
+                types["PostTranslationRequest"](
+                    "session", message_id, text, False, "en-US", language
+                )
+            )
+            messages.append(types["PostTranslationResponse"](text))
+            messages.append(
+                types["CaptioningRequest"]("session", message_id, language, text, False)
+            )
+            messages.append(types["CaptioningResponse"]([text], 0, [0]))
+
+    return messages
+
+
+def measure(types, args):
+    def allocate():
+        return [one_second(types, args.num_languages) for _ in range(args.num_speakers)]
+
+    seconds = timeit.timeit(allocate, number=args.number) / args.number
+
+    # Bytes held by the messages while they're in flight
+    gc.collect()
+    tracemalloc.start()
+    messages = allocate()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del messages
+
+    # Garbage collections the allocations trigger
+    collections = []
+    gc.callbacks.append(lambda phase, info: collections.append(phase))
+    try:
+        for _ in range(args.number):
+            allocate()
+    finally:
+        gc.callbacks.pop()
+
+    return seconds, size, collections.count("start") / args.number
+
+
+def main(args):
+    plain_types = {cls.__name__: plain_dataclass(cls) for cls in MESSAGE_TYPES}
+    slotted_types = {cls.__name__: cls for cls in MESSAGE_TYPES}
+
+    for cls in MESSAGE_TYPES:
+        assert not hasattr(cls(*[None] * len(dataclasses.fields(cls))), "__dict__")
+
+    num_messages = len(one_second(slotted_types, args.num_languages))
+    print(
+        f"{args.num_speakers} speakers, {args.num_languages} languages:"
+        + f" {num_messages * args.num_speakers} messages per second of audio"
+    )
+
+    for name, types in [("dataclass", plain_types), ("slotted", slotted_types)]:
+        seconds, size, collections = measure(types, args)
+        print(
+            f"{name}: {1e3 * seconds:.1f} ms, {size / 1e6:.2f} MB,"
+            + f" {collections:.1f} garbage collections per second of audio"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="message types benchmark")
+    parser.add_argument(
+        "--num-speakers", type=int, default=200, help="Speakers talking at once"
+    )
+    parser.add_argument(
+        "--num-languages", type=int, default=3, help="Target languages per speaker"
+    )
+    parser.add_argument("--number", type=int, default=20, help="Runs per timing")
+    args = parser.parse_args()
+    main(args)
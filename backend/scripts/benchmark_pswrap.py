@@ -0,0 +1,83 @@
+"""
+Compare punctuation sensitive wrapping (pswrap) with cached per-character
+widths against counting the punctuation of every slice (the implementation it
+replaced), on long captions.
+
+Run from the backend directory:
+    PYTHONPATH=src python scripts/benchmark_pswrap.py
+"""
+import argparse
+import timeit
+from collections import Counter
+from string import punctuation
+
+from zhon import hanzi
+
+from services.captioning import pswrap as pswrap_module
+from services.captioning.pswrap import cjklen, pswrap
+
+SENTENCES = {
+    "en-US": "So, I think the meeting we had yesterday was productive for everyone.",
+    "zh": "我觉得，昨天的会议对大家来说都很有成效。",
+}
+
+
+def get_ps_len_by_counting(text):
+    counts = Counter(text)
+    full_puncs = punctuation + hanzi.punctuation
+    punctuation_len = sum(
+        [
+            counts.get(p, 0) if p in punctuation else 2 * counts.get(p, 0)
+            for p in full_puncs
+        ]
+    )
+    return cjklen(text) - punctuation_len
+
+
+def cjkslices_by_counting(text, index):
+    if get_ps_len_by_counting(text) <= index:
+        return text, ""
+    i = 1
+    while get_ps_len_by_counting(text[:i]) <= index:
+        i = i + 1
+    return text[: i - 1], text[i - 1 :]
+
+
+def wrap_by_counting(text, width):
+    get_ps_len, cjkslices = pswrap_module.get_ps_len, pswrap_module.cjkslices
+    pswrap_module.get_ps_len = get_ps_len_by_counting
+    pswrap_module.cjkslices = cjkslices_by_counting
+
+    try:
+        return pswrap(text, width)
+    finally:
+        pswrap_module.get_ps_len, pswrap_module.cjkslices = get_ps_len, cjkslices
+
+
+def main(args):
+    for language, sentence in SENTENCES.items():
+        separator = "" if language == "zh" else " "
+        text = separator.join([sentence] * args.num_sentences)
+        assert pswrap(text, args.width) == wrap_by_counting(text, args.width)
+
+        before = timeit.timeit(
+            lambda: wrap_by_counting(text, args.width), number=args.number
+        )
+        after = timeit.timeit(lambda: pswrap(text, args.width), number=args.number)
+        print(
+            f"{language} ({len(text)} characters):"
+            + f" counting {1e6 * before / args.number:.0f} µs,"
+            + f" cached widths {1e6 * after / args.number:.0f} µs,"
+            + f" {before / after:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pswrap benchmark")
+    parser.add_argument(
+        "--num-sentences", type=int, default=5, help="Sentences in the caption text"
+    )
+    parser.add_argument("--width", type=int, default=40, help="Characters per line")
+    parser.add_argument("--number", type=int, default=20, help="Runs per timing")
+    args = parser.parse_args()
+    main(args)
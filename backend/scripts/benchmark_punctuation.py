@@ -0,0 +1,78 @@
+"""
+Measure the throughput of a running punctuation server.
+
+Start the server on CPU, e.g.
+    CUDA_VISIBLE_DEVICES= python punctuation_server.py --port 8006 --max-batch-size 32
+then run from the backend directory
+    python scripts/benchmark_punctuation.py --url http://localhost:8006 --concurrency 20
+Run the server with --max-batch-size 1 to compare against unbatched punctuation.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+FINALS = [
+    "hello everyone thanks for joining today",
+    "can you hear me now",
+    "let's go over the results from last week",
+    "i think the latency of the captions is much better",
+    "what time is the next meeting",
+    "we should ask the asr team about that",
+    "the translation of partials looks stable",
+    "does anyone have questions before we wrap up",
+]
+
+
+def client(url, language, deadline, latencies):
+    session = requests.Session()
+
+    while time.monotonic() < deadline:
+        start_time = time.perf_counter()
+        response = session.post(
+            f"{url}/punctuate_and_capitalize",
+            json={"text": random.choice(FINALS), "language": language},
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start_time)
+
+
+def main(args):
+    latencies = []
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(
+            target=client, args=(args.url, args.language, deadline, latencies)
+        )
+        for _ in range(args.concurrency)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(f"Concurrency: {args.concurrency}")
+    print(f"Throughput: {len(latencies) / args.duration:.1f} texts/s")
+    print(f"Latency p50: {1000 * statistics.median(latencies):.1f} ms")
+    print(f"Latency p95: {1000 * latencies[int(0.95 * len(latencies))]:.1f} ms")
+
+    stats = requests.get(f"{args.url}/stats").json().get(args.language)
+    if stats and stats["batches"]:
+        print(f"Average batch size: {stats['texts'] / stats['batches']:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="punctuation server benchmark")
+    parser.add_argument("--url", default="http://localhost:8006")
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Number of concurrent clients"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    args = parser.parse_args()
+    main(args)
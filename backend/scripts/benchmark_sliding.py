@@ -0,0 +1,85 @@
+"""
+Compare WordLevelSlidingStrategy against wrapping every window from the end,
+one token at a time (the implementation it replaced), across caption sizes.
+
+Run from the backend directory:
+    PYTHONPATH=src python scripts/benchmark_sliding.py
+"""
+import argparse
+import textwrap
+import timeit
+
+import cjkwrap
+
+from services.captioning import CaptioningConfig, CaptioningRequest
+from services.captioning.word_level_sliding import WordLevelSlidingStrategy
+from services.tokenizer import get_tokenizer
+
+SENTENCES = {
+    "en-US": "So I think the meeting we had yesterday was productive for everyone.",
+    "zh": "我觉得昨天的会议对大家来说都很有成效。",
+}
+
+# (lines, characters per line)
+CAPTION_SIZES = [(2, 40), (3, 80), (5, 120), (10, 200)]
+
+
+def slide_word_by_word(text, language, num_lines, chars_per_line):
+    tokenizer = get_tokenizer(language)
+    text_wrapper = cjkwrap if language == "zh" else textwrap
+    window = []
+
+    for token in reversed(tokenizer.tokenize(text)):
+        substr = tokenizer.detokenize([token] + window[::-1])
+
+        if len(text_wrapper.wrap(substr, chars_per_line)) > num_lines:
+            break
+        window.append(token)
+
+    return text_wrapper.wrap(tokenizer.detokenize(window[::-1]), chars_per_line)
+
+
+def main(args):
+    for language, sentence in SENTENCES.items():
+        separator = "" if language == "zh" else " "
+        text = separator.join([sentence] * args.num_sentences)
+
+        for num_lines, chars_per_line in CAPTION_SIZES:
+            strategy = WordLevelSlidingStrategy(
+                CaptioningConfig(
+                    strategy="wordwise_sliding_window",
+                    num_lines=num_lines,
+                    characters_per_line=chars_per_line,
+                )
+            )
+            request = CaptioningRequest(
+                session_id="benchmark",
+                message_id=0,
+                language=language,
+                utterance=text,
+                utterance_complete=False,
+            )
+            expected = slide_word_by_word(text, language, num_lines, chars_per_line)
+            assert strategy(request)[0].lines == expected
+
+            before = timeit.timeit(
+                lambda: slide_word_by_word(text, language, num_lines, chars_per_line),
+                number=args.number,
+            )
+            after = timeit.timeit(lambda: strategy(request), number=args.number)
+            print(
+                f"{language} {num_lines}x{chars_per_line}:"
+                + f" word by word {1e6 * before / args.number:.0f} µs,"
+                + f" search {1e6 * after / args.number:.0f} µs,"
+                + f" {before / after:.1f}x faster"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="sliding window captions benchmark")
+    parser.add_argument(
+        "--num-sentences", type=int, default=20, help="Sentences in the caption text"
+    )
+    parser.add_argument("--number", type=int, default=100, help="Runs per timing")
+    args = parser.parse_args()
+    main(args)
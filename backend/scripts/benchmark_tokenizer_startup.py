@@ -0,0 +1,78 @@
+"""
+Time how long a fresh process takes to load each tokenizer and tokenize its
+first text, with an empty (cold) and a filled (warm) tokenizer cache directory,
+against plain jieba.initialize() with jieba's own cache.
+
+Run from the backend directory:
+    PYTHONPATH=src python scripts/benchmark_tokenizer_startup.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+LOAD_TOKENIZER = """
+import time
+start_time = time.perf_counter()
+from services.tokenizer import Tokenizer
+Tokenizer({language!r}).tokenize({text!r})
+print(time.perf_counter() - start_time)
+"""
+
+LOAD_JIEBA = """
+import logging, time
+start_time = time.perf_counter()
+import jieba
+jieba.setLogLevel(logging.ERROR)
+jieba.initialize()
+list(jieba.cut({text!r}))
+print(time.perf_counter() - start_time)
+"""
+
+TEXTS = {
+    "zh": "我觉得昨天的会议对大家来说都很有成效",
+    "en-US": "So I think yesterday's meeting was productive for everyone.",
+}
+
+
+def time_process(code, cache_dir):
+    env = dict(os.environ, TOKENIZER_CACHE_DIR=cache_dir)
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, check=True
+    ).stdout
+
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main(args):
+    for language, text in TEXTS.items():
+        code = LOAD_TOKENIZER.format(language=language, text=text)
+        cold, warm = [], []
+
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cold.append(time_process(code, cache_dir))
+                warm.append(time_process(code, cache_dir))
+
+        print(
+            f"{language}: cold {statistics.median(cold):.3f}s,"
+            + f" warm {statistics.median(warm):.3f}s"
+        )
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        jieba_cache = [
+            time_process(LOAD_JIEBA.format(text=TEXTS["zh"]), cache_dir)
+            for _ in range(args.runs)
+        ]
+    print(
+        f"jieba.initialize() with its own cache: {statistics.median(jieba_cache):.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="tokenizer startup benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Processes per timing")
+    args = parser.parse_args()
+    main(args)
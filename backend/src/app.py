@@ -19,12 +19,13 @@ from dotenv import load_dotenv
 from engineio.payload import Payload
 from flask import Flask, abort, json, jsonify, request, Response
 from flask_cors import CORS
-from flask_socketio import SocketIO, join_room
+from flask_socketio import SocketIO, join_room, leave_room
 from werkzeug.exceptions import HTTPException
 
 # other repo modules
 from namespaces.feedback import FeedbackNamespace
 from namespaces.meeting import MeetingNamespace
+from namespaces.monitoring import MonitoringNamespace
 from namespaces.word_guessing import WordGuessingNamespace
 from room import (
     AudienceMember,
@@ -34,9 +35,13 @@ from room import (
     RoomNotCreated,
     RoomList,
     RoomSettings,
+    parse_caption_layout,
 )
+from services.overload import OverloadController
 from services.speech_translation import SpeechTranslationConfig
+from services.warmup import WarmUp
 from room.chatbot import Chatbot
+from monitoring import HubMonitor, instrument_emit
 
 
 class SpeechTranslationServer:
@@ -50,15 +55,44 @@ class SpeechTranslationServer:
         self.socketio = SocketIO(
             self.app, async_mode="gevent", cors_allowed_origins="*"
         )
+        instrument_emit(self.socketio)
 
         self.log_dir = log_dir / datetime.now().strftime("%Y-%m-%d-%H-%M")
         self.rooms = RoomList(self.socketio)
+        self.hub_monitor = HubMonitor(
+            max_blocking_time=float(os.getenv("HUB_MAX_BLOCKING_MS", 100)) / 1000,
+            lag_sample_interval=float(os.getenv("HUB_LAG_SAMPLE_INTERVAL_MS", 500))
+            / 1000,
+        )
+        self.overload_controller = OverloadController(
+            self.rooms,
+            max_loop_lag=float(os.getenv("OVERLOAD_MAX_LOOP_LAG_MS", 200)) / 1000,
+            max_queue_depth=int(os.getenv("OVERLOAD_MAX_QUEUE_DEPTH", 10)),
+            recovery_time=float(os.getenv("OVERLOAD_RECOVERY_SECONDS", 10)),
+        )
+        self.warm_up = WarmUp(
+            [
+                language
+                for language in os.getenv(
+                    "WARMUP_LANGUAGES", "en-US,zh,es-ES,pt-BR"
+                ).split(",")
+                if language
+            ],
+            load_models=bool(int(os.getenv("WARMUP_MODELS", 0))),
+        )
 
         # Set up namespaces
         self.namespaces = {
             "meeting": MeetingNamespace(self.rooms, self.socketio.emit),
             "word_game": WordGuessingNamespace(self.rooms, self.socketio.emit),
             "feedback": FeedbackNamespace(self.rooms, self.socketio.emit),
+            "monitoring": MonitoringNamespace(
+                self.rooms,
+                self.socketio.emit,
+                self.hub_monitor,
+                self.overload_controller,
+                self.warm_up,
+            ),
         }
         self.rooms.register_change_listener(
             self.namespaces["word_game"].on_room_changed
@@ -306,15 +340,24 @@ class SpeechTranslationServer:
             if "/" in msg["name"]:
                 return False, "name must not contain '/'", []
 
+            try:
+                caption_layout = parse_caption_layout(msg.get("captionLayout"))
+            except ValueError:
+                return False, "invalid caption layout.", []
+
             if is_audience:
                 participant = AudienceMember(msg["captionLanguage"])
             else:
                 participant = Participant(
                     msg["name"], msg["spokenLanguage"], msg["captionLanguage"]
                 )
+            participant.caption_layout = caption_layout
 
             room.add_participant(msg["userId"], participant)
 
+            if caption_layout is not None:
+                join_room(room.caption_layout_socket_room(caption_layout))
+
             self.rooms.room_changed(room)
 
             if room.is_captioning_active:
@@ -337,9 +380,16 @@ class SpeechTranslationServer:
             if room is None:
                 return
 
-            if msg["userId"] in room.participants:
+            participant = room.participants.get(msg["userId"])
+
+            if participant is not None:
                 join_room(room_id)
 
+                if participant.caption_layout is not None:
+                    join_room(
+                        room.caption_layout_socket_room(participant.caption_layout)
+                    )
+
         @self.socketio.on("/close")
         def on_close_room(room_id):
             room = self.rooms.get(room_id)
@@ -397,6 +447,46 @@ class SpeechTranslationServer:
 
             room.manager.add_new_language(language)
             participant.caption_language = language
+            room.manager.update_caption_layouts()
+            self.rooms.room_changed(room)
+
+            return True
+
+        @self.socketio.on("/caption-layout-changed")
+        def on_caption_layout_changed(msg):
+            """
+            Read captions of the room's languages in captionLayout, or in the
+            room's layout if it's null. Captions in other layouts are sent as
+            /<language>/translation/<numLines>x<charactersPerLine>.
+            """
+            user_id = msg["userId"]
+            room_id = msg["roomId"]
+
+            room = self.rooms.get(room_id)
+
+            if room is None:
+                return False
+
+            participant = room.participants.get(user_id)
+
+            if participant is None:
+                return False
+
+            try:
+                caption_layout = parse_caption_layout(msg.get("captionLayout"))
+            except ValueError:
+                return False
+
+            if participant.caption_layout is not None:
+                leave_room(room.caption_layout_socket_room(participant.caption_layout))
+
+            if caption_layout is not None:
+                join_room(room.caption_layout_socket_room(caption_layout))
+
+            participant.caption_layout = caption_layout
+
+            if room.is_captioning_active:
+                room.manager.update_caption_layouts()
             self.rooms.room_changed(room)
 
             return True
@@ -487,6 +577,13 @@ class SpeechTranslationServer:
 
     def start(self, port, debug):
         ssl_context = self.get_certificates()
+        self.warm_up.start()
+
+        if int(os.getenv("HUB_MONITOR_ENABLED", 1)):
+            self.hub_monitor.start()
+
+        if int(os.getenv("OVERLOAD_CONTROL_ENABLED", 1)):
+            self.overload_controller.start()
 
         if ssl_context:
             self.socketio.run(
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from .profanity import AhoCorasickProfanityMatcher, RegexProfanityMatcher
+
 
 class Language:
     """
@@ -31,3 +33,20 @@ class Language:
         # Load a list of words we don't want to show in transcripts
         with open(Path(__file__).parent / f"profanity.{language_tag}.txt") as fh:
             self.profane_words = [line.strip() for line in fh if line.strip()]
+        self._profanity_matcher = None
+
+    @property
+    def profanity_matcher(self):
+        """
+        Masks profane_words in a text, compiled the first time it's used
+        """
+
+        if self._profanity_matcher is None:
+            if self.has_spaces:
+                self._profanity_matcher = RegexProfanityMatcher(self.profane_words)
+            else:
+                self._profanity_matcher = AhoCorasickProfanityMatcher(
+                    self.profane_words
+                )
+
+        return self._profanity_matcher
@@ -0,0 +1,174 @@
+"""
+Matchers that mask a language's profane words in one pass over the text.
+
+The text is scanned once with an automaton built from the whole word list (a
+prefix-factored regex, or Aho-Corasick for languages without spaces). Words are
+only substituted once one was found, skipping those that can't occur, so the
+output is the same as masking each word of the list in turn.
+"""
+import re
+from collections import deque
+
+
+# Characters that re.IGNORECASE matches with an ASCII letter, but str.lower() doesn't
+# lower to it
+CASE_FIXES = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+METACHARACTERS = set("\\.^$*+?{}[]()|")
+
+
+def literal_prefix(word):
+    """
+    Returns a string that occurs (lowercased) in every match of the regular
+    expression word
+    """
+
+    if "|" in word:
+        return ""
+
+    for i, char in enumerate(word):
+        if char in METACHARACTERS:
+            # The previous character might be optional
+            return word[: max(i - 1, 0)] if char in "?*{" else word[:i]
+
+    return word
+
+
+def trie_regex(words):
+    """
+    Returns a regular expression matching any of the literal words, with their
+    common prefixes factored out, so it branches once per character instead of
+    trying every word at every position
+    """
+    trie = {}
+
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def to_regex(node):
+        alternatives = [
+            re.escape(char) + to_regex(child) for char, child in node.items() if char
+        ]
+
+        if not alternatives:
+            return ""
+
+        regex = (
+            alternatives[0]
+            if len(alternatives) == 1
+            else "(?:" + "|".join(alternatives) + ")"
+        )
+
+        if "" in node:
+            regex = f"(?:{regex})?"
+
+        return regex
+
+    return to_regex(trie)
+
+
+class RegexProfanityMatcher:
+    """
+    For languages with spaces. Words match along word boundaries, ignoring case,
+    and keep their first character, e.g. "S***". Words are regular expressions.
+    """
+
+    def __init__(self, words):
+        self.patterns = [re.compile(rf"\b{word}\b", re.IGNORECASE) for word in words]
+        self.prefixes = [literal_prefix(word).lower() for word in words]
+
+        literals = [w.lower() for w, p in zip(words, self.prefixes) if w.lower() == p]
+        regexes = [f"(?:{w})" for w, p in zip(words, self.prefixes) if w.lower() != p]
+        self.any_word = re.compile(
+            r"\b(?:" + "|".join([trie_regex(literals)] + regexes) + r")\b",
+            re.IGNORECASE,
+        )
+
+    def mask(self, text):
+        if not self.patterns or not self.any_word.search(text):
+            return text
+
+        # Masking a word can change where the later words match, so apply them one
+        # at a time, in order, like the original loop did. Masking only replaces
+        # characters with "*", so words whose prefix isn't in the text can be skipped.
+        lowered = text.translate(CASE_FIXES).lower()
+
+        for pattern, prefix in zip(self.patterns, self.prefixes):
+            if prefix in lowered:
+                text = pattern.sub(lambda m: m[0][0] + "*" * (len(m[0]) - 1), text)
+
+        return text
+
+
+class AhoCorasickProfanityMatcher:
+    """
+    For languages without spaces. Words match as substrings and are masked
+    entirely, e.g. "**".
+    """
+
+    def __init__(self, words):
+        self.words = words
+        # Trie of the words: per node, its transitions, failure link, and the
+        # indices of the words ending at it (including through failure links)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+
+        for i, word in enumerate(words):
+            node = 0
+
+            for char in word:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+
+            self.output[node].add(i)
+
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    def find(self, text):
+        """
+        Returns the indices of the words that occur in text
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        node = 0
+
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+
+            node = goto[node].get(char, 0)
+            found |= output[node]
+
+        return found
+
+    def mask(self, text):
+        found = self.find(text)
+
+        # Replacing a word can break later occurrences of words that overlap it,
+        # so replace them in list order, like the original loop did. Words that
+        # don't occur in text can't appear by masking others with "*".
+        for i in sorted(found):
+            text = text.replace(self.words[i], "*" * len(self.words[i]))
+
+        return text
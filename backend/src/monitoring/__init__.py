@@ -0,0 +1,4 @@
+from .emits import instrument_emit
+from .hub import GREENLET_COUNTER, HubMonitor, current_stage, pipeline_stage
+from .metrics import FAST_BUCKETS, REGISTRY, Counter, Gauge, Histogram, Registry
+from .tracing import Trace, Tracer
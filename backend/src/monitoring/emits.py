@@ -0,0 +1,57 @@
+"""
+Counts the events and bytes that the server emits over socket.io
+
+Bytes are counted from the packets python-socketio already encodes for each
+recipient, as they're handed to engineio, rather than by encoding the payload
+again.
+"""
+import functools
+import threading
+
+from .metrics import REGISTRY
+
+SOCKET_EMITS = REGISTRY.counter(
+    "meetdot_socket_emits_total", "Socket.io events emitted", ("event",)
+)
+SOCKET_EMIT_BYTES = REGISTRY.counter(
+    "meetdot_socket_emit_bytes_total",
+    "Size of the encoded socket.io packets sent to every recipient of the events"
+    + " emitted (characters of text packets, bytes of binary attachments)",
+    ("event",),
+)
+
+# Bytes sent by the emit in progress in the current greenlet (threading.local is
+# greenlet-local once gevent has monkey patched it)
+_emitting = threading.local()
+
+
+def instrument_emit(socketio):
+    """
+    Replace socketio.emit with a version that counts emitted events and bytes.
+    Must be called before emit is handed out to namespaces and rooms.
+    """
+    emit = socketio.emit
+    eio = socketio.server.eio
+    send = eio.send
+
+    @functools.wraps(emit)
+    def counted_emit(event, *args, **kwargs):
+        SOCKET_EMITS.labels(event).inc()
+        outer_size = getattr(_emitting, "size", None)
+        _emitting.size = 0
+
+        try:
+            return emit(event, *args, **kwargs)
+        finally:
+            SOCKET_EMIT_BYTES.labels(event).inc(_emitting.size)
+            _emitting.size = outer_size
+
+    @functools.wraps(send)
+    def counted_send(sid, data, *args, **kwargs):
+        if getattr(_emitting, "size", None) is not None:
+            _emitting.size += len(data)
+
+        return send(sid, data, *args, **kwargs)
+
+    socketio.emit = counted_emit
+    eio.send = counted_send
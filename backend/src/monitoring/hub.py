@@ -0,0 +1,236 @@
+"""
+Instrumentation for the gevent hub.
+
+The SocketIO server runs with async_mode="gevent", so any callback that does CPU
+work without yielding stalls every room on the server. HubMonitor measures how
+late the hub wakes up (loop lag), how long each greenlet runs before switching
+away, and keeps reports (with stacks) for greenlets that hold the hub for longer
+than max_blocking_time. Code on the pipeline's hot path marks itself with
+`pipeline_stage` so that these measurements can be attributed to a stage.
+
+Stacks are taken by a watcher of our own in a real OS thread, rather than by
+gevent's monitoring thread, which would have to be enabled process-wide through
+gevent.config and prints every report to stderr.
+"""
+import sys
+import time
+import traceback
+import weakref
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import gevent
+import greenlet
+from gevent import monkey
+
+from .metrics import Histogram
+
+# Not monkey patched, so the watcher runs in a real thread, and sleeps in it
+_start_new_thread = monkey.get_original("_thread", "start_new_thread")
+_thread_sleep = monkey.get_original("time", "sleep")
+
+UNKNOWN_STAGE = "other"
+
+# greenlet -> pipeline stage it is currently running
+_greenlet_stages = weakref.WeakKeyDictionary()
+# greenlet -> last pipeline stage it entered since it was last switched to. Stages
+# usually start and finish without yielding, so they're gone by the time we switch
+# away from the greenlet and measure how long it ran.
+_greenlet_run_stages = weakref.WeakKeyDictionary()
+
+
+@contextmanager
+def pipeline_stage(name):
+    """
+    Mark the current greenlet as running pipeline stage `name` until the context exits.
+    Stages can be nested, the innermost one wins. Can also be used as a decorator.
+    """
+    current = greenlet.getcurrent()
+    previous = _greenlet_stages.get(current)
+    _greenlet_stages[current] = name
+    _greenlet_run_stages[current] = name
+
+    try:
+        yield
+    finally:
+        if previous is None:
+            _greenlet_stages.pop(current, None)
+        else:
+            _greenlet_stages[current] = previous
+
+
+def current_stage(glet=None):
+    if glet is None:
+        glet = greenlet.getcurrent()
+
+    return _greenlet_stages.get(glet, UNKNOWN_STAGE)
+
+
+class GreenletCounter:
+    """
+    Counts live greenlets by tracing switches: a greenlet is counted from the
+    first switch into it until it switches away for the last time, dead (or is
+    garbage collected). Unlike walking gc.get_objects(), counting doesn't block
+    the hub for as long as it takes to walk the heap.
+    """
+
+    def __init__(self):
+        self.live = weakref.WeakSet()
+        self.installed = False
+        self._previous_trace = None
+
+    def install(self):
+        if self.installed:
+            return
+
+        self.installed = True
+        self._previous_trace = greenlet.settrace(self._trace)
+
+    def _trace(self, event, args):
+        if event in ("switch", "throw"):
+            origin, target = args
+
+            if origin.dead:
+                self.live.discard(origin)
+            self.live.add(target)
+
+        if self._previous_trace is not None:
+            self._previous_trace(event, args)
+
+    def count(self):
+        return len(self.live)
+
+
+GREENLET_COUNTER = GreenletCounter()
+
+
+class HubMonitor:
+    def __init__(self, max_blocking_time=0.1, lag_sample_interval=0.5, max_reports=100):
+        """
+        max_blocking_time: greenlets that run for longer than this (in seconds) without
+                           yielding are reported as blocking the hub
+        lag_sample_interval: how often (in seconds) to sample the hub's loop lag
+        max_reports: number of blocking reports to keep
+        """
+        self.max_blocking_time = max_blocking_time
+        self.lag_sample_interval = lag_sample_interval
+        self.active = False
+
+        self.loop_lag = Histogram()
+        self.last_loop_lag = 0.0
+        self.run_time = defaultdict(Histogram)  # stage -> time between switches
+        self.reports = deque(maxlen=max_reports)
+
+        # Stacks captured by the watcher thread while a greenlet was blocking
+        self._blocked_stacks = weakref.WeakKeyDictionary()
+        self._last_switch_time = None
+        self._running = None
+        self._previous_trace = None
+        self._hub = None
+        self._lag_greenlet = None
+        # Incremented by each start, so watchers of earlier starts exit
+        self._generation = 0
+
+    def start(self):
+        if self.active:
+            return
+
+        self.active = True
+        self._last_switch_time = time.perf_counter()
+
+        if self._hub is None:
+            self._hub = gevent.get_hub()
+            self._previous_trace = greenlet.settrace(self._trace)
+
+        # The watcher runs in a real OS thread, so it can take the stack of a
+        # blocking greenlet while it's still blocking
+        self._generation += 1
+        _start_new_thread(self._watch_for_blocking, (self._generation,))
+
+        self._lag_greenlet = gevent.spawn(self._sample_loop_lag)
+
+    def stop(self):
+        if not self.active:
+            return
+
+        # Our trace function stays installed, since other tracers may have chained
+        # onto it since, but it stops measuring once we're inactive
+        # The watcher exits within half of max_blocking_time
+        self.active = False
+
+        if self._lag_greenlet is not None:
+            self._lag_greenlet.kill()
+
+    def _sample_loop_lag(self):
+        while self.active:
+            start_time = time.perf_counter()
+            gevent.sleep(self.lag_sample_interval)
+            lag = time.perf_counter() - start_time - self.lag_sample_interval
+            self.last_loop_lag = max(0.0, lag)
+            self.loop_lag.observe(self.last_loop_lag)
+
+    def _trace(self, event, args):
+        if self.active and event in ("switch", "throw"):
+            origin, target = args
+            now = time.perf_counter()
+            run_time = now - self._last_switch_time
+            self._last_switch_time = now
+            self._running = target
+            _greenlet_run_stages.pop(target, None)
+
+            if origin is not self._hub:
+                self._on_greenlet_ran(origin, run_time)
+
+        if self._previous_trace is not None:
+            self._previous_trace(event, args)
+
+    def _on_greenlet_ran(self, glet, run_time):
+        stage = _greenlet_run_stages.pop(glet, None) or current_stage(glet)
+        self.run_time[stage].observe(run_time)
+
+        stack = self._blocked_stacks.pop(glet, None)
+
+        if run_time >= self.max_blocking_time:
+            self.reports.append(
+                {
+                    "time": time.time(),
+                    "stage": stage,
+                    "greenlet": repr(glet),
+                    "run_time": run_time,
+                    "stack": stack,
+                }
+            )
+
+    def _watch_for_blocking(self, generation):
+        """
+        Runs in its own OS thread, not the hub's thread
+        """
+        captured_switch_time = None
+
+        while self.active and self._generation == generation:
+            _thread_sleep(self.max_blocking_time / 2)
+
+            switch_time, running = self._last_switch_time, self._running
+
+            if (
+                running is None
+                or running is self._hub
+                or switch_time == captured_switch_time
+                or time.perf_counter() - switch_time < self.max_blocking_time
+            ):
+                continue
+
+            # Still running since the same switch, for max_blocking_time
+            frame = sys._current_frames().get(self._hub.thread_ident)
+
+            if frame is not None and self._last_switch_time == switch_time:
+                captured_switch_time = switch_time
+                self._blocked_stacks[running] = "".join(traceback.format_stack(frame))
+
+    def to_dict(self):
+        return {
+            "max_blocking_time": self.max_blocking_time,
+            "loop_lag": self.loop_lag.to_dict(),
+            "run_time": {stage: h.to_dict() for stage, h in self.run_time.items()},
+            "blocking_reports": list(self.reports),
+        }
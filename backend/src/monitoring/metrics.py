@@ -0,0 +1,233 @@
+"""
+Lightweight metric types used by the monitoring endpoints, and a registry that
+renders them in the Prometheus text exposition format.
+
+The server runs every request, socket handler and service thread as a greenlet
+on a single OS thread, so updates are plain attribute increments: no locks are
+needed and the metrics are cheap enough to leave on in production.
+"""
+import bisect
+
+# Upper bounds (in seconds) of the default histogram buckets. These cover
+# everything from a cheap callback to a multi-second stall of the event loop.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# For stages that usually take well under a millisecond, which would all fall
+# into the first of the default buckets
+FAST_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.1,
+    1.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observations are counted in the first bucket whose
+    upper bound is >= the observed value, or in the overflow bucket.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # One extra slot for observations larger than the last bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+        Estimate the q-th percentile (0 <= q <= 1) as the upper bound of the
+        bucket it falls into
+        """
+
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+
+        for upper_bound, count in zip(self.buckets, self.counts):
+            seen += count
+
+            if seen >= rank:
+                return upper_bound
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": {
+                **{str(b): c for b, c in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0
+        self._fn = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, fn):
+        """
+        Compute the gauge's value by calling fn when it is read
+        """
+        self._fn = fn
+
+    def get(self):
+        return self._fn() if self._fn is not None else self.value
+
+
+class MetricFamily:
+    """
+    A named metric, with one child metric per combination of label values
+    """
+
+    def __init__(self, name, documentation, metric_type, labelnames, factory):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self.children = {}  # tuple of label values -> metric
+
+    def labels(self, *labelvalues):
+        child = self.children.get(labelvalues)
+
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {labelvalues}"
+                )
+
+            child = self.children[labelvalues] = self._factory()
+
+        return child
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+        for labelvalues, child in self.children.items():
+            labels = list(zip(self.labelnames, labelvalues))
+
+            if self.type == "histogram":
+                cumulative = 0
+
+                for upper_bound, count in zip((*child.buckets, "+Inf"), child.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket"
+                        f"{_format_labels(labels + [('le', upper_bound)])}"
+                        f" {cumulative}"
+                    )
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {child.sum}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {child.count}")
+            elif self.type == "gauge":
+                lines.append(f"{self.name}{_format_labels(labels)} {child.get()}")
+            else:
+                lines.append(f"{self.name}{_format_labels(labels)} {child.value}")
+
+        return "\n".join(lines)
+
+
+class Registry:
+    def __init__(self):
+        self.families = {}  # name -> MetricFamily
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(name, documentation, "counter", labelnames, Counter)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(name, documentation, "gauge", labelnames, Gauge)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(
+            name, documentation, "histogram", labelnames, lambda: Histogram(buckets)
+        )
+
+    def register(self, name, documentation, metric_type, metric):
+        """
+        Register an existing, unlabeled metric (e.g. one owned by HubMonitor)
+        """
+        self._register(name, documentation, metric_type, (), lambda: metric)
+        self.families[name].children[()] = metric
+
+        return metric
+
+    def _register(self, name, documentation, metric_type, labelnames, factory):
+        """
+        Returns the metric family, or the metric itself if it has no labels.
+        Registering the same metric twice returns the existing one.
+        """
+        family = self.families.get(name)
+
+        if family is None:
+            family = self.families[name] = MetricFamily(
+                name, documentation, metric_type, labelnames, factory
+            )
+        elif family.type != metric_type or family.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered differently")
+
+        return family if family.labelnames else family.labels()
+
+    def render(self):
+        return "\n".join(family.render() for family in self.families.values()) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+
+    formatted = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+
+    return f"{{{formatted}}}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Metrics exported at /metrics
+REGISTRY = Registry()
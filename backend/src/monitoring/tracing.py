@@ -0,0 +1,118 @@
+"""
+Per-utterance tracing of the speech translation pipeline.
+
+Every ASR response (identified by session_id and message_id, which is the response's
+relative_time_offset) can start a Trace. The trace is carried on the requests
+passed between the pipeline's services, and each stage marks the time at which it
+finished. Times are relative to the last audio chunk received for the session
+before the ASR response, so the "asr" mark is an estimate of recognition latency
+and "broadcast" is the end-to-end latency of the caption.
+
+Traces are sampled, and the sampled ones are kept in a bounded ring so a busy room
+can't grow them without limit.
+"""
+import random
+import time
+from collections import OrderedDict, defaultdict
+
+from .metrics import Histogram
+
+# Stages in the order they're reached by each ASR response
+STAGES = (
+    "asr",
+    "translation_start",
+    "translation",
+    "post_translation",
+    "captioning",
+    "broadcast",
+)
+
+
+class Trace:
+    def __init__(self, session_id, message_id, is_final, origin_time, stage_latency):
+        self.session_id = session_id
+        self.message_id = message_id
+        self.is_final = is_final
+        self.origin_time = origin_time
+        self.start_time = time.time()
+        self.marks = []  # list of (stage, language, seconds since origin_time)
+        self._stage_latency = stage_latency
+
+    def mark(self, stage, language=None):
+        """
+        Record that `stage` has finished, for target `language` if the stage
+        runs once per caption language
+        """
+        latency = time.perf_counter() - self.origin_time
+        self.marks.append((stage, language, latency))
+        self._stage_latency[stage].observe(latency)
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "message_id": self.message_id,
+            "is_final": self.is_final,
+            "start_time": self.start_time,
+            "marks": [
+                {"stage": stage, "language": language, "latency": latency}
+                for stage, language, latency in self.marks
+            ],
+        }
+
+
+class Tracer:
+    def __init__(self, sample_rate=0.1, max_traces=1000):
+        """
+        sample_rate: fraction of ASR responses to trace
+        max_traces: number of sampled traces to keep, the oldest ones are dropped first
+        """
+        self.sample_rate = sample_rate
+        self.max_traces = max_traces
+
+        # (session_id, message_id) -> Trace, in the order the traces were started
+        self.traces = OrderedDict()
+        self.stage_latency = defaultdict(Histogram)  # stage -> latency since audio
+        self._last_audio_time = {}  # session_id -> time.perf_counter()
+
+    def on_audio(self, session_id):
+        self._last_audio_time[session_id] = time.perf_counter()
+
+    def start_trace(self, session_id, message_id, is_final):
+        """
+        Returns a new Trace for an ASR response, or None if it wasn't sampled
+        """
+
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+
+        origin_time = self._last_audio_time.get(session_id, time.perf_counter())
+        trace = Trace(session_id, message_id, is_final, origin_time, self.stage_latency)
+        self.traces[(session_id, message_id)] = trace
+
+        while len(self.traces) > self.max_traces:
+            self.traces.popitem(last=False)
+
+        return trace
+
+    def get(self, session_id, message_id):
+        return self.traces.get((session_id, message_id))
+
+    def end_session(self, session_id):
+        self._last_audio_time.pop(session_id, None)
+
+    def summary(self):
+        """
+        Latency percentiles of each stage, relative to the audio
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "num_traces": len(self.traces),
+            "stages": {
+                stage: self.stage_latency[stage].to_dict()
+                for stage in STAGES
+                if stage in self.stage_latency
+            },
+        }
+
+    def to_list(self):
+        return [trace.to_dict() for trace in self.traces.values()]
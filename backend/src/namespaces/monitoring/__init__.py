@@ -0,0 +1 @@
+from .monitoring_namespace import MonitoringNamespace
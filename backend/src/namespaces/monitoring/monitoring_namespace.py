@@ -0,0 +1,105 @@
+"""
+Admin endpoints exposing server health and performance measurements
+"""
+
+from http import HTTPStatus
+
+from flask import Response, abort, jsonify
+
+from monitoring import GREENLET_COUNTER, REGISTRY
+
+from ..namespace import Namespace
+
+
+class MonitoringNamespace(Namespace):
+    def __init__(self, rooms, emit_fn, hub_monitor, overload_controller, warm_up):
+        super().__init__(rooms, emit_fn)
+        self.hub_monitor = hub_monitor
+        self.overload_controller = overload_controller
+        self.warm_up = warm_up
+
+        REGISTRY.gauge("meetdot_rooms", "Open rooms").set_function(
+            lambda: len(self.rooms)
+        )
+        REGISTRY.gauge(
+            "meetdot_sessions", "Speakers whose audio is being recognized"
+        ).set_function(self._count_sessions)
+        GREENLET_COUNTER.install()
+        REGISTRY.gauge(
+            "meetdot_greenlets", "Live greenlets that have started running"
+        ).set_function(GREENLET_COUNTER.count)
+        REGISTRY.register(
+            "meetdot_hub_loop_lag_seconds",
+            "How late the gevent hub ran a timer",
+            "histogram",
+            hub_monitor.loop_lag,
+        )
+
+    def register_rest_endpoints(self, app):
+        @app.route("/metrics", methods=["GET"])
+        def metrics():
+            """
+            All registered metrics in the Prometheus text format
+            """
+            return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+        @app.route("/ready", methods=["GET"])
+        def ready():
+            """
+            Whether the startup warm-up has finished, for load balancers' readiness
+            checks, and how long each of its steps took
+            """
+            status = (
+                HTTPStatus.OK if self.warm_up.ready else HTTPStatus.SERVICE_UNAVAILABLE
+            )
+
+            return jsonify(self.warm_up.to_dict()), status
+
+        @app.route("/admin/hub", methods=["GET"])
+        def hub():
+            """
+            Event loop lag, greenlet run times per pipeline stage, and
+            reports of greenlets that blocked the hub
+            """
+            return jsonify(
+                {"active": self.hub_monitor.active, **self.hub_monitor.to_dict()}
+            )
+
+        @app.route("/admin/overload", methods=["GET"])
+        def overload():
+            """
+            Current load shedding level of each room
+            """
+            return jsonify(self.overload_controller.to_dict())
+
+        @app.route("/admin/traces/<room_id>", methods=["GET"])
+        def traces(room_id):
+            """
+            Per-stage latency percentiles of a room's speech translation pipeline,
+            and the sampled per-utterance traces they were measured from
+            """
+            tracer = self._get_tracer(room_id)
+
+            return jsonify({"summary": tracer.summary(), "traces": tracer.to_list()})
+
+        @app.route("/admin/traces/<room_id>/summary", methods=["GET"])
+        def traces_summary(room_id):
+            return jsonify(self._get_tracer(room_id).summary())
+
+    def _count_sessions(self):
+        return sum(
+            len(room.manager.speech_translator.sessions)
+            for _, room in self.rooms.items()
+            if room.is_captioning_active
+        )
+
+    def _get_tracer(self, room_id):
+        room = self.rooms.get(room_id)
+
+        if room is None or not room.is_captioning_active:
+            abort(
+                HTTPStatus.NOT_FOUND,
+                description=f"No captioned room with id {room_id}",
+            )
+
+        return room.manager.speech_translator.tracer
@@ -1,4 +1,4 @@
 from .room import Room, RoomNotCreated, RoomType
-from .participant import AudienceMember, Participant
+from .participant import AudienceMember, Participant, parse_caption_layout
 from .room_settings import RoomSettings
 from .room_list import RoomList
@@ -6,7 +6,6 @@ from services.post_translation.interface import (
     PostTranslationRequest,
     PostTranslationResponse,
 )
-from services.text_to_speech.service import TextToSpeechService
 
 
 class Chatbot(Participant):
@@ -23,6 +22,9 @@ class Chatbot(Participant):
         )
         self.socketio = socketio
         self.on_audio_data = on_audio_data
+        # Imported here since Coqui TTS is slow to import, and most rooms have no chatbot
+        from services.text_to_speech.service import TextToSpeechService
+
         self.tts_model = TextToSpeechService(language)
         self.audio_log_dir = logger.log_dir / "tts_wavs_tmp"
         self.audio_log_dir.mkdir(parents=True, exist_ok=True)
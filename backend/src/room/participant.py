@@ -1,9 +1,45 @@
+from services.captioning import CaptionLayout
+
+MAX_CAPTION_LINES = 10
+MIN_CHARACTERS_PER_LINE = 10
+MAX_CHARACTERS_PER_LINE = 200
+
+
+def parse_caption_layout(layout):
+    """
+    Returns the CaptionLayout of a {"numLines": ..., "charactersPerLine": ...}
+    message, None if there's none, or raises ValueError if it's out of range
+    """
+
+    if layout is None:
+        return None
+
+    try:
+        layout = CaptionLayout(
+            int(layout["numLines"]), int(layout["charactersPerLine"])
+        )
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid caption layout {layout}") from e
+
+    if not (
+        1 <= layout.num_lines <= MAX_CAPTION_LINES
+        and MIN_CHARACTERS_PER_LINE
+        <= layout.characters_per_line
+        <= MAX_CHARACTERS_PER_LINE
+    ):
+        raise ValueError(f"Caption layout {layout} is out of range")
+
+    return layout
+
+
 class Participant:
     def __init__(self, name, spoken_language, caption_language, is_audience=False):
         self.name = name
         self.spoken_language = spoken_language
         self.caption_language = caption_language
         self.is_audience = is_audience  # if set to True, we don't listen to it, no st.
+        # CaptionLayout of the participant's caption box, None for the room's
+        self.caption_layout = None
 
         # Room and user_id get set once participant joins
         self.room = None
@@ -71,12 +71,16 @@ class Room:
         self.participants[user_id] = participant
         self.logger.log_joined_room(participant)
 
+        if self.is_captioning_active:
+            self.manager.update_caption_layouts()
+
     def remove_participant(self, user_id):
         if user_id in self.participants:
             participant = self.participants.pop(user_id, None)
 
             if self.is_captioning_active:
                 self.manager.remove_participant(user_id)
+                self.manager.update_caption_layouts()
 
             if participant is not None:
                 self.logger.log_left_room(participant)
@@ -88,6 +92,14 @@ class Room:
     def caption_languages(self):
         return list(set([p.caption_language for p in self.participants.values()]))
 
+    def caption_layout_socket_room(self, layout):
+        """
+        Socket.io room of the participants reading captions in layout
+        """
+        num_lines, characters_per_line = layout
+
+        return f"{self.room_id}/captions/{num_lines}x{characters_per_line}"
+
     def to_dict(self):
         return {
             "room_id": self.room_id,
@@ -10,7 +10,7 @@ from .interface import (
     SpeechRecognitionResponse,
 )
 from .stream_asr import StreamAsr
-from ..tokenizer import Tokenizer
+from ..tokenizer import get_tokenizer
 
 import sys
 import hashlib
@@ -57,7 +57,7 @@ class IFlyTekAsr(StreamAsr):
         self.signa = self._get_signature()
         self.lang_code = LANGUAGE_CODE_MAPPING[self.user_language]
         # TODO: self.tokenizer does not support on-the-fly language switch.
-        self.tokenizer = Tokenizer(lang=self.user_language)
+        self.tokenizer = get_tokenizer(self.user_language)
 
         self.semaphore = gevent.lock.Semaphore()
         self.connect()
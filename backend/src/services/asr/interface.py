@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 from config import Config
+from utils import slotted_dataclass
 from .language_id.config import LanguageIdConfig
 
 
@@ -16,14 +17,14 @@ class SpeechRecognitionConfig(Config):
     language_id: LanguageIdConfig = LanguageIdConfig()
 
 
-@dataclass
+@slotted_dataclass
 class SpeechRecognitionRequest:
     session_id: str
     chunk: bytes
     end_utterance: bool = False
 
 
-@dataclass
+@slotted_dataclass
 class SpeechRecognitionResponse:
     transcript: str
     # offset from the beginning of the recording in ms. this becomes the primary key later
@@ -33,11 +34,11 @@ class SpeechRecognitionResponse:
     language: str = ""
 
 
-@dataclass
+@slotted_dataclass
 class LanguageIdRequest:
     session_id: str
 
 
-@dataclass
+@slotted_dataclass
 class LanguageIdResponse:
     detected_language: str
@@ -13,6 +13,21 @@ from services.asr import SpeechRecognitionConfig
 from .config import LanguageIdConfig
 from .model import Wav2Vec2ForSpeechClassification
 
+# model path -> Wav2Vec2ForSpeechClassification, shared by every session's detector
+MODELS = {}
+
+
+def get_model(model_path):
+    # Load each model only once, it's only used for inference
+
+    if model_path not in MODELS:
+        model = Wav2Vec2ForSpeechClassification.from_pretrained(model_path)
+        if torch.cuda.is_available():
+            model = model.to("cuda")
+        MODELS[model_path] = model
+
+    return MODELS[model_path]
+
 
 class LanguageDetector:
     SUPPORTED_LANGUAGES = {"en-US", "zh", "es-ES", "pt-BR"}
@@ -25,9 +40,7 @@ class LanguageDetector:
         self.logger = logger
         self.audio_log_dir = logger.log_dir / "langid_wavs_tmp"
         self.audio_log_dir.mkdir(parents=True, exist_ok=True)
-        self.model = Wav2Vec2ForSpeechClassification.from_pretrained(self.config.model_path)
-        if torch.cuda.is_available():
-            self.model = self.model.to("cuda")
+        self.model = get_model(self.config.model_path)
         self.model_language_ids = ["zh", "es-ES", "pt-BR", "en-US"]
         self.frames = []
 
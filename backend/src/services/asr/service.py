@@ -1,65 +1,65 @@
 import warnings
 
-from .google_stream_asr import GoogleStreamAsr
-from .iflytek_asr import IFlyTekAsr
+from utils import import_class
+
 from .interface import SpeechRecognitionRequest, LanguageIdRequest, LanguageIdResponse
-from .kaldi import KaldiStreamAsr, KaldiHTTPAsr
-from .language_id.language_id import LanguageDetector
-from .wenet import WenetStreamAsr
 
 
 class SpeechRecognitionService:
+    # provider -> (module, class), imported when a room first uses the provider, so
+    # e.g. google.cloud.speech is only loaded if Google ASR is used
     PROVIDERS = {
-        "google": GoogleStreamAsr,
-        "wenet": WenetStreamAsr,
-        "kaldi": KaldiStreamAsr,
-        "iFlytek": IFlyTekAsr,
-        "kaldi HTTP (en, zh)": KaldiHTTPAsr,
-        "iFlytek": IFlyTekAsr,
+        "google": (".google_stream_asr", "GoogleStreamAsr"),
+        "wenet": (".wenet", "WenetStreamAsr"),
+        "kaldi": (".kaldi", "KaldiStreamAsr"),
+        "iFlytek": (".iflytek_asr", "IFlyTekAsr"),
+        "kaldi HTTP (en, zh)": (".kaldi", "KaldiHTTPAsr"),
     }
+    # Providers that fall back to Google ASR for languages they don't support
+    LIMITED_LANGUAGE_PROVIDERS = ("kaldi", "kaldi HTTP (en, zh)", "wenet")
 
     def __init__(self, config, logger, callback_fn, language_id_callback_fn):
         self.logger = logger
         self.config = config
         self.language = config.language
         self.language_id_callback_fn = language_id_callback_fn
+        self.language_detection_paused = False
 
         if config.language_id.enabled:
+            # Imports torch, torchaudio and speechbrain
+            LanguageDetector = import_class(
+                ".language_id.language_id", "LanguageDetector", __package__
+            )
             self.language_detector = LanguageDetector(config, logger)
         else:
             self.language_detector = None
 
         if config.provider in SpeechRecognitionService.PROVIDERS:
+            provider_class = import_class(
+                *SpeechRecognitionService.PROVIDERS[config.provider], __package__
+            )
+
             if (
-                (
-                    config.provider == "kaldi"
-                    and self.language not in KaldiStreamAsr.SUPPORTED_LANGUAGES
-                )
-                or (
-                    config.provider == "kaldi HTTP (en, zh)"
-                    and self.language not in KaldiHTTPAsr.SUPPORTED_LANGUAGES
-                )
-                or (
-                    config.provider == "wenet"
-                    and self.language not in WenetStreamAsr.SUPPORTED_LANGUAGES
-                )
+                config.provider in SpeechRecognitionService.LIMITED_LANGUAGE_PROVIDERS
+                and self.language not in provider_class.SUPPORTED_LANGUAGES
             ):
                 logger.info(
                     f"Unsupported language ({self.language}) for {config.provider}, "
                     + "falling back to Google ASR"
                 )
                 config.provider = "google"
-            self.provider = SpeechRecognitionService.PROVIDERS[config.provider](
-                config, logger, callback_fn
-            )
+                provider_class = import_class(
+                    *SpeechRecognitionService.PROVIDERS["google"], __package__
+                )
+            self.provider = provider_class(config, logger, callback_fn)
         else:
             raise ValueError(
                 f"Unsupported speech recognition provider {config.provider}, installed providers"
-                + f"are {SpeechRecognitionService.PROVIDERS}"
+                + f"are {tuple(SpeechRecognitionService.PROVIDERS)}"
             )
 
     def __call__(self, request: SpeechRecognitionRequest):
-        if self.language_detector is not None:
+        if self.language_detector is not None and not self.language_detection_paused:
             self.language_detector(request.session_id, request.chunk)
         output = self.provider(request)
         if request.end_utterance:
@@ -84,6 +84,19 @@ class SpeechRecognitionService:
         if self.language_detector is not None:
             return self.language_detector.run(update_language)
 
+    def pause_language_detection(self, paused):
+        """
+        Stop feeding audio to the language detector while paused, so it stops
+        running the model
+        """
+
+        if paused and not self.language_detection_paused:
+            if self.language_detector is not None:
+                # Don't resume with a window of stale audio
+                self.language_detector.frames = []
+
+        self.language_detection_paused = paused
+
     def terminate(self, wait_for_final=True):
         if self.language_detector is not None:
             self.language_detector.terminate()
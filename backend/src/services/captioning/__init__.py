@@ -1,2 +1,7 @@
-from .interface import CaptioningConfig, CaptioningRequest, CaptioningResponse
+from .interface import (
+    CaptioningConfig,
+    CaptioningRequest,
+    CaptioningResponse,
+    CaptionLayout,
+)
 from .service import CaptioningService
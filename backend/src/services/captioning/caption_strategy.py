@@ -1,7 +1,45 @@
+import os
+import time
 from typing import Tuple
 
 from .interface import CaptioningConfig, CaptioningRequest, CaptioningResponse
-from .utils import combine_utterances
+from .utils import append_last_utterance, append_utterance
+
+
+class CompletedUtterances:
+    """
+    The combined text of a speaker's completed utterances in a language. Only
+    the tail that can still show up in captions is kept, see
+    CaptionStrategy.trim_completed_utterances.
+    """
+
+    def __init__(self):
+        # Tail of the combined text
+        self.text = ""
+        # Wrapped lines cached by the strategy, before text, and the index of
+        # the first of them among all the lines the speaker's captions wrapped to
+        self.lines = []
+        self.line_index = 0
+
+
+class CaptionState:
+    """
+    Everything a strategy keeps about the captions of a speaker in a language,
+    each part bounded in size. It's dropped when the speaker leaves, see
+    CaptionStrategy.end_session, or after CAPTION_STATE_IDLE_SECONDS without
+    captions, e.g. once nobody reads the language any more.
+    """
+
+    def __init__(self):
+        self.completed = CompletedUtterances()
+        # The last captions' lines, and the index of the first of them
+        self.prev_lines = []
+        self.prev_line_index = 0
+        # The IncrementalWrapper's WrappedText of the last captions' text
+        self.wrapped = None
+        # (time, number of lines) of the last caption shown, in Skype style
+        self.last_caption = None
+        self.last_used = time.monotonic()
 
 
 class CaptionStrategy:
@@ -29,9 +67,10 @@ class CaptionStrategy:
 
     def __init__(self, config: CaptioningConfig):
         self.config = config
-        # session_id, target_language as unique keys
-        self.requests_history_dict = {}
-        self.completed_utterances = {}
+        # (session_id, target_language) -> CaptionState
+        self.states = {}
+        self.idle_timeout = float(os.getenv("CAPTION_STATE_IDLE_SECONDS", 1800))
+        self.last_eviction_time = time.monotonic()
 
     def __call__(self, request: CaptioningRequest) -> Tuple[CaptioningResponse, float]:
         """
@@ -44,21 +83,61 @@ class CaptionStrategy:
         """
         raise NotImplementedError
 
+    def get_state(self, session_id, target_language) -> CaptionState:
+        now = time.monotonic()
+
+        if now - self.last_eviction_time > self.idle_timeout / 2:
+            self.evict_idle_states(now)
+
+        key = (session_id, target_language)
+        state = self.states.get(key)
+
+        if state is None:
+            state = self.states[key] = CaptionState()
+        state.last_used = now
+
+        return state
+
+    def evict_idle_states(self, now=None):
+        """
+        Drop the state of speakers and languages without captions for
+        idle_timeout seconds
+        """
+        now = time.monotonic() if now is None else now
+        self.last_eviction_time = now
+
+        for key, state in list(self.states.items()):
+            if now - state.last_used > self.idle_timeout:
+                del self.states[key]
+
+    def end_session(self, session_id):
+        for key in [k for k in self.states if k[0] == session_id]:
+            del self.states[key]
+
     def combine_speaker_utterances(
         self, session_id, target_language, last_utterance, last_utterance_complete=False
     ):
         """
         Helper function to combine all translated utterances from a speaker into one
-        long string of multiple sentences.
+        long string of multiple sentences. Only the tail of the completed utterances
+        the strategy keeps (see trim_completed_utterances) is included.
         """
-        key = (session_id, target_language)
-        prev_utterances = self.completed_utterances.get(key, [])
-        full_text = combine_utterances(
-            target_language, prev_utterances, last_utterance, last_utterance_complete
+        completed = self.get_state(session_id, target_language).completed
+        full_text = append_last_utterance(
+            target_language, completed.text, last_utterance, last_utterance_complete
         )
 
         if last_utterance_complete:
-            self.completed_utterances.setdefault(key, [])
-            self.completed_utterances[key].append(last_utterance)
+            completed.text = append_utterance(
+                target_language, completed.text, last_utterance
+            )
+            self.trim_completed_utterances(target_language, completed)
 
         return full_text.strip()
+
+    def trim_completed_utterances(self, target_language, completed):
+        """
+        Called when an utterance is completed, to drop the start of the completed
+        utterances' text once it can't show up in captions any more, so captions
+        cost the same however long the meeting is. Keeps everything by default.
+        """
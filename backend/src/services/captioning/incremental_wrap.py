@@ -0,0 +1,131 @@
+import re
+from bisect import bisect_left
+from typing import List, NamedTuple
+
+# Wrapped lines at the end of a text that appending to it can re-flow: the one
+# it's appended to, and the one before if the word it's appended to moves up
+REFLOW_LINES = 2
+
+WHITESPACE = re.compile(r"\s")
+
+
+def common_prefix_length(s1, s2):
+    """
+    Length of the common prefix of s1 and s2
+    """
+    # Bisect with string comparisons rather than comparing character by character
+    low, high = 0, min(len(s1), len(s2))
+
+    while low < high:
+        middle = (low + high + 1) // 2
+
+        if s1[:middle] == s2[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def is_restart_point(text, i):
+    """
+    Whether wrapping text[i:] gives the same lines as wrapping text does from i,
+    when one of its lines starts at i. Wrappers split words at hyphens, but only
+    after two letters, so wrapping a hyphenated word from its middle can split
+    it differently.
+    """
+
+    if i == 0 or text[i - 1].isspace():
+        return True
+
+    hyphen = text.rfind("-", 0, i)
+
+    if hyphen != -1 and not WHITESPACE.search(text, hyphen, i):
+        return False
+
+    hyphen = text.find("-", i)
+
+    return hyphen == -1 or bool(WHITESPACE.search(text, i, hyphen))
+
+
+def line_starts(text, lines, start=0):
+    """
+    Returns where each of the wrapped lines of text[start:] starts in text, or
+    None if a line isn't a slice of the text
+    """
+    starts = []
+
+    for line in lines:
+        # Skip the whitespace dropped between lines
+        while (
+            not text.startswith(line, start)
+            and start < len(text)
+            and text[start].isspace()
+        ):
+            start += 1
+
+        if not text.startswith(line, start):
+            return None
+
+        starts.append(start)
+        start += len(line)
+
+    return starts
+
+
+class WrappedText(NamedTuple):
+    text: str
+    lines: List[str]
+    starts: List[int]  # where each line starts in text
+
+
+class IncrementalWrapper:
+    """
+    Wraps texts that change at the end, like a speaker's captions as their
+    partials come in. Greedy wrappers (textwrap.wrap, cjkwrap.wrap and pswrap)
+    wrap a text the same from the start of any of its lines, so only the lines
+    from a few before the first changed character are wrapped again, and the
+    rest are reused (the same str objects, which compare equal in O(1)).
+    """
+
+    def __init__(self, wrap_fn, width):
+        """
+        wrap_fn: wrap_fn(text, width) returns the wrapped lines of text
+        """
+        self.wrap_fn = wrap_fn
+        self.width = width
+
+    def wrap(self, text, previous=None):
+        """
+        Returns the lines of text, and the WrappedText to pass as previous when
+        wrapping the next text (or None if it can't be reused)
+
+        previous: the WrappedText returned when wrapping the text before, if any
+        """
+
+        if "\t" in text:
+            # Tabs are expanded to the next multiple of 8 columns from the start
+            # of the text, so the text can't be wrapped from the start of a line
+            return self.wrap_fn(text, self.width), None
+
+        prev_text, prev_lines, prev_starts = previous or ("", [], [])
+        prefix_length = common_prefix_length(prev_text, text)
+
+        # Keep the lines before the ones the change can re-flow: the line it's
+        # in, and REFLOW_LINES before that, since cutting the text at the change
+        # can move the end of the text up a line
+        num_kept = max(0, bisect_left(prev_starts, prefix_length) - REFLOW_LINES - 1)
+
+        while num_kept and not is_restart_point(text, prev_starts[num_kept]):
+            num_kept -= 1
+
+        start = prev_starts[num_kept] if num_kept else 0
+
+        new_lines = self.wrap_fn(text[start:], self.width)
+        lines = prev_lines[:num_kept] + new_lines
+        new_starts = line_starts(text, new_lines, start)
+
+        if new_starts is None:
+            return lines, None
+
+        return lines, WrappedText(text, lines, prev_starts[:num_kept] + new_starts)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
 from config import Config
+from utils import slotted_dataclass
 
 
 @dataclass
@@ -13,17 +14,28 @@ class CaptioningConfig(Config):
     punctuation_sensitive: bool = True
 
 
-@dataclass
+class CaptionLayout(NamedTuple):
+    """
+    The size of a viewer's caption box
+    """
+
+    num_lines: int
+    characters_per_line: int
+
+
+@slotted_dataclass
 class CaptioningRequest:
     session_id: str
     message_id: int
     language: str
     utterance: str
     utterance_complete: bool
+    trace: Optional[Any] = None  # monitoring.tracing.Trace, if sampled
 
 
-@dataclass
+@slotted_dataclass
 class CaptioningResponse:
     lines: List[str]
     line_index: int
     highlight_boundaries: Union[List[int], None] = None
+    layout: Optional[CaptionLayout] = None  # the layout the lines are wrapped for
@@ -1,11 +1,15 @@
-from collections import defaultdict
+from dataclasses import replace
 from typing import List, Tuple
 
-import cjkwrap
-
 from .caption_strategy import CaptionStrategy
 from .interface import CaptioningConfig, CaptioningRequest, CaptioningResponse
-from .pswrap import pswrap
+from .incremental_wrap import (
+    REFLOW_LINES,
+    IncrementalWrapper,
+    is_restart_point,
+    line_starts,
+)
+from .pswrap import cjk_wrap, pswrap
 
 
 class LinewiseScrollStrategy(CaptionStrategy):
@@ -19,17 +23,26 @@ class LinewiseScrollStrategy(CaptionStrategy):
 
     def __init__(self, config: CaptioningConfig):
         super().__init__(config)
-        self.prev_lines = defaultdict(list)
-        self.prev_line_index = defaultdict(int)
 
-    def __call__(self, request: CaptioningRequest) -> Tuple[CaptioningResponse, float]:
-        delay_time = 0.0
-        session_id = request.session_id
-        target_language = request.language
         if self.config.punctuation_sensitive:
-            text_wrapper = pswrap
+            self.text_wrapper = pswrap
         else:
-            text_wrapper = cjkwrap.wrap
+            self.text_wrapper = cjk_wrap
+
+        # Wraps the captions of each (session, language) from the last lines the
+        # new partial changed, see CaptionState.wrapped
+        self.incremental_wrapper = IncrementalWrapper(
+            self.text_wrapper, self.config.characters_per_line
+        )
+
+    def __call__(self, request: CaptioningRequest) -> Tuple[CaptioningResponse, float]:
+        delay_time = 0.0
+        state = self.get_state(request.session_id, request.language)
+
+        # Lines cached before the text of the completed utterances, taken before
+        # completing this utterance trims them
+        prev_completed_lines = state.completed.lines
+        prev_completed_line_index = state.completed.line_index
 
         text = self.combine_speaker_utterances(
             request.session_id,
@@ -38,24 +51,25 @@ class LinewiseScrollStrategy(CaptionStrategy):
             request.utterance_complete,
         )
 
-        lines = text_wrapper(text, self.config.characters_per_line)
-        line_index = max(0, len(lines) - self.config.num_lines)
+        text_lines, state.wrapped = self.incremental_wrapper.wrap(text, state.wrapped)
+        lines = prev_completed_lines + text_lines
+        line_index = max(
+            0, prev_completed_line_index + len(lines) - self.config.num_lines
+        )
         lines = lines[-self.config.num_lines :]
 
         if not request.utterance_complete:
             # highlight is only enabled when utterance is incomplete
             highlight_boundaries = LinewiseScrollStrategy.get_highlight(
-                self.prev_lines[(session_id, target_language)][
-                    line_index - self.prev_line_index[(session_id, target_language)] :
-                ],
+                state.prev_lines[line_index - state.prev_line_index :],
                 lines,
                 line_index,
             )
         else:
             highlight_boundaries = [-1] * len(lines)
 
-        self.prev_lines[(session_id, target_language)] = lines
-        self.prev_line_index[(session_id, target_language)] = line_index
+        state.prev_lines = lines
+        state.prev_line_index = line_index
 
         return (
             CaptioningResponse(
@@ -66,6 +80,41 @@ class LinewiseScrollStrategy(CaptionStrategy):
             delay_time,
         )
 
+    def wrap(self, text):
+        return self.text_wrapper(text, self.config.characters_per_line)
+
+    def trim_completed_utterances(self, target_language, completed):
+        """
+        Keeps the completed utterances' text from the start of its last
+        REFLOW_LINES wrapped lines (or the line before, if a hyphenated word spans
+        them), and caches the last num_lines lines before that. Appending text
+        to a greedily wrapped text only changes its last lines, so wrapping the
+        tail and appending it to the cached lines gives the same lines as
+        wrapping all of the text.
+        """
+        # Captions wrap the text stripped
+        text = completed.text.strip()
+        offset = len(completed.text) - len(completed.text.lstrip())
+        lines = self.wrap(text)
+        starts = line_starts(text, lines)
+
+        if starts is None or "\t" in text:
+            return
+
+        num_kept = max(0, len(lines) - REFLOW_LINES)
+
+        while num_kept and not is_restart_point(text, starts[num_kept]):
+            num_kept -= 1
+
+        if not num_kept or self.wrap(text[starts[num_kept] :]) != lines[num_kept:]:
+            return
+
+        lines = completed.lines + lines[:num_kept]
+        kept_lines = lines[-self.config.num_lines :]
+        completed.line_index += len(lines) - len(kept_lines)
+        completed.lines = kept_lines
+        completed.text = completed.text[offset + starts[num_kept] :]
+
     @staticmethod
     def get_highlight(
         prev_lines: List[str], lines: List[str], line_index: int
@@ -100,6 +149,51 @@ class LinewiseScrollStrategy(CaptionStrategy):
 
         return result
 
+    @staticmethod
+    def merge_highlights(
+        older: CaptioningResponse, newer: CaptioningResponse
+    ) -> CaptioningResponse:
+        """
+        Returns a copy of newer highlighting what changed since the update
+        before older, for when older is never shown. Highlights start at one
+        point (line and character) and run to the end of the captions, and the
+        text before newer's point is the same as older's, so the merged
+        highlight starts at the earlier of the two points.
+        """
+        if newer.highlight_boundaries is None:
+            return newer
+
+        if newer.line_index < older.line_index:
+            # Rewrapped from an earlier line, so there are no older lines to
+            # compare with, as in CaptionScheduler._highlight_since_last_emit
+            return replace(newer, highlight_boundaries=[0] * len(newer.lines))
+
+        points = []
+
+        for response in (older, newer):
+            boundaries = response.highlight_boundaries or []
+
+            for i, boundary in enumerate(boundaries):
+                if boundary != -1:
+                    points.append((response.line_index + i, boundary))
+                    break
+
+        if not points:
+            return newer
+
+        line, character = min(points)
+        boundaries = []
+
+        for i in range(len(newer.lines)):
+            if newer.line_index + i < line:
+                boundaries.append(-1)
+            elif newer.line_index + i == line:
+                boundaries.append(character)
+            else:
+                boundaries.append(0)
+
+        return replace(newer, highlight_boundaries=boundaries)
+
     @staticmethod
     def get_common_prefix(s1: str, s2: str) -> int:
         """Get the length of the common prefix of s1, s2"""
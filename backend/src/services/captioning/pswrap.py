@@ -1,9 +1,10 @@
-from collections import Counter
+from functools import lru_cache
 from string import punctuation
 import sys
 import textwrap
 import unicodedata
 
+import cjkwrap
 from zhon import hanzi
 
 
@@ -14,6 +15,25 @@ def pswrap(text, width=70, **kwargs):
     return w.wrap(text)
 
 
+def cjk_wrap(text, width=70, **kwargs):
+    """
+    Same as cjkwrap.wrap, but splits long words (e.g. Chinese text without
+    spaces) by cached widths instead of measuring every prefix of the word
+    """
+    w = CachedWidthCJKWrapper(width=width, **kwargs)
+    return w.wrap(text)
+
+
+# How much less than its display width each punctuation counts for: latin
+# punctuation 1 and Chinese punctuation 2
+PUNCTUATION_WIDTHS = {}
+
+for p in punctuation + hanzi.punctuation:
+    PUNCTUATION_WIDTHS[p] = PUNCTUATION_WIDTHS.get(p, 0) + (
+        1 if p in punctuation else 2
+    )
+
+
 # Reference:
 # https://github.com/fgallaire/cjkwrap/blob/1bfe0516f58bace3f9f2f462892b7b3475702474/cjkwrap.py
 def is_wide(char):
@@ -24,6 +44,20 @@ def is_wide(char):
     return unicodedata.east_asian_width(char) in ("F", "W")
 
 
+@lru_cache(maxsize=None)
+def char_width(char):
+    return 2 if is_wide(char) else 1
+
+
+@lru_cache(maxsize=None)
+def char_ps_width(char):
+    """
+    Width of char, not counting punctuation, which can be negative for narrow
+    Chinese punctuation
+    """
+    return char_width(char) - PUNCTUATION_WIDTHS.get(char, 0)
+
+
 # Reference:
 # https://github.com/fgallaire/cjkwrap/blob/1bfe0516f58bace3f9f2f462892b7b3475702474/cjkwrap.py
 def cjklen(text):
@@ -31,7 +65,7 @@ def cjklen(text):
 
     Return the real width of an unicode text, the len of any other type.
     """
-    return sum(2 if is_wide(char) else 1 for char in text)
+    return sum(map(char_width, text))
 
 
 # Reference:
@@ -44,11 +78,23 @@ def cjkslices(text, index):
     ps_len = get_ps_len(text)
     if ps_len <= index:
         return text, u""
-    i = 1
-    # <= and i-1 to catch the last double length char of odd line
-    while get_ps_len(text[:i]) <= index:
-        i = i + 1
-    return text[: i - 1], text[i - 1 :]
+    # Widths can be negative, so the prefix sums aren't monotonic and can't be
+    # bisected
+    return slice_at_width(text, index, char_ps_width)
+
+
+def slice_at_width(text, index, width_fn):
+    """
+    Return the two slices of a text cut before the first character that takes
+    the width of the text up to it (the sum of width_fn of its characters) past
+    the index
+    """
+    prefix_len = 0
+    for i, char in enumerate(text):
+        prefix_len += width_fn(char)
+        if prefix_len > index:
+            return text[:i], text[i:]
+    return text, ""
 
 
 def get_ps_len(text):
@@ -56,16 +102,7 @@ def get_ps_len(text):
 
     Return the length of text excluding punctuations
     """
-    counts = Counter(text)
-    full_puncs = punctuation + hanzi.punctuation
-    punctuation_len = sum(
-        [
-            counts.get(p, 0) if p in punctuation else 2 * counts.get(p, 0)
-            for p in full_puncs
-        ]
-    )
-    ps_len = cjklen(text) - punctuation_len
-    return ps_len
+    return sum(map(char_ps_width, text))
 
 
 # A text wrapper that can handle both latin and cjk chars
@@ -230,3 +267,19 @@ class PunctuationSensitiveWrapper(textwrap.TextWrapper):
                     break
 
         return lines
+
+
+class CachedWidthCJKWrapper(cjkwrap.CJKWrapper):
+    def _handle_long_word(self, reversed_chunks, cur_line, cur_len, width):
+        if width < 1:
+            space_left = 1
+        else:
+            space_left = width - cur_len
+        if self.break_long_words:
+            chunk_start, chunk_end = slice_at_width(
+                reversed_chunks[-1], space_left, char_width
+            )
+            cur_line.append(chunk_start)
+            reversed_chunks[-1] = chunk_end
+        elif not cur_line:
+            cur_line.append(reversed_chunks.pop())
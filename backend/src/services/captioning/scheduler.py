@@ -0,0 +1,168 @@
+"""
+Coalesces caption updates into frames.
+
+The scheduler emits the first caption update of a (session, language) right away,
+then at most one per frame interval, always with the newest captions. The delays
+of Skype style captions are waited out in one timer queue, served by one greenlet.
+"""
+import heapq
+import itertools
+import logging
+import time
+
+import gevent
+from gevent.event import Event
+
+from monitoring import REGISTRY
+
+from .linewise_scroll import LinewiseScrollStrategy
+
+CAPTION_UPDATES = REGISTRY.counter(
+    "meetdot_caption_updates_total",
+    "Caption updates emitted, or replaced by a newer update before their frame",
+    ("result",),
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CaptionScheduler:
+    # Timer kinds
+    FRAME = 0  # the end of a key's frame, when its pending update is emitted
+    DELAYED = 1  # an update delayed by its strategy
+
+    def __init__(self, emit_fn, frame_interval=0.05):
+        """
+        emit_fn: emit_fn(service_request=..., service_response=...) emits captions
+        frame_interval: least seconds between emits of a (session, language,
+            layout), or 0 to emit every update
+        """
+        self.emit_fn = emit_fn
+        self.frame_interval = frame_interval
+
+        # (session_id, language, layout) -> the newest update not emitted yet
+        self.pending = {}
+        # (session_id, language, layout) -> (time, response) of the last emit
+        self.emitted = {}
+        # heap of (due time, sequence number, kind, key, request, response)
+        self.timers = []
+        self._sequence = itertools.count()
+        self.wakeup = Event()
+        self.worker = None
+
+    def __call__(self, request, response, delay_time=0.0):
+        if delay_time and delay_time > 0.0:
+            self._add_timer(
+                time.monotonic() + delay_time, self.DELAYED, request, response
+            )
+        else:
+            self._submit(request, response)
+
+    def _submit(self, request, response):
+        key = (request.session_id, request.language, response.layout)
+
+        if not response.lines:
+            # Nothing to show, e.g. an incomplete utterance in Skype style, so
+            # there's nothing newer to replace a pending update with
+            self.emit_fn(service_request=request, service_response=response)
+            return
+
+        if key in self.pending:
+            CAPTION_UPDATES.labels("coalesced").inc()
+            self.pending[key] = (request, response, True)
+            return
+
+        last_emit_time = self.emitted.get(key, (None, None))[0]
+        now = time.monotonic()
+
+        if last_emit_time is None or now - last_emit_time >= self.frame_interval:
+            self._emit(key, request, response, coalesced=False)
+        else:
+            self.pending[key] = (request, response, False)
+            self._add_timer(last_emit_time + self.frame_interval, self.FRAME, key=key)
+
+    def _emit(self, key, request, response, coalesced):
+        if coalesced:
+            response = self._highlight_since_last_emit(key, response)
+
+        self.emitted[key] = (time.monotonic(), response)
+        CAPTION_UPDATES.labels("emitted").inc()
+        self.emit_fn(service_request=request, service_response=response)
+
+    def _highlight_since_last_emit(self, key, response):
+        """
+        Highlights are relative to the previous update, so when updates were
+        replaced before being emitted, highlight everything that changed since
+        the last update emitted instead
+        """
+        boundaries = response.highlight_boundaries
+
+        if boundaries is None or all(b == -1 for b in boundaries):
+            return response
+
+        last_response = self.emitted.get(key, (None, None))[1]
+        prev_lines = []
+
+        if last_response is not None:
+            start = response.line_index - last_response.line_index
+            prev_lines = last_response.lines[start:] if start >= 0 else []
+
+        response.highlight_boundaries = LinewiseScrollStrategy.get_highlight(
+            prev_lines, response.lines, response.line_index
+        )
+
+        return response
+
+    def _add_timer(self, due_time, kind, request=None, response=None, key=None):
+        timer = (due_time, next(self._sequence), kind, key, request, response)
+        heapq.heappush(self.timers, timer)
+
+        if self.worker is None:
+            self.worker = gevent.spawn(self._run)
+        elif self.timers[0] is timer:
+            # Due before the timer the worker is waiting for
+            self.wakeup.set()
+
+    def _run(self):
+        # Exits when there are no timers left, so idle rooms hold no greenlet
+        try:
+            while self.timers:
+                timeout = self.timers[0][0] - time.monotonic()
+
+                if timeout > 0:
+                    self.wakeup.clear()
+                    self.wakeup.wait(timeout)
+                    continue
+
+                _, _, kind, key, request, response = heapq.heappop(self.timers)
+
+                # One failed emit mustn't end the worker, leaving the other
+                # timers, and the updates pending on them, without one
+                try:
+                    if kind == self.DELAYED:
+                        self._submit(request, response)
+                    elif key in self.pending:
+                        request, response, coalesced = self.pending.pop(key)
+                        self._emit(key, request, response, coalesced)
+                except Exception:
+                    logger.exception(f"Failed to emit captions of {key or request}")
+        finally:
+            self.worker = None
+
+    def end_session(self, session_id):
+        """
+        Emit the session's pending updates, and drop its delayed ones
+        """
+        for key in [k for k in self.pending if k[0] == session_id]:
+            request, response, coalesced = self.pending.pop(key)
+            self._emit(key, request, response, coalesced)
+
+        self.timers = [
+            timer
+            for timer in self.timers
+            if timer[2] == self.FRAME or timer[4].session_id != session_id
+        ]
+        heapq.heapify(self.timers)
+
+        for key in [k for k in self.emitted if k[0] == session_id]:
+            self.emitted.pop(key)
@@ -1,7 +1,14 @@
-import gevent
+import os
+from dataclasses import replace
 
-from .interface import CaptioningConfig, CaptioningRequest, CaptioningResponse
+from .interface import (
+    CaptioningConfig,
+    CaptioningRequest,
+    CaptioningResponse,
+    CaptionLayout,
+)
 from .linewise_scroll import LinewiseScrollStrategy
+from .scheduler import CaptionScheduler
 from .skype_style import SkypeStyleStrategy
 from .word_level_sliding import WordLevelSlidingStrategy
 
@@ -18,36 +25,67 @@ class CaptioningService:
         self.logger = logger
         self.strategy = CAPTION_STRATEGIES[config.strategy](config)
         self.callback_fn = callback_fn
+        self.scheduler = CaptionScheduler(
+            callback_fn,
+            frame_interval=float(os.getenv("CAPTION_FRAME_INTERVAL_MS", 50)) / 1000,
+        )
+
+        # Viewers can read captions in layouts other than the room's, e.g. on
+        # phones. Captions are computed once per layout in use, by a strategy
+        # of their own, rather than once per viewer.
+        self.default_layout = CaptionLayout(
+            config.num_lines, config.characters_per_line
+        )
+        # layout -> strategy
+        self.strategies = {self.default_layout: self.strategy}
+        # language -> layouts its viewers read captions in
+        self.layouts = {}
 
     def __call__(self, request: CaptioningRequest) -> CaptioningResponse:
         # sync way return response
         # return self.strategy.__call__(request)
 
         # async way return response through callback function
-        response, delay_time = self.strategy(request)
-
-        if delay_time and delay_time > 0.0:
-            gevent.spawn_later(
-                delay_time,
-                self.callback_fn,
-                service_request=request,
-                service_response=response,
-            )
-        else:
-            self.callback_fn(
-                service_request=request,
-                service_response=response,
+        layouts = self.layouts.get(request.language) or [self.default_layout]
+
+        for layout in layouts:
+            response, delay_time = self._get_strategy(layout)(request)
+            response.layout = layout
+            self.scheduler(request, response, delay_time)
+
+        if request.trace is not None:
+            request.trace.mark("captioning", request.language)
+
+    def set_layouts(self, layouts):
+        """
+        layouts: language -> the layouts its viewers read captions in. Other
+            languages are captioned in the room's layout.
+        """
+        self.layouts = {
+            language: sorted(set(language_layouts))
+            for language, language_layouts in layouts.items()
+        }
+        in_use = {self.default_layout}.union(*self.layouts.values())
+
+        for layout in [layout for layout in self.strategies if layout not in in_use]:
+            self.strategies.pop(layout)
+
+    def _get_strategy(self, layout):
+        if layout not in self.strategies:
+            config = replace(
+                self.config,
+                num_lines=layout.num_lines,
+                characters_per_line=layout.characters_per_line,
             )
+            self.strategies[layout] = CAPTION_STRATEGIES[config.strategy](config)
+
+        return self.strategies[layout]
 
     def end_session(self, session_id):
         """
-        Clear utterances after session
+        Clear the session's captions after it ends
         """
-        keys_to_pop = []
-
-        for key in self.strategy.completed_utterances:
-            if key[0] == session_id:
-                keys_to_pop.append(key)
+        self.scheduler.end_session(session_id)
 
-        for key in keys_to_pop:
-            self.strategy.completed_utterances.pop(key)
+        for strategy in self.strategies.values():
+            strategy.end_session(session_id)
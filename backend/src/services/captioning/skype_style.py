@@ -20,11 +20,9 @@ class SkypeStyleStrategy(CaptionStrategy):
     """
 
     def __call__(self, request):
-        session_id = request.session_id
         target_language = request.language
         text_wrapper = cjkwrap if target_language == "zh" else textwrap
-
-        self.requests_history_dict.setdefault((session_id, target_language), [])
+        state = self.get_state(request.session_id, target_language)
         lines = []
 
         # check if remain_text overflow max_lines of caption window
@@ -38,10 +36,8 @@ class SkypeStyleStrategy(CaptionStrategy):
 
         if request.utterance_complete:
             ret_lines = lines
-            delay_time = self.maintain_min_display_time(session_id, target_language)
-            self.requests_history_dict[(session_id, target_language)].append(
-                (time.time(), len(ret_lines))
-            )
+            delay_time = self.maintain_min_display_time(state)
+            state.last_caption = (time.time(), len(ret_lines))
         else:
             ret_lines = []
 
@@ -50,17 +46,12 @@ class SkypeStyleStrategy(CaptionStrategy):
             delay_time,
         )
 
-    def maintain_min_display_time(self, session_id, target_language):
+    def maintain_min_display_time(self, state):
         # When displaying a string, estimate minimum time S for it to remain.
 
-        if len(self.requests_history_dict[(session_id, target_language)]) > 0:
+        if state.last_caption is not None:
             cur_time = time.time()
-            last_caption_start_time = self.requests_history_dict[
-                (session_id, target_language)
-            ][-1][0]
-            last_caption_lines = self.requests_history_dict[
-                (session_id, target_language)
-            ][-1][1]
+            last_caption_start_time, last_caption_lines = state.last_caption
             min_wait_time = min_read_time_per_line * last_caption_lines
             actual_pass_time = cur_time - last_caption_start_time
 
@@ -13,17 +13,43 @@ def combine_utterances(
     Helper function to combine utterances into one
     long string of multiple sentences.
     """
-    delimiter = UTTERANCE_DELIMITERS.get(target_language, ". ")
     full_text = ""
+
+    for utterance in prev_utterances:
+        full_text = append_utterance(target_language, full_text, utterance)
+
+    return append_last_utterance(
+        target_language, full_text, last_utterance, last_utterance_complete
+    )
+
+
+def append_utterance(target_language, full_text, utterance):
+    """
+    Appends a completed utterance to the combined text of the previous ones,
+    which it depends on only through its last character
+    """
+    delimiter = UTTERANCE_DELIMITERS.get(target_language, ". ")
     utterances_splitter = " " if target_language != "zh" else ""
     # Note: this implementation assumes utterance_splitter will always be whitespace
 
-    for utterance in prev_utterances:
-        utterance = utterance.strip()
-        full_text += utterance
-        if full_text and full_text[-1] not in DELIMITERS:
-            full_text += delimiter
-        full_text += utterances_splitter
+    utterance = utterance.strip()
+    full_text += utterance
+    if full_text and full_text[-1] not in DELIMITERS:
+        full_text += delimiter
+    full_text += utterances_splitter
+
+    return full_text
+
+
+def append_last_utterance(
+    target_language, full_text, last_utterance, last_utterance_complete
+):
+    """
+    Appends the last (possibly incomplete) utterance to the combined text of
+    the previous ones
+    """
+    delimiter = UTTERANCE_DELIMITERS.get(target_language, ". ")
+    utterances_splitter = " " if target_language != "zh" else ""
 
     full_text = (
         full_text.rstrip() + utterances_splitter + last_utterance.lstrip()
@@ -1,3 +1,4 @@
+import re
 import textwrap
 
 import cjkwrap
@@ -6,6 +7,13 @@ from ..tokenizer import get_tokenizer
 from .caption_strategy import CaptionStrategy
 from .interface import CaptioningResponse
 
+# Tokens the Moses detokenizer attaches left or right by counting them
+QUOTE_TOKEN = re.compile(r"""^['"„“`]+$""")
+
+# How many times longer than a full caption the kept text of completed
+# utterances is, so the window never reaches its start
+TAIL_CAPTIONS = 4
+
 
 class WordLevelSlidingStrategy(CaptionStrategy):
     """
@@ -27,29 +35,86 @@ class WordLevelSlidingStrategy(CaptionStrategy):
             request.utterance,
             request.utterance_complete,
         )
-        tokens = tokenizer.tokenize(text)
-        sliding_substr = ""
-        sliding_window_tokens = []
+        tokens = tokenizer.tokenize_incremental(
+            text, (request.session_id, "word_level_sliding")
+        )
         delay_time = 0.0
         target_language = request.language
         text_wrapper = cjkwrap if target_language == "zh" else textwrap
 
-        for token in reversed(tokens):
-            tmp_sliding_substr = tokenizer.detokenize(
-                [token] + sliding_window_tokens[::-1]
-            )
-            lines_after_textwrap = text_wrapper.wrap(
-                tmp_sliding_substr, self.config.characters_per_line
+        def wrap_last(num_tokens):
+            return text_wrapper.wrap(
+                tokenizer.detokenize(tokens[len(tokens) - num_tokens :]),
+                self.config.characters_per_line,
             )
 
-            if len(lines_after_textwrap) <= self.config.num_lines:
-                sliding_substr = tmp_sliding_substr
-                sliding_window_tokens.append(token)
-            else:
-                # lines_after_textwrap over max caption lines
+        def fits(num_tokens):
+            return len(wrap_last(num_tokens)) <= self.config.num_lines
+
+        if target_language != "zh" and any(map(QUOTE_TOKEN.match, tokens)):
+            # Moses detokenizes quotes depending on how many came before them,
+            # so a window can fit when a shorter one doesn't: add tokens one at
+            # a time, stopping at the first window that doesn't fit
+            num_tokens = 0
 
-                break
-        sliding_substr = tokenizer.detokenize(sliding_window_tokens[::-1])
-        lines = text_wrapper.wrap(sliding_substr, self.config.characters_per_line)
+            while num_tokens < len(tokens) and fits(num_tokens + 1):
+                num_tokens += 1
+        else:
+            num_tokens = self.most_tokens_fitting(fits, len(tokens))
+
+        lines = wrap_last(num_tokens)
 
         return CaptioningResponse(lines=lines, line_index=0), delay_time
+
+    def trim_completed_utterances(self, target_language, completed):
+        """
+        Keeps a tail of the completed utterances' text TAIL_CAPTIONS times as long
+        as a full caption, starting where it tokenizes like the whole text does.
+        If there's no such place (e.g. in one long token), it's cut at a character,
+        as the tail is still longer than a caption can show
+        """
+        min_length = (
+            TAIL_CAPTIONS * self.config.num_lines * self.config.characters_per_line
+        )
+        text = completed.text
+
+        # Trim once the text is twice as long as needed, not on every utterance
+        if len(text) <= 2 * min_length:
+            return
+
+        tokenizer = get_tokenizer(target_language)
+
+        for start in range(len(text) - min_length, 0, -1):
+            if tokenizer.is_boundary(text, start):
+                completed.text = text[start:]
+
+                return
+
+        completed.text = text[len(text) - min_length :]
+
+    @staticmethod
+    def most_tokens_fitting(fits, max_tokens):
+        """
+        Returns the most tokens (up to max_tokens) for which fits(num_tokens) is
+        True, when it is True for every smaller number, in O(log n) calls.
+        Adding words at the start of a text never makes it wrap into fewer lines,
+        so this is the window found by adding tokens one at a time.
+        """
+        # Gallop: fits(low), and high is past max_tokens or doesn't fit
+        low, high = 0, 1
+
+        while high <= max_tokens and fits(high):
+            low, high = high, high * 2
+
+        high = min(high, max_tokens + 1)
+
+        # Bisect
+        while high - low > 1:
+            middle = (low + high) // 2
+
+            if fits(middle):
+                low = middle
+            else:
+                high = middle
+
+        return low
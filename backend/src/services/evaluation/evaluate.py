@@ -16,6 +16,7 @@ from services.evaluation.translation.evaluate import evaluate as evaluate_mt
 from services.evaluation.translation.test_set import DATASETS as MT_DATASETS
 from services.post_translation.interface import PostTranslationConfig
 from services.speech_translation import SpeechTranslationConfig
+from services.tokenizer import tokenizer_stats
 from services.translation.interface import TranslationConfig
 
 DEFAULT_DATASET_DIR = Path(__file__).parent / "data/"
@@ -195,3 +196,5 @@ if __name__ == "__main__":
             no_simulate_realtime=args.no_simulate_realtime,
             only_predict=args.only_predict,
         )
+
+    logger.debug("Tokenizer cache hit rates:\n %s" % pprint.pformat(tokenizer_stats()))
@@ -100,14 +100,14 @@ def infer(
         prefixes=transcript_prefixes,
         language=dataset.source_language,
     )
-    speech_translator.add_listener("asr", transcript_listener)
+    speech_translator.add_listener("asr", transcript_listener, synchronous=True)
 
     caption_listener = functools.partial(
         on_caption,
         translations=partial_translations,
         completed_utterances=complete_utterances,
     )
-    speech_translator.add_listener("captioning", caption_listener)
+    speech_translator.add_listener("captioning", caption_listener, synchronous=True)
 
     dataset_iterator = dataset.wav_files
 
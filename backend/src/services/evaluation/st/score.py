@@ -189,7 +189,7 @@ def score_latency(
         [(t_time, tokenizer.tokenize(t.upper())) for t_time, t in transcript]
         for transcript in partial_translations
     ]
-    references = [tokenizer.tokenize(r.upper()) for r in references]
+    references = tokenizer.tokenize_many([r.upper() for r in references])
 
     # Compute total lag
     output_words, total_lag = 0, 0
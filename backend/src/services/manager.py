@@ -10,11 +10,15 @@ The main responsibilites of Manager class are:
     (different language speakers get different language captioning lines)
 """
 
+import functools
 import os
 from collections import Counter, defaultdict
 from textwrap import dedent
 import time
 
+from monitoring import Tracer, pipeline_stage
+
+from . import overload
 from .asr import (
     SpeechRecognitionRequest,
     SpeechRecognitionResponse,
@@ -36,11 +40,16 @@ class Manager:
         self.room = room
         self.socket = socket
         self.completed_utterances = {}
+        self.overload_level = overload.NORMAL
         self.speech_translator = SpeechTranslationService(
             config=room.settings.services,
             logger=self.room.logger,
             languages=self.room.caption_languages,
             start_background_task=self.socket.start_background_task,
+            tracer=Tracer(
+                sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", 0.1)),
+                max_traces=int(os.getenv("TRACE_BUFFER_SIZE", 1000)),
+            ),
         )
 
         self.add_transcript_listener(self._broadcast_transcript)
@@ -102,8 +111,66 @@ class Manager:
             "post-translation", self._wrap_listener(self._broadcast_complete_utterances)
         )
 
+        # The sessions' partial filters track their live utterances
         for request, response in self.transcript:
-            catchup_speech_translator._on_transcript(request, response)
+            catchup_speech_translator._on_transcript(
+                request, response, filter_partials=False
+            )
+
+    def set_overload_level(self, level):
+        """
+        Shed load by degrading the room's pipeline, see services/overload.py
+        """
+        self.overload_level = level
+        post_translation_service = self.speech_translator.post_translation_service
+        translate_k = post_translation_service.config.translate_k or 0
+
+        if level >= overload.RAISE_TRANSLATE_K:
+            translate_k = max(translate_k, overload.OVERLOAD_TRANSLATE_K)
+
+        post_translation_service.set_translate_k(translate_k)
+
+        if level >= overload.FINALS_ONLY:
+            self.speech_translator.translate_partials_fn = lambda language: False
+        elif level >= overload.AUDIENCE_FINALS_ONLY:
+            self.speech_translator.translate_partials_fn = (
+                lambda language: language not in self._audience_only_languages()
+            )
+        else:
+            self.speech_translator.translate_partials_fn = lambda language: True
+
+        self.speech_translator.pause_language_detection(
+            level >= overload.PAUSE_LANGUAGE_ID
+        )
+
+    def _audience_only_languages(self):
+        """
+        Caption languages that only audience members are reading
+        """
+        audience_languages, participant_languages = set(), set()
+
+        for participant in self.room.participants.values():
+            if participant.is_audience:
+                audience_languages.add(participant.caption_language)
+            else:
+                participant_languages.add(participant.caption_language)
+
+        return audience_languages - participant_languages
+
+    def update_caption_layouts(self):
+        """
+        Caption each language in the layouts its readers use, see
+        CaptioningService.set_layouts
+        """
+        captioning_service = self.speech_translator.captioning_service
+        layouts = defaultdict(set)
+
+        for participant in self.room.participants.values():
+            layouts[participant.caption_language].add(
+                participant.caption_layout or captioning_service.default_layout
+            )
+
+        captioning_service.set_layouts(layouts)
 
     def add_transcript_listener(self, fn):
         self.speech_translator.add_listener("asr", self._wrap_listener(fn))
@@ -158,6 +225,7 @@ class Manager:
         Add the room_id to the listener's input
         """
 
+        @functools.wraps(fn)
         def wrapped_listener(*args, **kwargs):
             return fn(*args, **kwargs, room_id=self.room.room_id)
 
@@ -184,6 +252,7 @@ class Manager:
             if response.is_final:
                 self.transcript.append((request, response))
 
+    @pipeline_stage("broadcast")
     def _broadcast_captions(
         self,
         request: CaptioningRequest,
@@ -191,18 +260,32 @@ class Manager:
         room_id: str,
     ):
         if response.lines and len(response.lines) > 0:
+            event, socket_room = f"/{request.language}/translation", room_id
+            layout = response.layout
+
+            if (
+                layout is not None
+                and layout != self.speech_translator.captioning_service.default_layout
+            ):
+                # Only sent to the participants reading captions in the layout
+                event += f"/{layout.num_lines}x{layout.characters_per_line}"
+                socket_room = self.room.caption_layout_socket_room(layout)
+
             self.socket.emit(
-                f"/{request.language}/translation",
+                event,
                 {
                     "speaker_id": request.session_id,
                     "translation_lines": response.lines,
                     "line_index": response.line_index,
                     "highlight_boundaries": response.highlight_boundaries,
                 },
-                room=room_id,
+                room=socket_room,
                 broadcast=True,
             )
 
+            if request.trace is not None:
+                request.trace.mark("broadcast", request.language)
+
     def _broadcast_complete_utterances(
         self,
         request: PostTranslationRequest,
@@ -0,0 +1,165 @@
+"""
+Load shedding for the speech translation pipeline.
+
+When the translation providers or the CPU saturate, every room keeps doing
+full work and they all stall together. The OverloadController watches the hub's
+loop lag and each room's backlog of translation requests, and steps overloaded
+rooms through increasingly degraded levels. A room is overloaded when its own
+backlog is too long, but the hub's lag is shared by every room, so only the
+heaviest room sheds load for it at each check, and lighter rooms only degrade if
+the lag persists once heavier ones can't degrade further. Rooms step back up one
+level at a time once they have been calm for a while, so they don't flap between
+levels.
+"""
+import logging
+import time
+
+import gevent
+
+NORMAL = 0
+RAISE_TRANSLATE_K = 1  # update partial captions less often
+AUDIENCE_FINALS_ONLY = 2  # stop translating partials for audience-only languages
+PAUSE_LANGUAGE_ID = 3  # stop running language ID
+FINALS_ONLY = 4  # stop translating partials altogether
+
+LEVEL_NAMES = {
+    NORMAL: "normal",
+    RAISE_TRANSLATE_K: "raise_translate_k",
+    AUDIENCE_FINALS_ONLY: "audience_finals_only",
+    PAUSE_LANGUAGE_ID: "pause_language_id",
+    FINALS_ONLY: "finals_only",
+}
+
+logger = logging.getLogger(__name__)
+
+# translate_k used from the RAISE_TRANSLATE_K level on, if the room's is lower
+OVERLOAD_TRANSLATE_K = 3
+
+
+class OverloadController:
+    def __init__(
+        self,
+        rooms,
+        max_loop_lag=0.2,
+        max_queue_depth=10,
+        recovery_time=10.0,
+        interval=1.0,
+    ):
+        """
+        max_loop_lag: hub loop lag (in seconds) above which the heaviest room is
+                      overloaded
+        max_queue_depth: number of translation requests a room can have waiting
+                         before it is overloaded
+        recovery_time: how long (in seconds) a room must stay below half of both
+                       limits before it goes back up a level
+        interval: how often (in seconds) to check the rooms, and sample the
+                  hub's loop lag
+        """
+        self.rooms = rooms
+        self.max_loop_lag = max_loop_lag
+        self.max_queue_depth = max_queue_depth
+        self.recovery_time = recovery_time
+        self.interval = interval
+
+        self.calm_since = {}  # room_id -> last time the room was over half a limit
+        self._greenlet = None
+
+    def start(self):
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._greenlet is not None:
+            self._greenlet.kill()
+            self._greenlet = None
+
+    def _run(self):
+        while True:
+            # How late the hub woke us up, whether or not the HubMonitor runs
+            start_time = time.perf_counter()
+            gevent.sleep(self.interval)
+            loop_lag = max(0.0, time.perf_counter() - start_time - self.interval)
+
+            # Keep shedding load for the other rooms if e.g. one is being torn down
+            try:
+                self.check(
+                    {
+                        room_id: room.manager
+                        for room_id, room in list(self.rooms.items())
+                        if room.is_captioning_active
+                    },
+                    loop_lag,
+                )
+
+                for room_id in list(self.calm_since):
+                    if room_id not in self.rooms:
+                        self.calm_since.pop(room_id)
+            except Exception:
+                logger.exception("Failed to check rooms for overload")
+
+    def check(self, managers, loop_lag, now=None):
+        """
+        Move each room's manager to its next degradation level
+
+        managers: room_id -> Manager of every captioned room
+        """
+        # room_id -> (translation requests waiting, speakers)
+        loads = {
+            room_id: (
+                manager.speech_translator.mt_service.pending_requests(),
+                len(manager.speech_translator.sessions),
+            )
+            for room_id, manager in managers.items()
+        }
+        degradable = [
+            room_id
+            for room_id, manager in managers.items()
+            if manager.overload_level < FINALS_ONLY
+        ]
+        heaviest = max(degradable, key=loads.get, default=None)
+
+        for room_id, manager in managers.items():
+            self.update(
+                room_id,
+                manager,
+                loop_lag,
+                loads[room_id][0],
+                now=now,
+                heaviest=room_id == heaviest,
+            )
+
+    def update(self, room_id, manager, loop_lag, queue_depth, now=None, heaviest=True):
+        """
+        Move the room's manager to its next degradation level, and return it
+
+        heaviest: whether the room is the one to shed load for the hub's loop lag
+        """
+        now = time.monotonic() if now is None else now
+        level = manager.overload_level
+
+        if (
+            heaviest and loop_lag > self.max_loop_lag
+        ) or queue_depth > self.max_queue_depth:
+            level = min(level + 1, FINALS_ONLY)
+            self.calm_since[room_id] = now
+        elif loop_lag > self.max_loop_lag / 2 or queue_depth > self.max_queue_depth / 2:
+            self.calm_since[room_id] = now
+        elif now - self.calm_since.get(room_id, now) >= self.recovery_time:
+            level = max(level - 1, NORMAL)
+            self.calm_since[room_id] = now
+
+        if level != manager.overload_level:
+            manager.room.logger.info(
+                f"Overload level of room {room_id} changed to {LEVEL_NAMES[level]}"
+                + f" (loop lag {loop_lag:.3f}s, {queue_depth} queued translations)"
+            )
+            manager.set_overload_level(level)
+
+        return level
+
+    def to_dict(self):
+        return {
+            room_id: LEVEL_NAMES[room.manager.overload_level]
+            for room_id, room in self.rooms.items()
+            if room.is_captioning_active
+        }
@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from config import Config
+from utils import slotted_dataclass
 
 
 @dataclass
@@ -14,7 +15,7 @@ class PostTranslationConfig(Config):
     add_punctuation: bool = True
 
 
-@dataclass
+@slotted_dataclass
 class PostTranslationRequest:
     session_id: str
     message_id: int
@@ -22,8 +23,11 @@ class PostTranslationRequest:
     is_final: bool
     original_language: str
     language: str
+    trace: Optional[Any] = None  # monitoring.tracing.Trace, if sampled
 
 
-@dataclass
+@slotted_dataclass
 class PostTranslationResponse:
     translation: str
+    # The punctuated translation will be delivered to the service's callback_fn
+    punctuation_pending: bool = False
@@ -27,23 +27,31 @@ Post-translation API output:
 
 """
 
-import re
 import os
 
 from languages import languages
 from ..tokenizer import get_tokenizer
 
+from ..resilience import DependencyError, get_endpoint
 from .interface import PostTranslationRequest, PostTranslationResponse
+from .punctuation_client import get_client
 from utils import ThreadSafeDict
 
 import requests
 
 
 class PostTranslationService:
-    def __init__(self, config, logger):
+    def __init__(self, config, logger, callback_fn=None):
+        """
+        callback_fn: if given, finals are punctuated asynchronously. They're returned
+                     unpunctuated, then passed to callback_fn(request, response)
+                     once punctuated.
+        """
         self.config = config
         self.logger = logger
-        self.do_translate_k = self.config.translate_k and self.config.translate_k > 0
+        self.callback_fn = callback_fn
+        self.translate_k = self.config.translate_k or 0
+        self.do_translate_k = self.translate_k > 0
         self.do_mask_k = self.config.mask_k and self.config.mask_k > 0
         # TODO(scotfang) make translate_k dictionaries garbage collect like an LRU cache
         self.translate_k_count = ThreadSafeDict()  # (session_id, language) as keys
@@ -58,8 +66,23 @@ class PostTranslationService:
             bool(self.punctuation_server_url) and self.config.add_punctuation
         )
 
+        self.punctuation_timeout = (
+            float(os.getenv("PUNCTUATION_TIMEOUT_MS", 1000)) / 1000
+        )
+
+        self.punctuation_client = None
+
         if self.punctuation_server_enabled:
-            self.punctuation_server_active = self.test_punctuation_server()
+            # Only a warning: calls are retried once the server's circuit breaker resets
+            self.test_punctuation_server()
+
+            if callback_fn is not None:
+                self.punctuation_client = get_client(
+                    self.punctuation_server_url,
+                    self.punctuation_timeout,
+                    max_batch_size=int(os.getenv("PUNCTUATION_BATCH_SIZE", 16)),
+                    max_wait=float(os.getenv("PUNCTUATION_BATCH_WAIT_MS", 10)) / 1000,
+                )
 
     def test_punctuation_server(self):
         try:
@@ -76,6 +99,22 @@ class PostTranslationService:
             )
             return False
 
+    def set_translate_k(self, translate_k):
+        """
+        Override config.translate_k, e.g. to update captions less often under load
+        """
+
+        if translate_k == self.translate_k:
+            return
+
+        self.translate_k = translate_k
+        self.do_translate_k = translate_k > 0
+
+        # Counts and cached translations are only consistent for a fixed k
+        with self.translate_k_count as counts:
+            counts.clear()
+        self.translate_k_cached_translations.clear()
+
     def __call__(self, request: PostTranslationRequest) -> PostTranslationResponse:
         translation = self.post_translation(
             request.session_id,
@@ -85,6 +124,19 @@ class PostTranslationService:
             request.is_final,
         )
 
+        if request.is_final and self.punctuation_client is not None:
+            self.punctuation_client.submit(
+                translation,
+                request.language,
+                lambda punctuated: self.callback_fn(
+                    request, PostTranslationResponse(translation=punctuated)
+                ),
+            )
+
+            return PostTranslationResponse(
+                translation=translation, punctuation_pending=True
+            )
+
         return PostTranslationResponse(
             translation=translation,
         )
@@ -115,7 +167,9 @@ class PostTranslationService:
 
         if update:
             if original_language != language and self.do_mask_k:
-                translation = self._mask_k(translation, language, asr_is_final)
+                translation = self._mask_k(
+                    session_id, translation, language, asr_is_final
+                )
             if self.config.remove_profanity:
                 translation = self._remove_profanity(translation, language)
 
@@ -136,15 +190,35 @@ class PostTranslationService:
         if (
             asr_is_final
             and self.punctuation_server_enabled
-            and self.punctuation_server_active
+            and self.punctuation_client is None
         ):
+            translation = self._punctuate(translation, language)
+
+        return translation
+
+    def _punctuate(self, translation, language):
+        """
+        Punctuate and capitalize with the punctuation server, or return the
+        translation unchanged if the server is failing
+        """
+        url = f"{self.punctuation_server_url}/punctuate_and_capitalize"
+
+        def send():
             resp = requests.post(
-                f"{self.punctuation_server_url}/punctuate_and_capitalize",
+                url,
                 json={"text": translation, "language": language},
+                timeout=self.punctuation_timeout,
             )
-            translation = resp.json()["text"]
+            resp.raise_for_status()
 
-        return translation
+            return resp.json()["text"]
+
+        try:
+            return get_endpoint(url, self.punctuation_timeout)(send)
+        except DependencyError as e:
+            self.logger.warning(e)
+
+            return translation
 
     def _update_translate_k(self, key, asr_is_final):
         """
@@ -158,12 +232,12 @@ class PostTranslationService:
             ct = counts[key]
             counts[key] += 1
 
-        if asr_is_final or ct % self.config.translate_k == 0:
+        if asr_is_final or ct % self.translate_k == 0:
             return True
         else:
             return False
 
-    def _mask_k(self, translation, language, asr_is_final):
+    def _mask_k(self, session_id, translation, language, asr_is_final):
         """
         implement the mask k strategy mentioned in google's paper
         https://arxiv.org/pdf/1912.03393.pdf
@@ -179,7 +253,9 @@ class PostTranslationService:
         if not asr_is_final:
             # if asr text is not finalized, mask the last k tokens of the predicted target
             tokenizer = get_tokenizer(language)
-            translation_tokens = tokenizer.tokenize(translation)
+            translation_tokens = tokenizer.tokenize_incremental(
+                translation, (session_id, "mask_k")
+            )
             translation_tokens_masked = translation_tokens[: -self.config.mask_k]
             if not translation_tokens_masked and self.config.disable_masking_before_k:
                 translation_tokens_masked = translation_tokens
@@ -194,16 +270,4 @@ class PostTranslationService:
         must have come through the ASR anyways.
         """
 
-        lang = languages[language]
-
-        for word in lang.profane_words:
-            if lang.has_spaces:
-                translation = re.sub(
-                    fr"\b{word}\b",
-                    lambda word: word[0][0] + "*" * (len(word[0]) - 1),
-                    translation,
-                    flags=re.IGNORECASE,
-                )
-            else:
-                translation = translation.replace(word, "*" * len(word))
-        return translation
+        return languages[language].profanity_matcher.mask(translation)
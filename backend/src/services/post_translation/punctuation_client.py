@@ -0,0 +1,112 @@
+"""
+Asynchronous, batching client for the punctuation and capitalization server.
+
+Texts are queued, and those queued together are sent in one request to the
+server's batch endpoint over a pooled connection. Each text's callback is called
+with its result, or with the text unchanged if the server failed.
+"""
+import logging
+import time
+
+import gevent
+import requests
+from gevent.pool import Pool
+from gevent.queue import Empty, Queue
+
+from ..resilience import DependencyError, get_endpoint
+
+logger = logging.getLogger(__name__)
+
+# url -> PunctuationClient
+_clients = {}
+
+
+def get_client(url, timeout, **kwargs):
+    """
+    Returns the client shared by every room punctuating with the server at url
+    """
+
+    if url not in _clients:
+        _clients[url] = PunctuationClient(url, timeout, **kwargs)
+
+    return _clients[url]
+
+
+class PunctuationClient:
+    def __init__(self, url, timeout, max_batch_size=16, max_wait=0.01, max_requests=4):
+        """
+        url: base url of the punctuation server
+        max_batch_size: most texts to send in one request
+        max_wait: seconds to wait for more texts before sending a batch
+        max_requests: most batches in flight at once
+        """
+        self.batch_url = f"{url}/punctuate_and_capitalize_batch"
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.session = requests.Session()
+        self.session.mount(
+            url, requests.adapters.HTTPAdapter(pool_maxsize=max_requests)
+        )
+        self.queue = Queue()
+        self.senders = Pool(max_requests)
+        self.worker = None
+
+    def submit(self, text, language, callback_fn):
+        """
+        Punctuate text, then call callback_fn with the result, or with the text
+        unchanged if the server failed
+        """
+        self.queue.put((text, language, callback_fn))
+
+        if self.worker is None:
+            self.worker = gevent.spawn(self._run)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    timeout = max(0, deadline - time.monotonic())
+                    batch.append(self.queue.get(timeout=timeout))
+                except Empty:
+                    break
+
+            # Blocks while max_requests batches are in flight, so batches grow
+            # when the server is slow
+            self.senders.spawn(self._send, batch)
+
+    def _send(self, batch):
+        def post():
+            response = self.session.post(
+                self.batch_url,
+                json={
+                    "requests": [
+                        {"text": text, "language": language}
+                        for text, language, _ in batch
+                    ]
+                },
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+            return response.json()["texts"]
+
+        try:
+            texts = get_endpoint(self.batch_url, self.timeout)(post)
+        except DependencyError:
+            # Failures are counted in the endpoint's metrics
+            texts = []
+
+        # Texts the server didn't return (e.g. after a failure) stay unpunctuated
+        texts = texts[: len(batch)] + [text for text, _, _ in batch[len(texts) :]]
+
+        # The batch may hold other rooms' texts, which still need their results
+        for (_, _, callback_fn), text in zip(batch, texts):
+            try:
+                callback_fn(text)
+            except Exception:
+                logger.exception(f"Failed to handle punctuated text {text!r}")
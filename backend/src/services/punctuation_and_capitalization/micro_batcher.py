@@ -0,0 +1,80 @@
+"""
+Micro-batching of concurrent punctuation requests.
+
+A MicroBatcher collects the texts of concurrent requests until it has
+max_batch_size of them or the oldest has waited max_wait seconds, runs the model
+once over all of them, and hands each request its results.
+"""
+import queue
+import threading
+import time
+
+
+class MicroBatcher:
+    def __init__(self, fn, max_batch_size=32, max_wait=0.01):
+        """
+        fn: called with a list of texts, returns their results in the same order
+        max_batch_size: most texts to pass to fn at once
+        max_wait: seconds to wait for more texts before calling fn
+        """
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.queue = queue.Queue()
+        self.num_batches = 0
+        self.num_texts = 0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def __call__(self, texts):
+        """
+        Blocks until the batch containing texts has been processed, and returns
+        their results
+        """
+        item = {"texts": texts, "done": threading.Event()}
+        self.queue.put(item)
+        item["done"].wait()
+
+        if "error" in item:
+            raise item["error"]
+
+        return item["results"]
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            num_texts = len(batch[0]["texts"])
+            deadline = time.monotonic() + self.max_wait
+
+            while num_texts < self.max_batch_size:
+                try:
+                    timeout = max(0, deadline - time.monotonic())
+                    batch.append(self.queue.get(timeout=timeout))
+                    num_texts += len(batch[-1]["texts"])
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch):
+        texts = [text for item in batch for text in item["texts"]]
+
+        try:
+            results = self.fn(texts) if texts else []
+        except Exception as e:
+            # Fail every request in the batch rather than the worker
+            for item in batch:
+                item["error"] = e
+                item["done"].set()
+            return
+
+        self.num_batches += 1
+        self.num_texts += len(texts)
+        start = 0
+
+        for item in batch:
+            end = start + len(item["texts"])
+            item["results"] = results[start:end]
+            start = end
+            item["done"].set()
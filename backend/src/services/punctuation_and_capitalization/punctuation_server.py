@@ -1,6 +1,7 @@
 import argparse
 import re
 import os
+from collections import defaultdict
 from dotenv import load_dotenv
 
 from nemo.collections.nlp.models import PunctuationCapitalizationModel
@@ -8,9 +9,18 @@ from nemo.collections.nlp.models import PunctuationCapitalizationModel
 from flask import Flask, request
 from flask_cors import CORS
 
+from micro_batcher import MicroBatcher
+
 
 class PunctuationCapitalizationServer(object):
-    def __init__(self):
+    def __init__(self, max_batch_size=32, max_wait=0.01):
+        """
+        max_batch_size: most texts to punctuate in one model call
+        max_wait: seconds to wait for concurrent requests to batch together
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
         self.app = Flask(__name__)
         CORS(self.app, cors_allowed_origins="*")
         self.setup_rest_endpoints()
@@ -18,6 +28,16 @@ class PunctuationCapitalizationServer(object):
         self.model = {}
         self.load_models()
 
+        # Created up front, as requests are handled in concurrent threads
+        self.batchers = {  # language -> MicroBatcher
+            language: MicroBatcher(
+                lambda texts, language=language: self.punctuate(texts, language),
+                max_batch_size=self.max_batch_size,
+                max_wait=self.max_wait,
+            )
+            for language in self.model
+        }
+
         # customized words
         self.customized_words = {
             "universal": {"asr": "ASR", "mt": "MT"},
@@ -65,31 +85,98 @@ class PunctuationCapitalizationServer(object):
         def punctuate_and_capitalize():
             payload = request.json
 
-            language = payload["language"]
+            texts = self.batched_punctuate([payload["text"]], payload["language"])
+
+            return {"text": texts[0]}
+
+        @self.app.route("/punctuate_and_capitalize_batch", methods=["POST"])
+        def punctuate_and_capitalize_batch():
+            """
+            Punctuate a list of {"text": ..., "language": ...} requests, batching
+            each language's texts with those of concurrent requests
+            """
+            payload = request.json["requests"]
+            indices_by_language = defaultdict(list)
+            res = [None] * len(payload)
+
+            for i, item in enumerate(payload):
+                indices_by_language[item["language"]].append(i)
+
+            for language, indices in indices_by_language.items():
+                texts = self.batched_punctuate(
+                    [payload[i]["text"] for i in indices], language
+                )
+
+                for i, text in zip(indices, texts):
+                    res[i] = text
+
+            return {"texts": res}
+
+        @self.app.route("/stats", methods=["GET"])
+        def stats():
+            """
+            Number of model calls and texts punctuated per language, the ratio
+            is the average batch size
+            """
+            return self.stats
+
+    @property
+    def stats(self):
+        return {
+            language: {
+                "batches": batcher.num_batches,
+                "texts": batcher.num_texts,
+            }
+            for language, batcher in self.batchers.items()
+        }
+
+    def batched_punctuate(self, texts, language):
+        """
+        Punctuate texts together with those of concurrent requests in language
+        """
 
-            if not payload["text"]:
-                res = payload["text"]
-            elif language not in self.model:
-                res = payload["text"]
+        if language not in self.batchers:
+            return texts
+
+        return self.batchers[language](texts)
+
+    def punctuate(self, texts, language):
+        """
+        Punctuate and capitalize a list of texts in language
+        """
+
+        if language not in self.model:
+            return texts
+
+        # Empty texts are returned as is
+        indices = [i for i, text in enumerate(texts) if text]
+        queries, placeholder_mappings = [], []
+
+        for i in indices:
+            if language == "zh":
+                # split zh sentence into characters
+                text = " ".join(list(texts[i]))
             else:
-                if language == "zh":
-                    # split zh sentence into characters
-                    text = " ".join(list(payload["text"]))
-                else:
-                    text = payload["text"]
+                text = texts[i]
 
-                # preprocess asr result
-                text, placeholder_mapping = self.pre_process(text, language)
+            # preprocess asr result
+            text, placeholder_mapping = self.pre_process(text, language)
+            queries.append(text)
+            placeholder_mappings.append(placeholder_mapping)
 
-                # call nemo punctuation and capitalization api
-                res = self.model[language].add_punctuation_capitalization([text])[0]
+        res = list(texts)
 
-                # post processing
-                res = self.post_process(res, placeholder_mapping, language)
+        if queries:
+            # call nemo punctuation and capitalization api
+            punctuated = self.model[language].add_punctuation_capitalization(queries)
 
-            res = {"text": res}
+            # post processing
+            for i, text, placeholder_mapping in zip(
+                indices, punctuated, placeholder_mappings
+            ):
+                res[i] = self.post_process(text, placeholder_mapping, language)
 
-            return res
+        return res
 
     def start(self, port, debug):
         self.app.run(host="0.0.0.0", port=port, debug=debug)
@@ -160,6 +247,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="backend server parser settings")
     parser.add_argument("--port", type=int, default=8006)
     parser.add_argument("--debug", action="store_true", help="Run in debug mode")
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=32,
+        help="Most texts to punctuate in one model call",
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=10,
+        help="Milliseconds to wait for concurrent requests to batch together",
+    )
     args = parser.parse_args()
 
     # Load shared config for frontend and backend
@@ -167,5 +266,7 @@ if __name__ == "__main__":
         raise FileNotFoundError("could not find .env, run from backend directory")
     load_dotenv(dotenv_path="../.env")
 
-    server = PunctuationCapitalizationServer()
+    server = PunctuationCapitalizationServer(
+        max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000
+    )
     server.start(args.port, args.debug)
@@ -0,0 +1,211 @@
+"""
+Timeouts, circuit breakers and hedged requests for calls to external services.
+
+A ResilientEndpoint gives up on a call after a timeout, and stops calling its
+endpoint for a while after repeated failures, so callers can fall back right away
+(e.g. to the untranslated text). Endpoints are shared by every room in the
+process, so they all see the same breaker state.
+"""
+import os
+import time
+
+import gevent
+
+from monitoring import REGISTRY, Histogram
+
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge(
+    "meetdot_circuit_breaker_state",
+    "State of the endpoint's circuit breaker: 0 closed, 1 half open, 2 open",
+    ("endpoint",),
+)
+ENDPOINT_FAILURES = REGISTRY.counter(
+    "meetdot_endpoint_failures_total",
+    "Failed calls to external endpoints, including calls rejected by the breaker",
+    ("endpoint", "reason"),
+)
+ENDPOINT_SECONDS = REGISTRY.histogram(
+    "meetdot_endpoint_seconds",
+    "Latency of successful calls to external endpoints",
+    ("endpoint",),
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "meetdot_hedged_requests_total",
+    "Duplicate requests sent because the first was slower than the p95 latency",
+    ("endpoint",),
+)
+
+# url -> ResilientEndpoint
+_endpoints = {}
+
+
+class DependencyError(Exception):
+    """
+    Raised when a call to an endpoint fails, times out, or is rejected
+    because the endpoint's circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        """
+        failure_threshold: consecutive failures after which the breaker opens
+        reset_timeout: seconds to wait while open before letting a trial call through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.state == CircuitBreaker.HALF_OPEN:
+            # Wait for the trial call to finish
+            return False
+
+        if self.state == CircuitBreaker.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+
+            # Let one trial call through; its result closes or re-opens the breaker
+            self.state = CircuitBreaker.HALF_OPEN
+
+        return True
+
+    def trial_due(self):
+        """
+        Whether the breaker is open, but the next call would be let through as a trial
+        """
+        return (
+            self.state == CircuitBreaker.OPEN
+            and time.monotonic() - self.opened_at >= self.reset_timeout
+        )
+
+    def record_success(self):
+        self.state = CircuitBreaker.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+
+        if (
+            self.state == CircuitBreaker.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = CircuitBreaker.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_abort(self):
+        """
+        The call was interrupted (e.g. its greenlet was killed) before its result
+        was known. A trial call re-opens the breaker, so it isn't left half open
+        waiting for the result forever
+        """
+        if self.state == CircuitBreaker.HALF_OPEN:
+            self.state = CircuitBreaker.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilientEndpoint:
+    def __init__(
+        self,
+        name,
+        timeout=2.0,
+        failure_threshold=5,
+        reset_timeout=10.0,
+        hedge_min_samples=20,
+    ):
+        """
+        name: used to label the endpoint's metrics, usually its url
+        timeout: seconds a call may take, including a hedged duplicate
+        hedge_min_samples: number of successful calls needed to estimate the p95
+                           latency before requests are hedged
+        """
+        self.name = name
+        self.timeout = timeout
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = Histogram()
+
+        CIRCUIT_BREAKER_STATE.labels(name).set_function(lambda: self.breaker.state)
+
+    def __call__(self, fn, hedge=False):
+        """
+        Returns fn(), raising DependencyError if it fails or takes too long.
+        If hedge is set, a duplicate call is started once the first has taken longer
+        than the endpoint's p95 latency, and the first successful result is used.
+        """
+
+        if not self.breaker.allow():
+            ENDPOINT_FAILURES.labels(self.name, "circuit_open").inc()
+            raise DependencyError(f"Circuit breaker for {self.name} is open")
+
+        start_time = time.perf_counter()
+
+        try:
+            with gevent.Timeout(
+                self.timeout, DependencyError(f"{self.name} timed out")
+            ):
+                if hedge and self.latency.count >= self.hedge_min_samples:
+                    result = self._hedged_call(fn, self.latency.percentile(0.95))
+                else:
+                    result = fn()
+        except DependencyError:
+            ENDPOINT_FAILURES.labels(self.name, "timeout").inc()
+            self.breaker.record_failure()
+            raise
+        except Exception as e:
+            ENDPOINT_FAILURES.labels(self.name, type(e).__name__).inc()
+            self.breaker.record_failure()
+            raise DependencyError(f"Call to {self.name} failed: {e!r}") from e
+        except BaseException:
+            self.breaker.record_abort()
+            raise
+
+        latency = time.perf_counter() - start_time
+        self.latency.observe(latency)
+        ENDPOINT_SECONDS.labels(self.name).observe(latency)
+        self.breaker.record_success()
+
+        return result
+
+    def _hedged_call(self, fn, hedge_delay):
+        pending = [gevent.spawn(fn)]
+
+        try:
+            pending[0].join(hedge_delay)
+
+            if not pending[0].ready():
+                HEDGED_REQUESTS.labels(self.name).inc()
+                pending.append(gevent.spawn(fn))
+
+            while True:
+                for glet in gevent.wait(pending, count=1):
+                    pending.remove(glet)
+
+                    if glet.successful():
+                        return glet.value
+
+                    if not pending:
+                        raise glet.exception
+        finally:
+            gevent.killall(pending, block=False)
+
+
+def get_endpoint(url, timeout):
+    """
+    Returns the ResilientEndpoint shared by all callers of url
+    """
+
+    if url not in _endpoints:
+        _endpoints[url] = ResilientEndpoint(
+            url,
+            timeout=timeout,
+            failure_threshold=int(os.getenv("CIRCUIT_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", 10)),
+        )
+
+    return _endpoints[url]
@@ -0,0 +1,188 @@
+"""
+Delivers the speech translation pipeline's events to its listeners.
+
+Each asynchronous listener has a queue of its own, emptied by a consumer running
+in the background, so a slow listener only delays itself. A full queue drops its
+oldest partial event that a newer event of the same speaker and language
+supersedes, but never a final, nor the newest event of a speaker and language.
+Listeners that must see an event before the pipeline moves on are called
+synchronously.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from monitoring import REGISTRY
+from utils import start_thread
+
+LISTENER_SECONDS = REGISTRY.histogram(
+    "meetdot_listener_seconds",
+    "Time from an event being published to its listener returning",
+    ("topic", "listener"),
+)
+LISTENER_DROPPED_EVENTS = REGISTRY.counter(
+    "meetdot_listener_dropped_events_total",
+    "Partial events superseded by newer ones while their listener's queue was full",
+    ("topic", "listener"),
+)
+
+logger = logging.getLogger(__name__)
+
+
+def listener_name(listener):
+    listener = getattr(listener, "func", listener)  # functools.partial
+
+    return getattr(listener, "__qualname__", type(listener).__name__)
+
+
+class Subscription:
+    def __init__(
+        self, topic, listener, synchronous, max_queue_size, start_fn, supersede_fn
+    ):
+        self.topic = topic
+        self.listener = listener
+        self.synchronous = synchronous
+        self.max_queue_size = max_queue_size
+        self.start_fn = start_fn
+        self.supersede_fn = supersede_fn
+
+        name = listener_name(listener)
+        self.seconds = LISTENER_SECONDS.labels(topic, name)
+        self.dropped_events = LISTENER_DROPPED_EVENTS.labels(topic, name)
+
+        # (publish time, request, response, is_final, key)
+        self.queue = deque()
+        self.lock = threading.Lock()
+        # The consumer exits when the queue empties, so idle rooms hold no
+        # greenlets (or threads), and is started again by the next event
+        self.consumer_running = False
+
+    def deliver(self, request, response, is_final, key):
+        event = (time.perf_counter(), request, response, is_final, key)
+
+        if self.synchronous:
+            self._call(event)
+            return
+
+        with self.lock:
+            if len(self.queue) >= self.max_queue_size:
+                event = self._make_room(event)
+
+            self.queue.append(event)
+
+            if self.consumer_running:
+                return
+            self.consumer_running = True
+
+        self.start_fn(self._consume)
+
+    def _make_room(self, event):
+        """
+        Drops the oldest queued partial that a newer event with its key, queued
+        or the arriving event, supersedes. If there's none, the queue grows past
+        its size: by at most one partial per key, and finals. Returns the
+        arriving event, with what the dropped partial changed if it superseded it
+        """
+        newer_keys = {event[4]}
+        oldest_superseded = None
+
+        for i in range(len(self.queue) - 1, -1, -1):
+            _, _, _, queued_is_final, queued_key = self.queue[i]
+
+            if not queued_is_final and queued_key in newer_keys:
+                oldest_superseded = i
+            newer_keys.add(queued_key)
+
+        if oldest_superseded is None:
+            return event
+
+        dropped = self.queue[oldest_superseded]
+        del self.queue[oldest_superseded]
+        self.dropped_events.inc()
+
+        for i in range(oldest_superseded, len(self.queue)):
+            if self.queue[i][4] == dropped[4]:
+                self.queue[i] = self._supersede(dropped, self.queue[i])
+                return event
+
+        return self._supersede(dropped, event)
+
+    def _supersede(self, dropped, newer):
+        if self.supersede_fn is None:
+            return newer
+
+        publish_time, request, response, is_final, key = newer
+
+        return (
+            publish_time,
+            request,
+            self.supersede_fn(dropped[2], response),
+            is_final,
+            key,
+        )
+
+    def _consume(self):
+        while True:
+            with self.lock:
+                if not self.queue:
+                    self.consumer_running = False
+                    return
+
+                event = self.queue.popleft()
+
+            self._call(event)
+
+    def _call(self, event):
+        publish_time, request, response, _, _ = event
+
+        try:
+            self.listener(request, response)
+        except Exception:
+            if self.synchronous:
+                raise
+            logger.exception(f"{self.topic} listener {listener_name(self.listener)}")
+        finally:
+            self.seconds.observe(time.perf_counter() - publish_time)
+
+
+class EventBus:
+    def __init__(
+        self, start_background_task=start_thread, max_queue_size=100, supersede_fns=None
+    ):
+        """
+        start_background_task: start_background_task(fn) runs fn in the
+            background, e.g. in a greenlet
+        max_queue_size: most events each asynchronous listener queues, before
+            dropping partials superseded by newer ones
+        supersede_fns: topic -> fn(dropped response, newer response), which
+            returns the newer response (a copy, as listeners share it) with
+            anything listeners needed to see of the dropped one
+        """
+        self.start_background_task = start_background_task
+        self.max_queue_size = max_queue_size
+        self.supersede_fns = supersede_fns or {}
+        # topic -> subscriptions
+        self.subscriptions = defaultdict(list)
+
+    def subscribe(self, topic, listener, synchronous=False):
+        self.subscriptions[topic].append(
+            Subscription(
+                topic,
+                listener,
+                synchronous,
+                self.max_queue_size,
+                self.start_background_task,
+                self.supersede_fns.get(topic),
+            )
+        )
+
+    def publish(self, topic, request, response, is_final=True, key=None):
+        """
+        is_final: whether the event is final, so never dropped from a full queue
+        key: events with the same key supersede each other's partials, e.g. a
+            speaker's captions in one language
+        """
+
+        for subscription in self.subscriptions[topic]:
+            subscription.deliver(request, response, is_final, key)
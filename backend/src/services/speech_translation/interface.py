@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 from config import Config
+from utils import slotted_dataclass
 from services.asr import SpeechRecognitionConfig, SpeechRecognitionResponse
 from services.captioning import CaptioningConfig, CaptioningResponse
 from services.translation import TranslationConfig, TranslationResponse
@@ -15,7 +16,7 @@ class SpeechTranslationConfig(Config):
     captioning: CaptioningConfig = CaptioningConfig()
 
 
-@dataclass
+@slotted_dataclass
 class SpeechTranslationRequest:
     session_id: str
     chunk: bytes
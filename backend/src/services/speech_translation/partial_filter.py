@@ -0,0 +1,82 @@
+"""
+Skips ASR partials that wouldn't change what viewers see.
+
+Streaming ASR often repeats a partial, or changes it only by whitespace, case or a
+filler word, so translating and broadcasting it would give the same captions.
+Each partial is compared with the last partial forwarded in its utterance, after
+normalizing both, and repeats are skipped. Optionally, a partial extending the
+last forwarded one is also skipped until it has grown by at least min_growth
+characters, while partials changing its text are always forwarded. Finals are
+always forwarded, and start a new utterance.
+"""
+import os
+import re
+
+from monitoring import REGISTRY
+
+ASR_PARTIALS_SUPPRESSED = REGISTRY.counter(
+    "meetdot_asr_partials_suppressed_total",
+    "ASR partials neither broadcast nor translated, by spoken language and why"
+    + " (the rate of suppression is relative to meetdot_asr_responses_total)",
+    ("language", "reason"),
+)
+
+# As the ASR services' postprocessing drops them, for services that don't
+FILLER_WORDS = {"mhm", "uh", "um", "ah", "er", "hmm"}
+FILLER_CHARACTERS = re.compile("[呃嗯啊哎]")
+
+
+def normalize(transcript):
+    """
+    The transcript as compared with others: lowercase, without filler words and
+    with single spaces
+    """
+    transcript = FILLER_CHARACTERS.sub("", transcript.lower())
+
+    return " ".join(
+        word for word in transcript.split() if word.strip(",.?!") not in FILLER_WORDS
+    )
+
+
+class PartialFilter:
+    def __init__(self, language, min_growth=None):
+        """
+        language: the spoken language, to label metrics with
+        min_growth: least characters a partial must add to the last forwarded
+            partial to be forwarded, or 0 to forward every change
+        """
+        if min_growth is None:
+            min_growth = int(os.getenv("ASR_PARTIAL_MIN_GROWTH_CHARS", 0))
+
+        self.min_growth = min_growth
+        self.duplicates = ASR_PARTIALS_SUPPRESSED.labels(language, "duplicate")
+        self.small_growths = ASR_PARTIALS_SUPPRESSED.labels(language, "small_growth")
+        # Normalized text of the last partial forwarded in the current utterance
+        self.last_forwarded = ""
+
+    def __call__(self, asr_response):
+        """
+        Returns whether to forward the ASR response
+        """
+
+        if asr_response.is_final:
+            self.last_forwarded = ""
+            return True
+
+        text = normalize(asr_response.transcript)
+
+        if text == self.last_forwarded:
+            self.duplicates.inc()
+            return False
+
+        # Only partials extending the last forwarded one are held back. Others
+        # retract or correct words, which shouldn't linger on screen
+        stable = len(os.path.commonprefix([self.last_forwarded, text]))
+
+        if stable == len(self.last_forwarded) and len(text) - stable < self.min_growth:
+            self.small_growths.inc()
+            return False
+
+        self.last_forwarded = text
+
+        return True
@@ -1,7 +1,11 @@
 import functools
+import os
+import time
 from copy import deepcopy
-from typing import Any, Callable, Dict
+from dataclasses import replace
+from typing import Any, Callable, Dict, Tuple
 
+from monitoring import FAST_BUCKETS, REGISTRY, Tracer, pipeline_stage
 from services.asr import (
     SpeechRecognitionConfig,
     SpeechRecognitionRequest,
@@ -16,6 +20,7 @@ from services.captioning import (
     CaptioningResponse,
     CaptioningService,
 )
+from services.captioning.linewise_scroll import LinewiseScrollStrategy
 from services.post_translation import (
     PostTranslationConfig,
     PostTranslationRequest,
@@ -28,34 +33,103 @@ from services.translation import (
     TranslationResponse,
     TranslationService,
 )
+from services.tokenizer import clear_incremental_tokenizations
 from services.types import ServiceRequest, ServiceResponse
 from utils import start_thread
 
+from .event_bus import EventBus
 from .interface import SpeechTranslationRequest
+from .partial_filter import PartialFilter
 from .session import Session
 
+AUDIO_CHUNKS = REGISTRY.counter(
+    "meetdot_audio_chunks_total", "Audio chunks received from speakers"
+)
+AUDIO_BYTES = REGISTRY.counter(
+    "meetdot_audio_bytes_total", "Bytes of audio received from speakers"
+)
+ASR_RESPONSES = REGISTRY.counter(
+    "meetdot_asr_responses_total",
+    "ASR responses, by spoken language and whether they are final",
+    ("language", "type"),
+)
+POST_TRANSLATION_SECONDS = REGISTRY.histogram(
+    "meetdot_post_translation_seconds",
+    "Time spent in post-translation",
+    buckets=FAST_BUCKETS,
+)
+CAPTIONING_SECONDS = REGISTRY.histogram(
+    "meetdot_captioning_seconds",
+    "Time spent computing caption lines",
+    buckets=FAST_BUCKETS,
+)
+
 
 class SpeechTranslationService:
+    # topic -> whether an event is final, so never dropped by listeners
+    LISTENER_TOPICS = {
+        "asr": lambda request, response: response.is_final,
+        "language-update": lambda request, response: True,
+        "translation": lambda request, response: request.is_final,
+        "post-translation": lambda request, response: request.is_final,
+        "captioning": lambda request, response: request.utterance_complete,
+    }
+    # topic -> key of an event, which newer events with the key supersede
+    LISTENER_EVENT_KEYS = {
+        "asr": lambda request, response: request.session_id,
+        "language-update": lambda request, response: request.session_id,
+        "translation": lambda request, response: (
+            request.session_id,
+            request.target_language,
+        ),
+        "post-translation": lambda request, response: (
+            request.session_id,
+            request.language,
+        ),
+        "captioning": lambda request, response: (
+            request.session_id,
+            request.language,
+            response.layout,
+        ),
+    }
+    # topic -> fn(dropped response, newer response), see EventBus
+    LISTENER_SUPERSEDE_FNS = {
+        # Highlight what changed since the caption before the dropped one
+        "captioning": LinewiseScrollStrategy.merge_highlights,
+    }
+
     UTTERANCE_DELIMITERS = {
         "es-ES": ". ",
         "en-US": ". ",
         "zh": "。",
     }
 
-    def __init__(self, config, logger, languages, start_background_task=start_thread):
+    def __init__(
+        self,
+        config,
+        logger,
+        languages,
+        start_background_task=start_thread,
+        tracer=None,
+    ):
         self.config = config
         self.logger = logger
         self.languages = languages  # target languages
         self.start_background_task = start_background_task
-        self.listeners = {
-            "asr": [],
-            "language-update": [],
-            "translation": [],
-            "post-translation": [],
-            "captioning": [],
-        }
+        # Untraced unless a tracer is given
+        self.tracer = tracer if tracer is not None else Tracer(sample_rate=0)
+        self.event_bus = EventBus(
+            start_background_task,
+            max_queue_size=int(os.getenv("LISTENER_QUEUE_SIZE", 100)),
+            supersede_fns=self.LISTENER_SUPERSEDE_FNS,
+        )
         self.sessions: Dict[str, Session] = {}
 
+        # Load shedding, see services/overload.py
+        # target_language -> whether to translate partial transcripts into it
+        self.translate_partials_fn = lambda target_language: True
+        self.language_detection_paused = False
+
         # Initialize component services
         self.asr_service = SpeechRecognitionService
         self.mt_service = TranslationService(
@@ -65,8 +139,14 @@ class SpeechTranslationService:
             start_background_task=start_background_task,
         )
         self.post_translation_service = PostTranslationService(
-            config.post_translation, logger=logger
+            config.post_translation, logger=logger, callback_fn=self._on_punctuated
         )
+        # (session_id, language) -> PostTranslationRequest and complete
+        # CaptioningRequest of a final that is shown unpunctuated until the
+        # punctuation server responds
+        self.pending_finals: Dict[
+            Tuple[str, str], Tuple[PostTranslationRequest, CaptioningRequest]
+        ] = {}
         self.captioning_service = CaptioningService(
             config.captioning,
             logger=logger,
@@ -77,15 +157,21 @@ class SpeechTranslationService:
         self,
         topic,
         listener: Callable[[ServiceRequest, ServiceResponse], Any],
+        synchronous=False,
     ):
         """
         Add a listener to a topic (transcript, translation,
         de-flickered translation, and captioning).
+
+        Listeners are called in the background, in the order of their events,
+        and a listener that falls behind skips old partials, see
+        services/speech_translation/event_bus.py. Synchronous listeners are
+        called before the pipeline moves on, and hold it up while they run.
         """
 
-        if topic not in self.listeners:
+        if topic not in self.LISTENER_TOPICS:
             raise ValueError(f"Could not add listener to topic {topic}")
-        self.listeners[topic].append(listener)
+        self.event_bus.subscribe(topic, listener, synchronous)
 
     def start_listening(self, session_id, language):
         """
@@ -103,6 +189,7 @@ class SpeechTranslationService:
                 callback_fn=self._on_transcript,
                 language_id_callback_fn=self._on_language_update,
             )
+            asr_service.pause_language_detection(self.language_detection_paused)
             recognizer_thread = self.start_background_task(target=asr_service.run)
             language_id_thread = self.start_background_task(
                 target=asr_service.run_language_detect
@@ -113,6 +200,7 @@ class SpeechTranslationService:
                 asr_service=asr_service,
                 recognizer_thread=recognizer_thread,
                 language_id_thread=language_id_thread,
+                partial_filter=PartialFilter(language),
             )
 
     def stop_listening(self, session_id, wait_for_final=True):
@@ -134,7 +222,22 @@ class SpeechTranslationService:
             session.language_id_thread.join()
 
         self.mt_service.end_session(session_id, wait_for_final)
+
+        # Don't leave the last finals shown as if still in progress, when their
+        # punctuation won't be waited for. Listeners won't get the punctuated
+        # finals once the session has ended either, so they get them unpunctuated
+        for key in [k for k in self.pending_finals if k[0] == session_id]:
+            post_translation_request, caption_request = self.pending_finals.pop(key)
+            self._notify_listeners(
+                "post-translation",
+                post_translation_request,
+                PostTranslationResponse(translation=caption_request.utterance),
+            )
+            self._caption(caption_request)
+
         self.captioning_service.end_session(session_id)
+        self.tracer.end_session(session_id)
+        clear_incremental_tokenizations(session_id)
         self.sessions.pop(session_id, None)
 
     def __call__(self, request: SpeechTranslationRequest) -> None:
@@ -147,36 +250,65 @@ class SpeechTranslationService:
         if session is None:
             return
 
+        AUDIO_CHUNKS.inc()
+        AUDIO_BYTES.inc(len(request.chunk))
+        self.tracer.on_audio(request.session_id)
         session.asr_service(
             SpeechRecognitionRequest(
                 request.session_id, request.chunk, request.end_utterance
             )
         )
 
+    @pipeline_stage("asr_callback")
     def _on_transcript(
         self,
         asr_request: SpeechRecognitionRequest,
         asr_response: SpeechRecognitionResponse,
+        filter_partials=True,
     ):
         """
-        Broadcast new asr response to listeners, and translate
+        Broadcast new asr response to listeners, and translate, unless it's a
+        partial that wouldn't change the captions, see partial_filter.py.
+        filter_partials: False to forward the response without passing it through
+            (and updating) the session's partial filter, e.g. when replaying it
         """
 
-        self._notify_listeners("asr", asr_request, asr_response)
-
-        # Send ASR response to be translated
         session = self.sessions.get(asr_request.session_id)
 
         if session is None:
             return
 
+        ASR_RESPONSES.labels(
+            session.language, "final" if asr_response.is_final else "partial"
+        ).inc()
+
+        if filter_partials and not session.partial_filter(asr_response):
+            return
+
+        trace = self.tracer.start_trace(
+            asr_request.session_id,
+            asr_response.relative_time_offset,
+            asr_response.is_final,
+        )
+
+        if trace is not None:
+            trace.mark("asr")
+
+        self._notify_listeners("asr", asr_request, asr_response)
+
         self.logger.debug(
             f"session_id: {asr_request.session_id}, "
             + f"message_id: {asr_response.relative_time_offset}, "
             + f"asr_response_transcript: {asr_response.transcript}"
         )
 
+        # Send ASR response to be translated
         for target_language in self.languages():
+            if not asr_response.is_final and not self.translate_partials_fn(
+                target_language
+            ):
+                continue
+
             # call translation service
             mt_request = TranslationRequest(
                 session_id=asr_request.session_id,
@@ -185,14 +317,22 @@ class SpeechTranslationService:
                 source_language=session.language,
                 target_language=target_language,
                 is_final=asr_response.is_final,
+                trace=trace,
             )
             self.mt_service(mt_request)
 
+    def pause_language_detection(self, paused):
+        self.language_detection_paused = paused
+
+        for session in self.sessions.values():
+            session.asr_service.pause_language_detection(paused)
+
     def _on_language_update(
         self, language_request: LanguageIdRequest, language_response: LanguageIdResponse
     ):
         self._notify_listeners("language-update", language_request, language_response)
 
+    @pipeline_stage("translation_callback")
     def _on_translation(
         self, mt_request: TranslationRequest, mt_response: TranslationResponse
     ):
@@ -207,25 +347,72 @@ class SpeechTranslationService:
             is_final=mt_request.is_final,
             original_language=mt_request.source_language,
             language=mt_request.target_language,
+            trace=mt_request.trace,
         )
+        start_time = time.perf_counter()
         post_translation_response = self.post_translation_service(
             post_translation_request
         )
+        POST_TRANSLATION_SECONDS.observe(time.perf_counter() - start_time)
 
-        # Notify listeners of translation with post-processing applied
-        self._notify_listeners(
-            "post-translation", post_translation_request, post_translation_response
-        )
+        if mt_request.trace is not None:
+            mt_request.trace.mark("post_translation", mt_request.target_language)
 
-        # Call captioning service
         caption_request = CaptioningRequest(
             session_id=mt_request.session_id,
             message_id=mt_request.message_id,
             language=mt_request.target_language,
             utterance=post_translation_response.translation,
             utterance_complete=mt_request.is_final,
+            trace=mt_request.trace,
+        )
+        key = (mt_request.session_id, mt_request.target_language)
+
+        # The speaker has moved on, so stop waiting to punctuate their last final
+        pending_final = self.pending_finals.pop(key, None)
+
+        if pending_final is not None:
+            self._caption(pending_final[1])
+
+        if post_translation_response.punctuation_pending:
+            # Show the final as if it were still in progress, until _on_punctuated
+            self.pending_finals[key] = (post_translation_request, caption_request)
+            self._caption(replace(caption_request, utterance_complete=False))
+
+            return
+
+        # Notify listeners of translation with post-processing applied
+        self._notify_listeners(
+            "post-translation", post_translation_request, post_translation_response
+        )
+        self._caption(caption_request)
+
+    @pipeline_stage("punctuation_callback")
+    def _on_punctuated(
+        self,
+        post_translation_request: PostTranslationRequest,
+        post_translation_response: PostTranslationResponse,
+    ):
+        self._notify_listeners(
+            "post-translation", post_translation_request, post_translation_response
         )
-        self.captioning_service(caption_request)
+
+        key = (post_translation_request.session_id, post_translation_request.language)
+        _, pending_final = self.pending_finals.get(key, (None, None))
+
+        if (
+            pending_final is not None
+            and pending_final.message_id == post_translation_request.message_id
+        ):
+            del self.pending_finals[key]
+            pending_final.utterance = post_translation_response.translation
+            self._caption(pending_final)
+
+    def _caption(self, caption_request: CaptioningRequest):
+        with pipeline_stage("captioning"):
+            start_time = time.perf_counter()
+            self.captioning_service(caption_request)
+            CAPTIONING_SECONDS.observe(time.perf_counter() - start_time)
 
     def _notify_listeners(self, topic, service_request, service_response):
         """
@@ -237,5 +424,10 @@ class SpeechTranslationService:
         if session is None:
             return
 
-        for listener in self.listeners[topic]:
-            listener(service_request, service_response)
+        self.event_bus.publish(
+            topic,
+            service_request,
+            service_response,
+            is_final=self.LISTENER_TOPICS[topic](service_request, service_response),
+            key=self.LISTENER_EVENT_KEYS[topic](service_request, service_response),
+        )
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 
 from services.asr import SpeechRecognitionService
 
+from .partial_filter import PartialFilter
+
 
 @dataclass
 class Session:
@@ -11,3 +13,4 @@ class Session:
     asr_service: SpeechRecognitionService
     recognizer_thread: threading.Thread
     language_id_thread: threading.Thread
+    partial_filter: PartialFilter
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Optional, Sequence, Union
 
 from config import Config
+from utils import slotted_dataclass
 
 
 @dataclass
@@ -10,7 +11,7 @@ class TTSConfig(Config):
     language_type: str = "en-US"
 
 
-@dataclass
+@slotted_dataclass
 class TTSRequest:
     session_id: str
     message_id: int  # calculated from the relative_time_offset
@@ -24,6 +25,6 @@ class TTSRequest:
         return (self.session_id, self.source_language, self.target_language)
 
 
-@dataclass
+@slotted_dataclass
 class TTSResponse:
     audio_dir: str  # this is the audio's directory.
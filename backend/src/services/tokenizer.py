@@ -1,13 +1,28 @@
 import html
 import logging
+import os
 import time
+from collections import OrderedDict
 
-import jieba
 from sacremoses import MosesDetokenizer, MosesTokenizer
 
+from monitoring import REGISTRY
+
+from .tokenizer_cache import initialize_jieba
+
+TOKENIZER_CACHE_REQUESTS = REGISTRY.counter(
+    "meetdot_tokenizer_cache_requests_total",
+    "Calls to the memoized tokenizers, by whether the result was cached",
+    ("language", "operation", "result"),
+)
+
 TOKENIZERS = {}
 SUPPORTED_LANGUAGES = ("en-US", "zh", "es-ES", "pt-BR")
 
+# Most keys each tokenizer keeps incremental tokenizations for, the least recently
+# used are dropped first
+MAX_INCREMENTAL_KEYS = 5000
+
 
 def get_tokenizer(language):
     # Load tokenizers only once per language
@@ -18,8 +33,74 @@ def get_tokenizer(language):
     return TOKENIZERS[language]
 
 
+def tokenizer_stats():
+    """
+    Returns the cache hit rates of every loaded tokenizer, by language
+    """
+    return {language: t.cache_stats() for language, t in TOKENIZERS.items()}
+
+
+def clear_incremental_tokenizations(session_id):
+    """
+    Drop the session's incremental tokenizations in every language
+    """
+
+    for tokenizer in list(TOKENIZERS.values()):
+        tokenizer.end_session(session_id)
+
+
+class LRUCache:
+    def __init__(self, max_size, language, operation):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.hit_counter = TOKENIZER_CACHE_REQUESTS.labels(language, operation, "hit")
+        self.miss_counter = TOKENIZER_CACHE_REQUESTS.labels(language, operation, "miss")
+
+    def get(self, key, compute_fn):
+        """
+        Returns the cached value for key, computing it with compute_fn(key) if
+        it isn't cached
+        """
+        value = self.entries.get(key)
+
+        if value is not None:
+            self.hits += 1
+            self.hit_counter.inc()
+            self.entries.move_to_end(key)
+
+            return value
+
+        self.misses += 1
+        self.miss_counter.inc()
+        value = compute_fn(key)
+
+        if self.max_size > 0:
+            self.entries[key] = value
+
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return value
+
+    def to_dict(self):
+        requests = self.hits + self.misses
+
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+
 class Tokenizer:
-    def __init__(self, lang="en-US", logger_name=None):
+    def __init__(self, lang="en-US", logger_name=None, cache_size=None):
+        """
+        cache_size: most texts (and token lists) to memoize the tokenization (and
+                    detokenization) of, defaults to TOKENIZER_CACHE_SIZE
+        """
         self.logger = (
             logging.getLogger(logger_name)
             if logger_name
@@ -27,6 +108,14 @@ class Tokenizer:
         )
 
         self.lang = lang
+        # key -> chunks of the last text tokenized incrementally with the key,
+        # as (chunk, tokens of chunk)
+        self.incremental = OrderedDict()
+
+        if cache_size is None:
+            cache_size = int(os.getenv("TOKENIZER_CACHE_SIZE", 10000))
+        self.tokenize_cache = LRUCache(cache_size, lang, "tokenize")
+        self.detokenize_cache = LRUCache(cache_size, lang, "detokenize")
 
         if self.lang not in SUPPORTED_LANGUAGES:
             self.logger.error(f"Unsupported language for tokenizer: {self.lang}")
@@ -41,8 +130,13 @@ class Tokenizer:
 
         if self.lang == "zh":
             s_time = time.time()
+            # Imported here since its dictionary is slow to import
+            import jieba
+
+            self.jieba = jieba
             jieba.setLogLevel(logging.ERROR)
-            jieba.initialize()
+            # Loads the prefix dictionary from the cache shared across processes
+            initialize_jieba(jieba)
             e_time = time.time()
             self.logger.info(f"Time to initialize jieba: {e_time - s_time}")
 
@@ -73,19 +167,100 @@ class Tokenizer:
         Returns:
             tokens: list of tokens
         """
+        # Cached as tuples, so callers can't change them
+        return list(self.tokenize_cache.get(input_str, self._tokenize))
+
+    def tokenize_many(self, input_strs):
+        """
+        Args:
+            input_strs: list of input strings
+        Returns:
+            list of lists of tokens
+        """
+        return [self.tokenize(input_str) for input_str in input_strs]
+
+    def _tokenize(self, input_str):
         ret_tokens = []
 
         if self.lang == "zh":
-            seg_tokens = jieba.cut(input_str)  # 默认是精确模式
-            ret_tokens = list(seg_tokens)
+            seg_tokens = self.jieba.cut(input_str)  # 默认是精确模式
+            ret_tokens = tuple(seg_tokens)
 
             return ret_tokens
         else:
             ret_tokens = self.tokenizer.tokenize(input_str)
-            ret_tokens = list(map(html.unescape, ret_tokens))
+            ret_tokens = tuple(map(html.unescape, ret_tokens))
 
             return ret_tokens
 
+    def tokenize_incremental(self, input_str, key):
+        """
+        Same as tokenize, but reuses the tokens of the chunks of the text last
+        tokenized with the same key, as long as the new text starts with them.
+        Meant for texts that grow or change at the end, like the translations of
+        a session's partials.
+        Args:
+            input_str: input string
+            key: tuple starting with the session id
+        Returns:
+            tokens: list of tokens
+        """
+        chunks = self.incremental.pop(key, [])
+        new_chunks = []
+        tokens = []
+        start = 0
+
+        for chunk, chunk_tokens in chunks:
+            end = start + len(chunk)
+
+            if not input_str.startswith(chunk, start) or not (
+                end == len(input_str) or self.is_boundary(input_str, end)
+            ):
+                break
+
+            new_chunks.append((chunk, chunk_tokens))
+            tokens.extend(chunk_tokens)
+            start = end
+
+        if start < len(input_str):
+            chunk = input_str[start:]
+            chunk_tokens = self.tokenize(chunk)
+            new_chunks.append((chunk, chunk_tokens))
+            tokens.extend(chunk_tokens)
+
+        self.incremental[key] = new_chunks
+
+        if len(self.incremental) > MAX_INCREMENTAL_KEYS:
+            self.incremental.popitem(last=False)
+
+        return tokens
+
+    def is_boundary(self, input_str, i):
+        """
+        Whether tokenizing input_str[:i] and input_str[i:] separately gives the
+        same tokens as tokenizing input_str
+        """
+
+        if self.lang == "zh":
+            # jieba segments runs of Chinese characters (and some ASCII) separately,
+            # and splits anything else into single characters
+            return not (
+                self.jieba.re_han_default.match(input_str[i - 1])
+                or input_str[i - 1].isspace()
+            )
+        else:
+            # Moses only looks across spaces at punctuation
+            return (
+                input_str[i].isspace()
+                and input_str[i - 1].isalnum()
+                and i + 1 < len(input_str)
+                and input_str[i + 1].isalnum()
+            )
+
+    def end_session(self, session_id):
+        for key in [k for k in self.incremental if k[0] == session_id]:
+            self.incremental.pop(key)
+
     def detokenize(self, tokens):
         """
         Args:
@@ -93,6 +268,22 @@ class Tokenizer:
         """
 
         if self.lang == "zh":
+            # Cheaper than looking it up
             return "".join(tokens)
         else:
-            return self.detokenizer.detokenize(tokens)
+            return self.detokenize_cache.get(tuple(tokens), self.detokenizer.detokenize)
+
+    def detokenize_many(self, tokens_list):
+        """
+        Args:
+            tokens_list: list of lists of tokens
+        Returns:
+            list of strings
+        """
+        return [self.detokenize(tokens) for tokens in tokens_list]
+
+    def cache_stats(self):
+        return {
+            "tokenize": self.tokenize_cache.to_dict(),
+            "detokenize": self.detokenize_cache.to_dict(),
+        }
@@ -0,0 +1,139 @@
+"""
+On-disk cache of tokenizer state shared by every process of a user on a host.
+
+jieba's prefix dictionary is cached in TOKENIZER_CACHE_DIR, so backend processes,
+evaluation workers and scripts load it rather than build it from jieba's word
+list when they first tokenize Chinese. Processes can share the cache (e.g. over a
+mounted volume), and workers of a process pool start warm.
+
+Entries are marshalled, so reading one can't run code, and are only read from a
+directory and files owned by the current user that no one else can write to. The
+default directory is per user.
+
+Entries are keyed by the cache format version, the library version and the
+dictionary file, so upgrading either rebuilds them instead of loading stale state.
+"""
+import hashlib
+import logging
+import marshal
+import os
+import stat
+import tempfile
+
+# Bump when the marshalled format of an entry changes
+CACHE_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache_dir():
+    cache_dir = os.getenv("TOKENIZER_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), f"meetdot-tokenizers-{os.getuid()}"
+    )
+
+    return os.path.join(cache_dir, f"v{CACHE_VERSION}")
+
+
+def is_private(st):
+    """
+    Whether a file (or directory) is owned by the current user, and no one else
+    can write to it
+    """
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def make_cache_dir():
+    """
+    Returns the cache directory, created if needed, or None if it can't be
+    trusted, e.g. because another user created it first
+    """
+    cache_dir = get_cache_dir()
+    os.makedirs(os.path.dirname(cache_dir), mode=0o700, exist_ok=True)
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+
+    for directory in (os.path.dirname(cache_dir), cache_dir):
+        st = os.lstat(directory)
+
+        if not stat.S_ISDIR(st.st_mode) or not is_private(st):
+            logger.warning(f"Not using tokenizer cache {directory}, it isn't private")
+            return None
+
+    return cache_dir
+
+
+def load_or_build(name, build_fn):
+    """
+    Returns the cached value named name, calling build_fn() and caching its
+    result if there's none (or it can't be read). Values must be marshallable
+    """
+    try:
+        cache_dir = make_cache_dir()
+    except OSError:
+        logger.warning("Failed to create tokenizer cache directory", exc_info=True)
+        cache_dir = None
+
+    if cache_dir is None:
+        return build_fn()
+
+    path = os.path.join(cache_dir, f"{name}.marshal")
+
+    try:
+        with open(os.open(path, os.O_RDONLY | os.O_NOFOLLOW), "rb") as f:
+            if not is_private(os.fstat(f.fileno())):
+                raise PermissionError(f"{path} isn't private")
+
+            # Several times faster than marshal.load(f), which reads in pieces
+            return marshal.loads(f.read())
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.warning(f"Rebuilding unreadable tokenizer cache {path}", exc_info=True)
+
+    value = build_fn()
+
+    try:
+        # Write to a temporary file first, so other processes never read a
+        # partially written cache
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            marshal.dump(value, f)
+        os.replace(temp_path, path)
+    except Exception:
+        logger.warning(f"Failed to write tokenizer cache {path}", exc_info=True)
+
+    return value
+
+
+def initialize_jieba(jieba):
+    """
+    Same as jieba.initialize(), but loads the prefix dictionary from the cache.
+    Falls back to jieba.initialize() if jieba's internals it relies on change
+    """
+    dt = jieba.dt
+
+    try:
+        lock, get_dict_file, gen_pfdict = dt.lock, dt.get_dict_file, dt.gen_pfdict
+    except AttributeError:
+        logger.warning("Unsupported jieba version, not caching its dictionary")
+        jieba.initialize()
+        return
+
+    with lock:
+        if dt.initialized:
+            return
+
+        dictionary = get_dict_file()
+        try:
+            st = os.stat(dictionary.name)
+            source = f"{dictionary.name}:{st.st_size}:{st.st_mtime}"
+        except (AttributeError, OSError):
+            source = str(dt.dictionary)
+        finally:
+            dictionary.close()
+
+        digest = hashlib.md5(source.encode("utf-8")).hexdigest()[:12]
+        dt.FREQ, dt.total = load_or_build(
+            f"jieba-{jieba.__version__}-{digest}",
+            lambda: gen_pfdict(get_dict_file()),
+        )
+        dt.initialized = True
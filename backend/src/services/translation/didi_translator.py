@@ -7,6 +7,8 @@ from enum import Enum
 
 import requests
 
+from ..resilience import DependencyError, get_endpoint
+from .endpoint_pool import get_pool
 from .interface import TranslationRequest
 from .translator import Translator
 
@@ -17,15 +19,61 @@ class DecodingMode(Enum):
     BIASED = 3
 
 
+def lang_detect_url(translate_url):
+    base_url, _slash, _unused_part = translate_url.rpartition("/")
+
+    return f"{base_url}/lang_detect"
+
+
+def get_headers():
+    return {
+        "Content-Type": "application/json",
+        "apikey": os.getenv("DIDI_TRANSLATE_KEY"),
+    }
+
+
+def check_health(translate_url, timeout):
+    """
+    Raises if the translation server at translate_url can't detect a language
+    """
+    response = requests.post(
+        lang_detect_url(translate_url),
+        headers=get_headers(),
+        json={"text": "hello"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+    ret_code = response.json()["code"]
+    if ret_code != 0:
+        raise ValueError(f"Return code from {translate_url} is not 0 ({ret_code})")
+
+
 class DiDiTranslator(Translator):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.translate_url = os.getenv("DIDI_TRANSLATE_URL")
-        base_url, _slash, _unused_part = self.translate_url.rpartition("/")
-        self.lang_detect_url = f"{base_url}/lang_detect"
-
         self.apikey = os.getenv("DIDI_TRANSLATE_KEY")
-        self.headers = {"Content-Type": "application/json", "apikey": self.apikey}
+        self.headers = get_headers()
+        self.timeout = float(os.getenv("TRANSLATE_TIMEOUT_MS", 2000)) / 1000
+        self.hedge_finals = bool(int(os.getenv("HEDGE_FINAL_TRANSLATIONS", 0)))
+
+        # Requests are balanced across a comma-separated list of translation servers
+        urls = [url.strip() for url in os.getenv("DIDI_TRANSLATE_URL", "").split(",")]
+        urls = [url for url in urls if url]
+
+        # None if unset, which is reported when translating, so rooms not
+        # translating (e.g. with a single language) don't need it
+        self.pool = (
+            get_pool(
+                urls,
+                self.timeout,
+                strategy=os.getenv("DIDI_LOAD_BALANCING", "least_outstanding"),
+                health_check_fn=check_health,
+                health_check_interval=float(os.getenv("DIDI_HEALTH_CHECK_SECONDS", 10)),
+            )
+            if urls
+            else None
+        )
 
         if self.config.bias_beta <= 0:
             self.decoding_mode = DecodingMode.UNCONSTRAINED
@@ -55,8 +103,19 @@ class DiDiTranslator(Translator):
             self.strongly_bias = False
 
     def post(self, url, request_dict):
+        """
+        Raises DependencyError if the request fails or times out, or if url
+        has been failing
+        """
+        return get_endpoint(url, self.timeout)(lambda: self.send(url, request_dict))
+
+    def send(self, url, request_dict):
         encoded_request = json.dumps(request_dict).encode("utf-8")
-        response = requests.post(url, headers=self.headers, data=encoded_request).json()
+        response = requests.post(
+            url, headers=self.headers, data=encoded_request, timeout=self.timeout
+        )
+        response.raise_for_status()
+        response = response.json()
 
         ret_code = response["code"]
         if ret_code != 0:
@@ -74,6 +133,13 @@ class DiDiTranslator(Translator):
         if request.source_language == request.target_language:
             return request.text, None
 
+        if self.pool is None:
+            # The translator falls back to the text, and logs this
+            raise DependencyError(
+                "DIDI_TRANSLATE_URL must be set to the url of at least one"
+                + " translation server, separated by commas"
+            )
+
         language_codes_map = {"zh": "zh", "en-US": "en", "es-ES": "es", "pt-BR": "pt"}
         data = {
             "text": request.text,
@@ -105,7 +171,16 @@ class DiDiTranslator(Translator):
                     if raw_prefix:
                         text = "".join(raw_prefix[-3:])
                         text = text.replace("@@", "")
-                        lang_response = self.post(self.lang_detect_url, {"text": text})
+                        try:
+                            lang_response = self.post(
+                                lang_detect_url(
+                                    self.pool.choose(request.session_key()).url
+                                ),
+                                {"text": text},
+                            )
+                        except DependencyError as e:
+                            self.logger.warning(e)
+                            lang_response = None
                         lang = (
                             lang_response.get("data", {}).get("lang")
                             if lang_response
@@ -116,7 +191,13 @@ class DiDiTranslator(Translator):
             data["prefix_bias_beta"] = self.prefix_bias_beta
             data["target_prefix"] = request.previous_translation
 
-        translate_response = self.post(self.translate_url, data)
+        # Raises DependencyError, so the translator falls back to the text
+        translate_response = self.pool(
+            request.session_key(),
+            lambda url: self.send(url, data),
+            hedge=request.is_final and self.hedge_finals,
+        )
+
         translate_response = (
             {} if not translate_response else translate_response.get("data", {})
         )
@@ -141,3 +222,9 @@ class DiDiTranslator(Translator):
         # from pre-processed/split text that has modified the original character
         # count back to the original un-preprocessed string.
         return translation_text, raw_translation if raw_translation else None
+
+    def end_session(self, target_session_id, wait_for_final=True):
+        super().end_session(target_session_id, wait_for_final)
+
+        if self.pool is not None:
+            self.pool.end_session(target_session_id)
@@ -0,0 +1,163 @@
+"""
+Process-wide prioritized dispatch of translation requests.
+
+With the default per-session scheduling every TranslationEventLoop calls its
+translation provider as soon as it has a request, so under load partials from
+chatty speakers compete with finals for the provider and the downstream stages.
+A PriorityDispatcher limits how many requests run at once across all sessions,
+and hands free slots to finals first, then to the partials that have waited longest.
+A session's final cancels its partial still waiting for a slot, which it supersedes.
+"""
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from monitoring import REGISTRY
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "meetdot_mt_queue_wait_seconds",
+    "Time translation requests waited for a dispatch slot",
+    ("provider", "type"),
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "meetdot_mt_queue_depth",
+    "Translation requests waiting for a dispatch slot",
+    ("provider",),
+)
+
+# (provider, max_concurrency) -> PriorityDispatcher
+_dispatchers = {}
+
+
+def get_dispatcher(provider, max_concurrency):
+    """
+    Returns the dispatcher shared by every session (and room) translating
+    with `provider` and the same concurrency limit
+    """
+    key = (provider, max_concurrency)
+
+    if key not in _dispatchers:
+        _dispatchers[key] = PriorityDispatcher(provider, max_concurrency)
+
+    return _dispatchers[key]
+
+
+class Waiter:
+    """
+    A request waiting for a slot, see PriorityDispatcher.slot()
+    """
+
+    __slots__ = ("ready", "acquired", "cancelled")
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.acquired = False  # handed a slot
+        self.cancelled = False
+
+
+class PriorityDispatcher:
+    FINAL = 0
+    PARTIAL = 1
+
+    def __init__(self, provider, max_concurrency):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        # heap of (priority, enqueue time, sequence number, waiter)
+        self.waiting = []
+        self.lock = threading.Lock()
+        self._sequence = itertools.count()
+
+        QUEUE_DEPTH.labels(provider).set_function(self.queue_depth)
+
+    def queue_depth(self):
+        return len(self.waiting)
+
+    @contextmanager
+    def slot(self, is_final, waiter=None):
+        """
+        Wait for a free slot, then hold it until the context exits. Yields
+        whether the slot was acquired, which it isn't if the wait is cancelled
+
+        waiter: a Waiter to cancel the wait with, see cancel()
+        """
+        priority = self.FINAL if is_final else self.PARTIAL
+        enqueue_time = time.perf_counter()
+        waiter = waiter if waiter is not None else Waiter()
+
+        with self.lock:
+            if self.running < self.max_concurrency and not self.waiting:
+                self.running += 1
+                waiter.acquired = True
+            else:
+                heapq.heappush(
+                    self.waiting,
+                    (priority, enqueue_time, next(self._sequence), waiter),
+                )
+
+        if not waiter.acquired:
+            try:
+                # The slot is handed over by the request that releases it
+                waiter.ready.wait()
+            except BaseException:
+                # e.g. the greenlet was killed, so don't let the slot go to it
+                self._abandon(waiter)
+                raise
+
+        QUEUE_WAIT_SECONDS.labels(
+            self.provider, "final" if is_final else "partial"
+        ).observe(time.perf_counter() - enqueue_time)
+
+        if not waiter.acquired:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            self._release()
+
+    def cancel(self, waiter):
+        """
+        Stops waiting for a slot, unless the waiter has one already. Returns
+        whether it was cancelled
+        """
+        with self.lock:
+            if waiter.acquired or not self._remove(waiter):
+                return False
+
+            waiter.cancelled = True
+
+        waiter.ready.set()
+
+        return True
+
+    def _abandon(self, waiter):
+        with self.lock:
+            if not waiter.acquired:
+                self._remove(waiter)
+                return
+
+        self._release()
+
+    def _remove(self, waiter):
+        for i, entry in enumerate(self.waiting):
+            if entry[3] is waiter:
+                self.waiting[i] = self.waiting[-1]
+                self.waiting.pop()
+                heapq.heapify(self.waiting)
+
+                return True
+
+        return False
+
+    def _release(self):
+        with self.lock:
+            if self.waiting:
+                _, _, _, waiter = heapq.heappop(self.waiting)
+                waiter.acquired = True
+                waiter.ready.set()
+            else:
+                self.running -= 1
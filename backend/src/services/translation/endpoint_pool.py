@@ -0,0 +1,162 @@
+"""
+Client-side load balancing across several instances of a translation backend.
+
+Each session key (session, source and target language) sticks to one backend for
+as long as it's available, so biased decoding keeps hitting the backend whose
+cache holds its previous translations. New session keys, and those whose backend
+became unavailable, go to the least loaded backend.
+
+Backends are also health checked in the background. Health checks bypass the
+backends' ResilientEndpoints, so their latencies and results don't skew those of
+the translations, and a backend's circuit breaker only closes again once a
+translation succeeds.
+"""
+import time
+
+import gevent
+
+from ..resilience import CircuitBreaker, DependencyError, get_endpoint
+
+# tuple of urls -> EndpointPool
+_pools = {}
+
+
+def get_pool(urls, timeout, **kwargs):
+    """
+    Returns the EndpointPool shared by all translators using the same backends
+    """
+    key = tuple(urls)
+
+    if key not in _pools:
+        _pools[key] = EndpointPool(urls, timeout, **kwargs)
+
+    return _pools[key]
+
+
+class Backend:
+    def __init__(self, url, timeout):
+        self.url = url
+        self.endpoint = get_endpoint(url, timeout)
+        self.healthy = True
+        self.outstanding = 0  # requests in flight
+        self.ewma_latency = 0.0
+        self.num_sessions = 0  # session keys routed here
+
+    def available(self):
+        breaker = self.endpoint.breaker
+
+        # An open breaker lets a trial translation through once it's due
+        return self.healthy and (
+            breaker.state == CircuitBreaker.CLOSED or breaker.trial_due()
+        )
+
+
+class EndpointPool:
+    STRATEGIES = ("least_outstanding", "ewma")
+
+    def __init__(
+        self,
+        urls,
+        timeout,
+        strategy="least_outstanding",
+        health_check_fn=None,
+        health_check_interval=10.0,
+        ewma_alpha=0.3,
+    ):
+        """
+        strategy: "least_outstanding" picks the backend with the fewest requests in
+                  flight, "ewma" weighs those by the backend's average latency
+        health_check_fn: called with a backend's url and the timeout, should raise if
+                         the backend is unhealthy. As pools live for the whole
+                         process, it shouldn't hold on to e.g. a translator
+        health_check_interval: seconds between health checks of every backend
+        """
+
+        if strategy not in EndpointPool.STRATEGIES:
+            raise ValueError(
+                f"Unsupported load balancing strategy {strategy}, supported"
+                + f" strategies are {EndpointPool.STRATEGIES}"
+            )
+
+        self.backends = [Backend(url, timeout) for url in urls]
+        self.timeout = timeout
+        self.strategy = strategy
+        self.health_check_fn = health_check_fn
+        self.health_check_interval = health_check_interval
+        self.ewma_alpha = ewma_alpha
+        self.sticky = {}  # session_key -> Backend
+
+        if health_check_fn is not None and len(self.backends) > 1:
+            gevent.spawn(self._run_health_checks)
+
+    def __call__(self, session_key, fn, hedge=False):
+        """
+        Returns fn(url) for the session key's backend. If that fails, it's retried
+        once on another backend before raising DependencyError.
+        """
+        tried = []
+
+        while True:
+            backend = self.choose(session_key, exclude=tried)
+            backend.outstanding += 1
+            start_time = time.perf_counter()
+
+            try:
+                result = backend.endpoint(lambda: fn(backend.url), hedge=hedge)
+            except DependencyError:
+                tried.append(backend)
+
+                if len(tried) >= min(2, len(self.backends)):
+                    raise
+
+                continue
+            finally:
+                backend.outstanding -= 1
+
+            backend.ewma_latency += self.ewma_alpha * (
+                time.perf_counter() - start_time - backend.ewma_latency
+            )
+
+            return result
+
+    def choose(self, session_key, exclude=()):
+        backend = self.sticky.get(session_key)
+
+        if backend is not None and backend.available() and backend not in exclude:
+            return backend
+
+        candidates = [b for b in self.backends if b not in exclude] or self.backends
+        candidates = [b for b in candidates if b.available()] or candidates
+        new_backend = min(candidates, key=self._load)
+
+        if backend is not None:
+            backend.num_sessions -= 1
+        new_backend.num_sessions += 1
+        self.sticky[session_key] = new_backend
+
+        return new_backend
+
+    def _load(self, backend):
+        if self.strategy == "ewma":
+            load = (backend.outstanding + 1) * backend.ewma_latency
+        else:
+            load = backend.outstanding
+
+        # Spread new sessions evenly between equally loaded backends
+        return load, backend.num_sessions
+
+    def end_session(self, session_id):
+        for session_key in [k for k in self.sticky if k[0] == session_id]:
+            self.sticky.pop(session_key).num_sessions -= 1
+
+    def _run_health_checks(self):
+        while True:
+            for backend in self.backends:
+                try:
+                    with gevent.Timeout(self.timeout):
+                        self.health_check_fn(backend.url, self.timeout)
+                    backend.healthy = True
+                except (Exception, gevent.Timeout):
+                    backend.healthy = False
+
+            gevent.sleep(self.health_check_interval)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
-from typing import Optional, Sequence, Union
+from typing import Any, Optional, Sequence, Union
 
 from config import Config
+from utils import slotted_dataclass
 
 
 @dataclass
@@ -11,9 +12,14 @@ class TranslationConfig(Config):
     min_interval_ms: Optional[int] = 35
     min_interval_char: Optional[int] = 0
     custom_args: Optional[dict] = None
+    # "per_session" translates each session's requests as soon as they're ready,
+    # "prioritized" shares max_concurrency slots between all sessions in the
+    # process, giving them to finals first
+    scheduling: str = "per_session"
+    max_concurrency: int = 4
 
 
-@dataclass
+@slotted_dataclass
 class TranslationRequest:
     session_id: str
     message_id: int  # calculated from the relative_time_offset
@@ -22,12 +28,15 @@ class TranslationRequest:
     target_language: str
     is_final: bool = True
     previous_translation: Optional[Union[Sequence[str], str]] = None
+    trace: Optional[Any] = None  # monitoring.tracing.Trace, if sampled
 
     def session_key(self):
         return (self.session_id, self.source_language, self.target_language)
 
 
-@dataclass
+@slotted_dataclass
 class TranslationResponse:
     translation: str
     raw_translation: Optional[Sequence[Sequence[str]]] = None
+    # The untranslated text, shown because the translation provider failed
+    fallback: bool = False
@@ -1,14 +1,17 @@
 from typing import Any, Callable
 
-from utils import start_thread
+from utils import import_class, start_thread
 
-from .didi_translator import DiDiTranslator
-from .google_translator import GoogleTranslator
 from .interface import TranslationConfig, TranslationRequest, TranslationResponse
 
 
 class TranslationService:
-    PROVIDERS = {"google": GoogleTranslator, "didi": DiDiTranslator}
+    # provider -> (module, class), imported when a room first uses the provider, so
+    # google.cloud.translate is only loaded if Google MT is used
+    PROVIDERS = {
+        "google": (".google_translator", "GoogleTranslator"),
+        "didi": (".didi_translator", "DiDiTranslator"),
+    }
 
     def __init__(
         self,
@@ -23,17 +26,23 @@ class TranslationService:
         self.start_background_task = start_background_task
 
         if config.provider in TranslationService.PROVIDERS:
-            self.provider = TranslationService.PROVIDERS[config.provider](
+            provider_class = import_class(
+                *TranslationService.PROVIDERS[config.provider], __package__
+            )
+            self.provider = provider_class(
                 config, callback_fn, logger, start_background_task
             )
         else:
             raise ValueError(
                 f"Unsupported translation provider {config.provider}, supported providers"
-                + f" are {TranslationService.PROVIDERS}"
+                + f" are {tuple(TranslationService.PROVIDERS)}"
             )
 
     def __call__(self, request: TranslationRequest) -> TranslationResponse:
         return self.provider(request)
 
+    def pending_requests(self):
+        return self.provider.pending_requests()
+
     def end_session(self, session_id, wait_for_final=True):
         return self.provider.end_session(session_id, wait_for_final)
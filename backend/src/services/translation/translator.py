@@ -8,10 +8,22 @@ from threading import Condition
 
 import gevent
 
+from monitoring import REGISTRY
 from utils import ThreadSafeDict
 
+from ..resilience import DependencyError
+from .dispatcher import Waiter, get_dispatcher
 from .interface import TranslationConfig, TranslationRequest, TranslationResponse
 
+MT_REQUESTS = REGISTRY.counter(
+    "meetdot_mt_requests_total",
+    "Calls to the translation provider",
+    ("provider", "type"),
+)
+MT_SECONDS = REGISTRY.histogram(
+    "meetdot_mt_seconds", "Latency of the translation provider", ("provider",)
+)
+
 
 # TODO(scotfang): Maybe make TranslationEventLoop time out after period of inactivity.
 class TranslationEventLoop:
@@ -62,10 +74,11 @@ class TranslationEventLoop:
 
             if request:
                 start_time_ns = time.time_ns()
-                self.translation_fn(request)
+                # False if the request was superseded before being translated
+                translated = self.translation_fn(request) is not False
                 time_elapsed_ns = time.time_ns() - start_time_ns
 
-                if not exit_loop:
+                if translated and not exit_loop:
                     sleep_time_s = (
                         self.min_interval_ms - time_elapsed_ns / 1e6
                     ) / float(1e3)
@@ -78,6 +91,8 @@ class TranslationEventLoop:
 
 
 class Translator:
+    SCHEDULING = ("per_session", "prioritized")
+
     def __init__(
         self,
         config: TranslationConfig,
@@ -96,6 +111,21 @@ class Translator:
         # session_key -> previous_translation
         self.previous_translations = ThreadSafeDict()
 
+        if config.scheduling not in Translator.SCHEDULING:
+            raise ValueError(
+                f"Unsupported translation scheduling {config.scheduling}, supported"
+                + f" modes are {Translator.SCHEDULING}"
+            )
+
+        # session_key -> (Waiter, is_final) of the request waiting for a
+        # dispatch slot, at most one per session as its event loop is serial
+        self.waiting_for_slot = ThreadSafeDict()
+        self.dispatcher = (
+            get_dispatcher(config.provider, config.max_concurrency)
+            if config.scheduling == "prioritized"
+            else None
+        )
+
     def __call__(self, request: TranslationRequest):
         session_key = request.session_key()
         # Retrieve previous_translation for biased_decoding, and also
@@ -118,7 +148,9 @@ class Translator:
                 session_key,
                 self.config.min_interval_ms,
                 self.config.min_interval_char,
-                self.call_translate,
+                self.call_translate
+                if self.dispatcher is None
+                else self.dispatch_translate,
                 self.logger,
             )
             new_event_loop.start()
@@ -133,13 +165,47 @@ class Translator:
                 event_loop.latest_completed_request_text = ""
             event_loop.condition.notify()
 
+        if request.is_final and self.dispatcher is not None:
+            # Don't make the final wait for a slot for the stale partial that
+            # its event loop is waiting with
+            with self.waiting_for_slot as waiting:
+                waiter, waiting_is_final = waiting.get(session_key, (None, True))
+
+            if not waiting_is_final:
+                self.dispatcher.cancel(waiter)
+
     def call_translate(self, request):
-        translation, raw_translation = self.translate(request)
+        if request.trace is not None:
+            request.trace.mark("translation_start", request.target_language)
+
+        start_time = time.perf_counter()
+        fallback = False
+
+        try:
+            translation, raw_translation = self.translate(request)
+        except DependencyError as e:
+            # Show the untranslated text rather than nothing
+            self.logger.warning(e)
+            translation, raw_translation = request.text, None
+            fallback = True
+
+        MT_SECONDS.labels(self.config.provider).observe(
+            time.perf_counter() - start_time
+        )
+        MT_REQUESTS.labels(
+            self.config.provider, "final" if request.is_final else "partial"
+        ).inc()
+
+        if request.trace is not None:
+            request.trace.mark("translation", request.target_language)
+
         response = TranslationResponse(
-            translation=translation, raw_translation=raw_translation
+            translation=translation, raw_translation=raw_translation, fallback=fallback
         )
 
-        if not request.is_final:
+        # The untranslated text of a fallback would bias the next translations
+        # towards the source language
+        if not request.is_final and not response.fallback:
             with self.previous_translations as pt:
                 pt[request.session_key()] = (
                     response.raw_translation
@@ -153,6 +219,47 @@ class Translator:
 
         self.callback_fn(request, response)
 
+    def dispatch_translate(self, request):
+        """
+        Translate once the dispatcher gives us a slot. The slot is held while
+        the callback runs post-translation and captioning, so those stages are
+        prioritized too.
+
+        Returns False if a final of the session cancelled the wait of a partial
+        """
+        session_key = request.session_key()
+        waiter = Waiter()
+
+        with self.waiting_for_slot as waiting:
+            waiting[session_key] = (waiter, request.is_final)
+
+        try:
+            with self.dispatcher.slot(request.is_final, waiter) as acquired:
+                self._stop_waiting(session_key, waiter)
+
+                if not acquired:
+                    return False
+
+                self.call_translate(request)
+        finally:
+            self._stop_waiting(session_key, waiter)
+
+    def _stop_waiting(self, session_key, waiter):
+        with self.waiting_for_slot as waiting:
+            if waiting.get(session_key, (None,))[0] is waiter:
+                del waiting[session_key]
+
+    def pending_requests(self):
+        """
+        Number of requests waiting to be translated, across all sessions
+        """
+        with self.session_event_loops as event_loops:
+            num_ready = sum(
+                loop.latest_request is not None for loop in event_loops.values()
+            )
+
+        return num_ready + len(self.waiting_for_slot)
+
     def end_session(self, target_session_id, wait_for_final=True):
         keys_to_delete = []
         finished_event_loops = []
@@ -192,5 +299,9 @@ class Translator:
                 del pt[k]
 
     def translate(self, request: TranslationRequest):
-        """Should return translation and raw_translation"""
+        """
+        Should return translation and raw_translation, and raise
+        DependencyError if the provider fails, to fall back to the untranslated
+        text
+        """
         raise NotImplementedError
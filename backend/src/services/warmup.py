@@ -0,0 +1,133 @@
+"""
+Startup warm-up of the per-language resources the pipeline loads lazily.
+
+Tokenizers, normalizers and profanity matchers are built the first time a room
+needs a language, e.g. `jieba.initialize()` on the first Chinese caption, which
+stalls that room's captions for about a second. WarmUp builds them in a
+background greenlet when the server starts, and the server reports itself ready
+(see /ready) once it's done, so load balancers only route rooms to warm nodes.
+"""
+import logging
+import time
+
+import gevent
+
+from languages import languages as LANGUAGES
+from monitoring import REGISTRY
+
+from .normalization import NORMALIZER_SUPPORTED_LANGUAGES, get_normalizer
+from .tokenizer import get_tokenizer
+
+WARMUP_SECONDS = REGISTRY.gauge(
+    "meetdot_warmup_seconds",
+    "Time each startup warm-up step took",
+    ("step",),
+)
+
+
+class WarmUp:
+    def __init__(self, languages, load_models=False):
+        """
+        languages: languages to load tokenizers, normalizers and profanity lists of
+        load_models: also load the language ID models
+        """
+        self.languages = languages
+        self.load_models = load_models
+        self.logger = logging.getLogger(__name__)
+
+        self.timings = {}  # step -> seconds
+        self.errors = {}  # step -> error message
+        self.ready = False
+        self._greenlet = None
+
+    def start(self):
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self.run)
+
+    def join(self, timeout=None):
+        if self._greenlet is not None:
+            self._greenlet.join(timeout)
+
+    def steps(self):
+        """
+        Returns (name, function) of every warm-up step
+        """
+        steps = []
+
+        for language in self.languages:
+            steps.append(
+                (
+                    f"tokenizer/{language}",
+                    lambda language=language: get_tokenizer(language).tokenize(
+                        "warm up"
+                    ),
+                )
+            )
+
+            if language in NORMALIZER_SUPPORTED_LANGUAGES:
+                steps.append(
+                    (
+                        f"normalizer/{language}",
+                        lambda language=language: get_normalizer(language).normalize(
+                            "warm up"
+                        ),
+                    )
+                )
+
+            if language in LANGUAGES:
+                steps.append(
+                    (
+                        f"profanity/{language}",
+                        lambda language=language: LANGUAGES[
+                            language
+                        ].profanity_matcher.mask("warm up"),
+                    )
+                )
+
+        if self.load_models:
+            steps.append(("models/language_id", self._load_language_id))
+
+        return steps
+
+    def run(self):
+        start_time = time.perf_counter()
+
+        for name, fn in self.steps():
+            step_start_time = time.perf_counter()
+
+            try:
+                fn()
+            except Exception as e:
+                self.errors[name] = repr(e)
+                self.logger.error(f"Warm-up step {name} failed", exc_info=True)
+
+            self.timings[name] = time.perf_counter() - step_start_time
+            WARMUP_SECONDS.labels(name).set(self.timings[name])
+
+            # Let requests (e.g. to /ready) through between steps
+            gevent.sleep(0)
+
+        self.timings["total"] = time.perf_counter() - start_time
+        self.ready = True
+        self.logger.info(f"Warm-up finished in {self.timings['total']:.2f}s")
+
+    def _load_language_id(self):
+        # Imports torch, torchaudio and speechbrain, loads the model every session's
+        # LanguageDetector shares, and caches the VAD model
+        import torch
+
+        from .asr.language_id.config import LanguageIdConfig
+        from .asr.language_id.language_id import get_model
+
+        get_model(LanguageIdConfig().model_path)
+        torch.hub.load(
+            repo_or_dir="snakers4/silero-vad", model="silero_vad", force_reload=False
+        )
+
+    def to_dict(self):
+        return {
+            "ready": self.ready,
+            "languages": self.languages,
+            "timings": self.timings,
+            "errors": self.errors,
+        }
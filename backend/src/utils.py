@@ -1,4 +1,6 @@
 import collections.abc
+import dataclasses
+import importlib
 import json
 from pathlib import Path
 import re
@@ -22,6 +24,40 @@ def deep_update(d, u):
     return d
 
 
+def import_class(module_name, class_name, package=None):
+    """
+    Imports a class when it's first needed rather than at startup, e.g. a service
+    provider that pulls in heavy dependencies like torch or google.cloud
+    """
+    return getattr(importlib.import_module(module_name, package), class_name)
+
+
+def slotted_dataclass(cls=None, **kwargs):
+    """
+    Same as @dataclass(slots=True), which needs Python 3.10: instances store
+    their fields in __slots__ instead of a __dict__, so they're smaller and
+    quicker to create, and can't be given attributes that aren't fields
+    """
+
+    def wrap(cls):
+        cls = dataclasses.dataclass(cls, **kwargs)
+        field_names = tuple(f.name for f in dataclasses.fields(cls))
+        cls_dict = dict(cls.__dict__)
+
+        # Defaults are already in the generated __init__, and class attributes
+        # can't share a name with slots
+        for name in field_names + ("__dict__", "__weakref__"):
+            cls_dict.pop(name, None)
+        cls_dict["__slots__"] = field_names
+
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted_cls.__qualname__ = cls.__qualname__
+
+        return slotted_cls
+
+    return wrap if cls is None else wrap(cls)
+
+
 def start_thread(target, *args, **kwargs):
     """
     Starts a thread running the function target
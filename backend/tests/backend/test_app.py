@@ -95,6 +95,7 @@ def test_join(clients):
             "caption_language": "es",
             "user_id": "user1",
             "is_audience": False,
+            "caption_layout": None,
         }
     ]
 
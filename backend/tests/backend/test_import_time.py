@@ -0,0 +1,47 @@
+# Guards the backend's startup time against eagerly imported heavy dependencies
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parents[2] / "src"
+
+# Only imported once a room uses the provider or model that needs them
+LAZY_MODULES = ("torch", "speechbrain", "TTS", "google.cloud", "jieba")
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", 3))
+
+
+def import_times(module):
+    """
+    Returns module name -> cumulative import time in seconds, from python -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import monkey_patch, {module}"],
+        cwd=SRC_DIR,
+        env={**os.environ, "PYTHONPATH": str(SRC_DIR)},
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1e6
+
+    return times
+
+
+def test_app_import_time():
+    times = import_times("app")
+
+    eager = [
+        m
+        for m in times
+        if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    ]
+    assert not eager, f"Imported at startup: {eager}"
+    assert times["app"] < IMPORT_TIME_BUDGET_SECONDS
@@ -0,0 +1,63 @@
+import random
+import re
+
+import pytest
+
+from languages import languages
+from languages.profanity import AhoCorasickProfanityMatcher
+
+
+def remove_profanity_word_by_word(text, language):
+    lang = languages[language]
+
+    for word in lang.profane_words:
+        if lang.has_spaces:
+            text = re.sub(
+                rf"\b{word}\b",
+                lambda word: word[0][0] + "*" * (len(word[0]) - 1),
+                text,
+                flags=re.IGNORECASE,
+            )
+        else:
+            text = text.replace(word, "*" * len(word))
+    return text
+
+
+@pytest.mark.parametrize("language", ["en-US", "es-ES", "pt-BR", "zh"])
+def test_matcher_masks_like_the_word_by_word_loop(language):
+    lang = languages[language]
+    separator = " " if lang.has_spaces else ""
+    rng = random.Random(0)
+    vocabulary = [
+        "the",
+        "meeting",
+        "is",
+        "fine",
+        "Shit!",
+        "shitty",
+        "fucking",
+        "ſhit",
+        "ok,",
+        "是",
+        "个",
+        "我们",
+    ] + [w for w in lang.profane_words if not re.search(r"[.*?]", w)]
+
+    for _ in range(300):
+        words = rng.choices(vocabulary, k=rng.randint(0, 20))
+        if words and rng.random() < 0.3:
+            words[0] = words[0].upper()
+        text = separator.join(words)
+
+        assert lang.profanity_matcher.mask(text) == remove_profanity_word_by_word(
+            text, language
+        )
+
+
+def test_overlapping_words_are_masked_in_list_order():
+    matcher = AhoCorasickProfanityMatcher(["bc", "abcd", "cd"])
+
+    assert matcher.find("xabcdx") == {0, 1, 2}
+    # "bc" is masked first, which breaks both "abcd" and "cd"
+    assert matcher.mask("xabcdx") == "xa**dx"
+    assert matcher.mask("cd abc") == "** a**"
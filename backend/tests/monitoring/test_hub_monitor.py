@@ -0,0 +1,77 @@
+import time
+
+import gevent
+from monitoring import HubMonitor, pipeline_stage
+from monitoring.hub import GreenletCounter, current_stage
+
+
+def busy_wait(seconds):
+    """Hold the hub without yielding (time.sleep is monkey patched)"""
+    end_time = time.perf_counter() + seconds
+
+    while time.perf_counter() < end_time:
+        pass
+
+
+def test_pipeline_stage_nesting():
+    assert current_stage() == "other"
+
+    with pipeline_stage("translation_callback"):
+        assert current_stage() == "translation_callback"
+
+        with pipeline_stage("captioning"):
+            assert current_stage() == "captioning"
+
+        assert current_stage() == "translation_callback"
+
+    assert current_stage() == "other"
+
+
+def test_blocking_greenlet_is_reported():
+    monitor = HubMonitor(max_blocking_time=0.05, lag_sample_interval=0.01)
+    monitor.start()
+
+    def block():
+        with pipeline_stage("captioning"):
+            busy_wait(0.3)
+
+    gevent.spawn(block).join()
+    gevent.sleep(0.05)
+    monitor.stop()
+
+    reports = [r for r in monitor.reports if r["stage"] == "captioning"]
+    assert len(reports) == 1
+    assert reports[0]["run_time"] >= 0.3
+    assert "busy_wait" in reports[0]["stack"]
+    assert monitor.run_time["captioning"].max >= 0.3
+
+    # The lag sampler was due while the hub was blocked
+    assert monitor.loop_lag.max >= 0.2
+
+
+def test_stopped_monitor_leaves_no_trace():
+    monitor_thread = gevent.config.monitor_thread
+    monitor = HubMonitor(max_blocking_time=0.05, lag_sample_interval=0.01)
+    monitor.start()
+    monitor.stop()
+    gevent.sleep(0.05)
+
+    gevent.spawn(busy_wait, 0.2).join()
+
+    assert gevent.config.monitor_thread == monitor_thread
+    assert not monitor.reports
+    assert not monitor._blocked_stacks
+
+
+def test_greenlet_counter():
+    counter = GreenletCounter()
+    counter.install()
+    gevent.sleep(0)
+    before = counter.count()
+
+    sleeping = [gevent.spawn(gevent.sleep, 0.05) for _ in range(10)]
+    gevent.sleep(0.01)
+    assert counter.count() == before + 10
+
+    gevent.joinall(sleeping)
+    assert counter.count() == before
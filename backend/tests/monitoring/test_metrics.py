@@ -0,0 +1,66 @@
+import json
+
+from app import SpeechTranslationServer
+from monitoring import Registry
+from monitoring.emits import SOCKET_EMIT_BYTES
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("provider",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    sessions = registry.gauge("sessions", "Sessions")
+
+    requests.labels("didi").inc()
+    requests.labels("didi").inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    sessions.set_function(lambda: 4)
+
+    assert registry.counter("requests_total", "Requests", ("provider",)) is requests
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{provider="didi"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+        "# HELP sessions Sessions",
+        "# TYPE sessions gauge",
+        "sessions 4",
+    ]
+
+
+def test_metrics_endpoint():
+    server = SpeechTranslationServer(None)
+    server.app.testing = True
+    server.socketio.emit("rooms", {"rooms": []}, room="admin")
+
+    metrics = server.app.test_client().get("metrics").get_data(as_text=True)
+
+    assert "meetdot_rooms 0" in metrics
+    assert 'meetdot_socket_emits_total{event="rooms"}' in metrics
+    assert 'meetdot_socket_emit_bytes_total{event="rooms"}' in metrics
+    assert "# TYPE meetdot_mt_seconds histogram" in metrics
+
+
+def test_emitted_bytes_are_counted_per_recipient():
+    server = SpeechTranslationServer(None)
+    manager = server.socketio.server.manager
+
+    for sid in ("viewer 1", "viewer 2"):
+        manager.connect(sid, "/")
+        manager.enter_room(sid, "/", "viewers")
+
+    emitted_bytes = SOCKET_EMIT_BYTES.labels("caption")
+    before = emitted_bytes.value
+    server.socketio.emit("caption", {"text": "你好"}, room="viewers")
+
+    # The packet python-socketio encoded for each viewer
+    packet = "2" + json.dumps(["caption", {"text": "你好"}], separators=(",", ":"))
+    assert emitted_bytes.value - before == 2 * len(packet)
@@ -0,0 +1,49 @@
+from monitoring import Tracer
+from services.captioning import CaptioningConfig, CaptioningRequest, CaptioningService
+
+
+def test_traces_are_sampled_into_ring():
+    assert Tracer(sample_rate=0).start_trace("session", 1, True) is None
+
+    tracer = Tracer(sample_rate=1, max_traces=2)
+
+    for message_id in range(3):
+        tracer.on_audio("session")
+        trace = tracer.start_trace("session", message_id, is_final=False)
+        trace.mark("asr")
+        trace.mark("translation", "zh")
+
+    assert tracer.get("session", 0) is None
+    assert [t["message_id"] for t in tracer.to_list()] == [1, 2]
+    assert [m["stage"] for m in tracer.to_list()[0]["marks"]] == ["asr", "translation"]
+
+    summary = tracer.summary()
+    assert list(summary["stages"]) == ["asr", "translation"]
+    assert summary["stages"]["asr"]["count"] == 3
+
+
+def test_captioning_marks_trace():
+    tracer = Tracer(sample_rate=1)
+    trace = tracer.start_trace("session", 1, is_final=True)
+    captions = []
+    service = CaptioningService(
+        CaptioningConfig(),
+        logger=None,
+        callback_fn=lambda service_request, service_response: captions.append(
+            service_request
+        ),
+    )
+
+    service(
+        CaptioningRequest(
+            session_id="session",
+            message_id=1,
+            language="en-US",
+            utterance="Hello world",
+            utterance_complete=True,
+            trace=trace,
+        )
+    )
+
+    assert captions[0].trace is trace
+    assert trace.marks[0][:2] == ("captioning", "en-US")
@@ -0,0 +1,22 @@
+from services.captioning import CaptioningResponse
+from services.captioning.linewise_scroll import LinewiseScrollStrategy
+
+
+def test_merged_highlights_start_at_the_earliest_change():
+    # "January February / March" -> "January February / March April" -> ...
+    older = CaptioningResponse(["January February", "March April"], 0, [-1, 5])
+    newer = CaptioningResponse(
+        ["January February", "March April", "May"], 0, [-1, -1, 0]
+    )
+
+    merged = LinewiseScrollStrategy.merge_highlights(older, newer)
+
+    assert merged.highlight_boundaries == [-1, 5, 0]
+    # Listeners share the newer response, so it's left as it was
+    assert newer.highlight_boundaries == [-1, -1, 0]
+
+    # Scrolled past the older change
+    scrolled = CaptioningResponse(["March April", "May June"], 1, [-1, 3])
+    assert LinewiseScrollStrategy.merge_highlights(
+        older, scrolled
+    ).highlight_boundaries == [5, 0]
@@ -0,0 +1,60 @@
+import random
+import textwrap
+
+import cjkwrap
+import pytest
+from services.captioning.incremental_wrap import IncrementalWrapper, is_restart_point
+from services.captioning.pswrap import cjk_wrap, pswrap
+
+vocabulary = {
+    "en-US": ["the", "quick", "fox,", "supercalifragilistic", "well-known", "--", "!"],
+    "zh": ["我", "觉得", "，", "。", "OK", "“", " ", "一二三四五六七八九十", "x-y"],
+}
+
+
+@pytest.mark.parametrize("language", ["en-US", "zh"])
+@pytest.mark.parametrize(
+    "wrap_fn", [textwrap.wrap, cjkwrap.wrap, cjk_wrap, pswrap], ids=lambda f: f.__name__
+)
+def test_incremental_wrap_matches_wrap(language, wrap_fn):
+    rng = random.Random(0)
+    separator = "" if language == "zh" else " "
+
+    for _ in range(20):
+        width = rng.randint(4, 20)
+        wrapper = IncrementalWrapper(wrap_fn, width)
+        text, wrapped = "", None
+
+        for _ in range(30):
+            words = separator.join(rng.choices(vocabulary[language], k=3))
+            if rng.random() < 0.7:
+                # The partial grows
+                text = text + separator + words
+            else:
+                # The partial changes at the end
+                text = text[: rng.randint(0, len(text))] + words
+            text = text.strip()
+
+            lines, wrapped = wrapper.wrap(text, wrapped)
+            assert lines == wrap_fn(text, width)
+
+
+def test_cjk_wrap_matches_cjkwrap():
+    rng = random.Random(0)
+
+    for _ in range(500):
+        text = "".join(rng.choices("我们一二，。“”…｡– abc-d", k=rng.randint(0, 60)))
+        width = rng.randint(2, 30)
+
+        assert cjk_wrap(text, width) == cjkwrap.wrap(text, width)
+
+
+def test_restart_points():
+    text = "the well-known supercalifragilistic"
+
+    assert is_restart_point(text, 0)
+    assert is_restart_point(text, 4)
+    # In the middle of a hyphenated word
+    assert not is_restart_point(text, 6)
+    assert not is_restart_point(text, 11)
+    assert is_restart_point(text, 20)
@@ -0,0 +1,45 @@
+import random
+import unicodedata
+from collections import Counter
+from string import punctuation
+
+from services.captioning.pswrap import cjkslices, get_ps_len, pswrap
+from zhon import hanzi
+
+
+def get_ps_len_by_counting(text):
+    counts = Counter(text)
+    punctuation_len = sum(
+        counts.get(p, 0) if p in punctuation else 2 * counts.get(p, 0)
+        for p in punctuation + hanzi.punctuation
+    )
+    cjk_len = sum(
+        2 if unicodedata.east_asian_width(c) in ("F", "W") else 1 for c in text
+    )
+    return cjk_len - punctuation_len
+
+
+def cjkslices_by_counting(text, index):
+    if get_ps_len_by_counting(text) <= index:
+        return text, ""
+    i = 1
+    while get_ps_len_by_counting(text[:i]) <= index:
+        i = i + 1
+    return text[: i - 1], text[i - 1 :]
+
+
+def test_widths_match_counting():
+    rng = random.Random(0)
+    characters = "ab ,.!我们一二，。“”…｡–" + "".join(hanzi.punctuation[:10])
+
+    for _ in range(500):
+        text = "".join(rng.choices(characters, k=rng.randint(0, 30)))
+        index = rng.randint(0, 30)
+
+        assert get_ps_len(text) == get_ps_len_by_counting(text)
+        assert cjkslices(text, index) == cjkslices_by_counting(text, index)
+
+
+def test_pswrap_long_words():
+    assert pswrap("一二三，，，四五六七八九十", 6) == ["一二三，，，", "四五六", "七八九", "十"]
+    assert pswrap("abcdefgh,,,,ijk", 4) == ["abcd", "efgh,,,,", "ijk"]
@@ -0,0 +1,108 @@
+import gevent
+from services.captioning import CaptioningRequest, CaptioningResponse
+from services.captioning.scheduler import CaptionScheduler
+
+
+def request(session_id, utterance, language="en-US"):
+    return CaptioningRequest(
+        session_id=session_id,
+        message_id=0,
+        language=language,
+        utterance=utterance,
+        utterance_complete=False,
+    )
+
+
+def response(text, highlight_boundaries=None):
+    return CaptioningResponse(
+        lines=[text], line_index=0, highlight_boundaries=highlight_boundaries
+    )
+
+
+def test_updates_are_coalesced_per_frame():
+    emitted = []
+    scheduler = CaptionScheduler(
+        lambda service_request, service_response: emitted.append(
+            (service_request.session_id, service_response.lines[0])
+        ),
+        frame_interval=0.05,
+    )
+
+    for i in range(5):
+        scheduler(request("a", str(i)), response(str(i)))
+    scheduler(request("b", "x"), response("x"))
+
+    # The first update of each session is emitted right away
+    assert emitted == [("a", "0"), ("b", "x")]
+
+    gevent.sleep(0.1)
+
+    # Then only the newest update of the frame
+    assert emitted == [("a", "0"), ("b", "x"), ("a", "4")]
+    assert scheduler.worker is None
+
+
+def test_delayed_updates_share_the_timer_queue():
+    emitted = []
+    scheduler = CaptionScheduler(
+        lambda service_request, service_response: emitted.append(
+            service_response.lines[0]
+        ),
+        frame_interval=0,
+    )
+
+    scheduler(request("a", "later"), response("later"), delay_time=0.06)
+    scheduler(request("a", "sooner"), response("sooner"), delay_time=0.03)
+    scheduler(request("a", "now"), response("now"))
+
+    assert emitted == ["now"]
+    assert len(scheduler.timers) == 2
+
+    gevent.sleep(0.1)
+
+    assert emitted == ["now", "sooner", "later"]
+
+
+def test_coalesced_updates_are_highlighted_since_the_last_emit():
+    emitted = []
+    scheduler = CaptionScheduler(
+        lambda service_request, service_response: emitted.append(service_response),
+        frame_interval=0.05,
+    )
+
+    scheduler(request("a", "Hello"), response("Hello", [0]))
+    scheduler(request("a", "Hello big"), response("Hello big", [5]))
+    scheduler(request("a", "Hello big world"), response("Hello big world", [9]))
+    scheduler.end_session("a")
+
+    assert [r.lines[0] for r in emitted] == ["Hello", "Hello big world"]
+    assert emitted[1].highlight_boundaries == [5]
+    assert scheduler.pending == {} and scheduler.emitted == {}
+
+
+def test_failed_emits_dont_stop_the_other_frames():
+    emitted = []
+
+    def emit(service_request, service_response):
+        if service_response.lines[0] == "fails":
+            raise ConnectionError
+
+        emitted.append(service_response.lines[0])
+
+    scheduler = CaptionScheduler(emit, frame_interval=0.05)
+
+    for session_id in ("a", "b"):
+        scheduler(request(session_id, "first"), response("first"))
+    scheduler(request("a", "fails"), response("fails"))
+    scheduler(request("b", "second"), response("second"))
+    gevent.sleep(0.2)
+
+    assert emitted == ["first", "first", "second"]
+
+    # The failed key is scheduled as usual afterwards
+    scheduler(request("a", "third"), response("third"))
+    scheduler(request("a", "fourth"), response("fourth"))
+    gevent.sleep(0.1)
+
+    assert emitted == ["first", "first", "second", "third", "fourth"]
+    assert scheduler.worker is None
@@ -1,6 +1,11 @@
+import random
+
+import cjkwrap
 import pytest
 from services.captioning import CaptioningConfig, CaptioningRequest
 from services.captioning.linewise_scroll import LinewiseScrollStrategy
+from services.captioning.pswrap import pswrap
+from services.captioning.utils import combine_utterances
 
 test_data = [
     # Empty test
@@ -190,7 +195,7 @@ def test_highlight(
     )
     session_id = "session"
     strategy = LinewiseScrollStrategy(config)
-    strategy.prev_lines[("session", language)] = prev_lines
+    strategy.get_state("session", language).prev_lines = prev_lines
     request = CaptioningRequest(
         session_id=session_id,
         message_id=0,
@@ -211,8 +216,8 @@ def test_multiple_speakers():
             characters_per_line=20,
         )
     )
-    strategy.prev_lines[("speaker1", "en-US")] = ["Hello"]
-    strategy.prev_lines[("speaker2", "es-ES")] = ["Hola"]
+    strategy.get_state("speaker1", "en-US").prev_lines = ["Hello"]
+    strategy.get_state("speaker2", "es-ES").prev_lines = ["Hola"]
 
     request = CaptioningRequest(
         session_id="speaker1",
@@ -273,3 +278,55 @@ def test_sequence_requests():
         output, output_delay = strategy(request)
         boundary = output.highlight_boundaries
         assert boundary == item[3]
+
+
+@pytest.mark.parametrize("language", ["en-US", "zh"])
+@pytest.mark.parametrize("punctuation_sensitive", [False, True])
+def test_linewise_scroll_long_meeting(language, punctuation_sensitive):
+    """
+    Captions wrap only the tail of the meeting, but show the same lines as
+    wrapping all of it
+    """
+    rng = random.Random(0)
+    vocabulary = {
+        "en-US": ["the", "quick", "fox,", "well-known", "", "supercalifragilistic"],
+        "zh": ["我", "觉得", "，", "。", "OK", "“", " ", "一二三四五六七八九十"],
+    }[language]
+    separator = "" if language == "zh" else " "
+    config = CaptioningConfig(
+        strategy="linewise_scroll",
+        num_lines=2,
+        characters_per_line=12,
+        punctuation_sensitive=punctuation_sensitive,
+    )
+    strategy = LinewiseScrollStrategy(config)
+    text_wrapper = pswrap if punctuation_sensitive else cjkwrap.wrap
+    completed_utterances = []
+
+    for _ in range(200):
+        utterance = separator.join(rng.choices(vocabulary, k=rng.randint(0, 8)))
+        utterance_complete = rng.random() < 0.3
+        lines = text_wrapper(
+            combine_utterances(
+                language, completed_utterances, utterance, utterance_complete
+            ),
+            config.characters_per_line,
+        )
+        if utterance_complete:
+            completed_utterances.append(utterance)
+
+        output, _ = strategy(
+            CaptioningRequest(
+                session_id="test",
+                message_id=0,
+                language=language,
+                utterance=utterance,
+                utterance_complete=utterance_complete,
+            )
+        )
+        assert output.lines == lines[-config.num_lines :]
+        assert output.line_index == max(0, len(lines) - config.num_lines)
+
+    completed = strategy.get_state("test", language).completed
+    assert len(completed.lines) <= config.num_lines
+    assert len(completed.text) < 100
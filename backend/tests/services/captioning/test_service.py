@@ -0,0 +1,110 @@
+import gc
+import tracemalloc
+
+import gevent
+import pytest
+from services.captioning import (
+    CaptioningConfig,
+    CaptioningRequest,
+    CaptioningService,
+    CaptionLayout,
+)
+from services.captioning.service import CAPTION_STRATEGIES
+from services.tokenizer import clear_incremental_tokenizations
+
+UTTERANCE = "So I think the meeting we had yesterday was productive for everyone"
+
+
+def request(language, utterance_complete=False, session_id="session"):
+    return CaptioningRequest(
+        session_id=session_id,
+        message_id=0,
+        language=language,
+        utterance=UTTERANCE,
+        utterance_complete=utterance_complete,
+    )
+
+
+def test_captions_are_computed_once_per_layout():
+    captions = []
+    service = CaptioningService(
+        CaptioningConfig(num_lines=3, characters_per_line=60),
+        logger=None,
+        callback_fn=lambda service_request, service_response: captions.append(
+            (service_request.language, service_response)
+        ),
+    )
+    phone = CaptionLayout(num_lines=2, characters_per_line=20)
+
+    # Two layouts for English viewers, however many viewers use them
+    service.set_layouts(
+        {"en-US": [service.default_layout, phone, phone], "es-ES": [phone]}
+    )
+    service(request("en-US"))
+
+    assert sorted(response.layout for _, response in captions) == [
+        phone,
+        service.default_layout,
+    ]
+
+    for _, response in captions:
+        assert len(response.lines) <= response.layout.num_lines
+        assert all(
+            len(line) <= response.layout.characters_per_line for line in response.lines
+        )
+
+    # Languages without readers of other layouts use the room's
+    captions.clear()
+    service(request("zh"))
+
+    assert [response.layout for _, response in captions] == [service.default_layout]
+
+    # Strategies of layouts no longer in use are dropped, along with their state
+    service.set_layouts({"en-US": [service.default_layout]})
+
+    assert list(service.strategies) == [service.default_layout]
+
+    service.end_session("session")
+
+
+@pytest.mark.parametrize("strategy", list(CAPTION_STRATEGIES))
+def test_sessions_leave_no_caption_state(strategy):
+    service = CaptioningService(
+        CaptioningConfig(strategy=strategy),
+        logger=None,
+        callback_fn=lambda service_request, service_response: None,
+    )
+
+    def join_and_leave(session_id):
+        for language in ["en-US", "es-ES"]:
+            for utterance_complete in [False, True, False, True]:
+                service(request(language, utterance_complete, session_id))
+
+        # As SpeechTranslationService.stop_listening does
+        service.end_session(session_id)
+        clear_incremental_tokenizations(session_id)
+
+    for i in range(20):
+        join_and_leave(f"warm-up {i}")
+    gevent.sleep(0.1)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        memory_before = tracemalloc.get_traced_memory()[0]
+
+        for i in range(500):
+            join_and_leave(f"session {i}")
+        # Let the scheduler's frames end
+        gevent.sleep(0.1)
+        gc.collect()
+
+        memory_growth = tracemalloc.get_traced_memory()[0] - memory_before
+    finally:
+        tracemalloc.stop()
+
+    assert all(not strategy.states for strategy in service.strategies.values())
+    assert not service.scheduler.pending and not service.scheduler.emitted
+    assert not service.scheduler.timers
+    # Far less than the captions of 500 sessions
+    assert memory_growth < 50_000
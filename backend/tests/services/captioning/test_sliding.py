@@ -1,6 +1,14 @@
+import random
+import textwrap
+
+import cjkwrap
 import pytest
 from services.captioning import CaptioningConfig, CaptioningRequest
-from services.captioning.word_level_sliding import WordLevelSlidingStrategy
+from services.captioning.word_level_sliding import (
+    TAIL_CAPTIONS,
+    WordLevelSlidingStrategy,
+)
+from services.tokenizer import get_tokenizer
 
 test_data = [
     # Empty test
@@ -66,3 +74,73 @@ def test_linewise_scroll(num_lines, s, language, chars_per_line, expected):
     output, output_delay = strategy(request)
     assert output.lines == expected
     assert output_delay == 0.0
+
+
+def slide_word_by_word(text, language, num_lines, chars_per_line):
+    tokenizer = get_tokenizer(language)
+    text_wrapper = cjkwrap if language == "zh" else textwrap
+    window = []
+
+    for token in reversed(tokenizer.tokenize(text)):
+        substr = tokenizer.detokenize([token] + window[::-1])
+
+        if len(text_wrapper.wrap(substr, chars_per_line)) > num_lines:
+            break
+        window.append(token)
+
+    return text_wrapper.wrap(tokenizer.detokenize(window[::-1]), chars_per_line)
+
+
+@pytest.mark.parametrize("language", ["en-US", "es-ES", "zh"])
+def test_sliding_matches_word_by_word(language):
+    rng = random.Random(0)
+    vocabulary = {
+        "en-US": ["the", "quick", "fox", "jumped,", "don't", '"quoted"', "1,000", "?"],
+        "es-ES": ["la", "ciudad", "¿qué?", "Ángeles", "3.772,45", '"', "km²"],
+        "zh": ["我", "觉得", "昨天的", "会议", "，", "。", "OK", "“", "”", "洛杉矶"],
+    }[language]
+    separator = "" if language == "zh" else " "
+
+    for i in range(200):
+        text = separator.join(rng.choices(vocabulary, k=rng.randint(0, 40)))
+        num_lines, chars_per_line = rng.randint(1, 3), rng.randint(4, 40)
+        strategy = WordLevelSlidingStrategy(
+            CaptioningConfig(
+                strategy="wordwise_sliding_window",
+                num_lines=num_lines,
+                characters_per_line=chars_per_line,
+            )
+        )
+        request = CaptioningRequest(
+            session_id=f"test_{i}",
+            message_id=0,
+            language=language,
+            utterance=text,
+            utterance_complete=False,
+        )
+
+        assert strategy(request)[0].lines == slide_word_by_word(
+            text, language, num_lines, chars_per_line
+        )
+
+
+def test_completed_utterances_without_boundaries_are_trimmed():
+    config = CaptioningConfig(
+        strategy="wordwise_sliding_window", num_lines=2, characters_per_line=10
+    )
+    strategy = WordLevelSlidingStrategy(config)
+
+    for i in range(100):
+        # No "。" is appended after ".", so there's nowhere the text tokenizes
+        # separately
+        request = CaptioningRequest(
+            session_id="test",
+            message_id=i,
+            language="zh",
+            utterance="我觉得昨天的会议很好.",
+            utterance_complete=True,
+        )
+        strategy(request)
+
+    completed = strategy.get_state("test", "zh").completed
+    assert len(completed.text) <= 2 * TAIL_CAPTIONS * 2 * 10
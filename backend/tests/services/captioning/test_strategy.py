@@ -44,3 +44,18 @@ def test_combine_utterances(languages, utterances, utterance_completes, expected
             last_utterance_complete=utterance_completes[i],
         )
         assert text == expecteds[i]
+
+
+def test_idle_caption_state_is_evicted():
+    strategy = CaptionStrategy(CaptioningConfig())
+    strategy.idle_timeout = 60
+
+    strategy.get_state("speaker", "en-US")
+    strategy.get_state("speaker", "zh").last_used -= 120
+    strategy.evict_idle_states()
+
+    assert list(strategy.states) == [("speaker", "en-US")]
+
+    strategy.end_session("speaker")
+
+    assert strategy.states == {}
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+import gevent
+import pytest
+from gevent import pywsgi
+from services.post_translation import (
+    PostTranslationConfig,
+    PostTranslationRequest,
+    PostTranslationService,
+)
+from services.post_translation.punctuation_client import get_client
+
+
+class FakePunctuationServer:
+    """Capitalizes texts and adds a period, and records the requests it received"""
+
+    def __init__(self):
+        self.requests = []
+        self.num_missing_texts = 0  # texts to leave out of batch responses
+        self.server = pywsgi.WSGIServer(("127.0.0.1", 0), self.app, log=None)
+        self.server.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def app(self, environ, start_response):
+        payload = json.loads(environ["wsgi.input"].read())
+        self.requests.append((environ["PATH_INFO"], payload))
+        start_response("200 OK", [("Content-Type", "application/json")])
+
+        if environ["PATH_INFO"] == "/punctuate_and_capitalize_batch":
+            texts = [r["text"].capitalize() + "." for r in payload["requests"]]
+            response = {"texts": texts[: len(texts) - self.num_missing_texts]}
+        else:
+            response = {"text": payload["text"].capitalize() + "."}
+
+        return [json.dumps(response).encode()]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakePunctuationServer()
+    monkeypatch.setenv("PUNCTUATION_SERVER_URL", server.url)
+
+    yield server
+
+    server.server.stop()
+
+
+def test_finals_are_punctuated_asynchronously_in_batches(server):
+    punctuated = []
+    service = PostTranslationService(
+        PostTranslationConfig(mask_k=0),
+        mock.Mock(),
+        callback_fn=lambda request, response: punctuated.append(response.translation),
+    )
+
+    responses = [
+        service(
+            PostTranslationRequest(
+                session_id=session_id,
+                message_id=0,
+                translation="hello there",
+                is_final=True,
+                original_language="en-US",
+                language="en-US",
+            )
+        )
+        for session_id in ("alice", "bob")
+    ]
+
+    # Returned unpunctuated right away
+    assert [r.translation for r in responses] == ["hello there"] * 2
+    assert all(r.punctuation_pending for r in responses)
+
+    gevent.sleep(0.2)
+    assert punctuated == ["Hello there."] * 2
+
+    # Both finals were sent in one request
+    batches = [r for path, r in server.requests if path.endswith("_batch")]
+    assert len(batches) == 1
+    assert len(batches[0]["requests"]) == 2
+
+
+def test_texts_missing_from_the_response_stay_unpunctuated(server):
+    server.num_missing_texts = 1
+    client = get_client(server.url, timeout=1.0)
+    punctuated = []
+
+    for text in ("hello there", "good morning"):
+        client.submit(text, "en-US", punctuated.append)
+    gevent.sleep(0.2)
+
+    assert punctuated == ["Hello there.", "good morning"]
+
+
+def test_failed_callbacks_dont_skip_the_rest_of_the_batch(server):
+    client = get_client(server.url, timeout=1.0)
+    punctuated = []
+
+    client.submit("hello there", "en-US", mock.Mock(side_effect=ValueError))
+    client.submit("good morning", "en-US", punctuated.append)
+    gevent.sleep(0.2)
+
+    assert punctuated == ["Good morning."]
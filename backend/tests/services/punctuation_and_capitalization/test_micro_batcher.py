@@ -0,0 +1,41 @@
+import gevent
+
+from services.punctuation_and_capitalization.micro_batcher import MicroBatcher
+
+
+def test_concurrent_requests_are_batched():
+    calls = []
+
+    def fn(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait=0.05)
+    greenlets = [gevent.spawn(batcher, [f"text {i}"]) for i in range(3)]
+    greenlets.append(gevent.spawn(batcher, ["text 3", "text 4"]))
+    gevent.joinall(greenlets)
+
+    # Results are fanned back out to each request, in order
+    assert [g.value for g in greenlets] == [
+        ["TEXT 0"],
+        ["TEXT 1"],
+        ["TEXT 2"],
+        ["TEXT 3", "TEXT 4"],
+    ]
+    # The first batch is full at 5 texts, no request is split across batches
+    assert calls == [["text 0", "text 1", "text 2", "text 3", "text 4"]]
+    assert (batcher.num_batches, batcher.num_texts) == (1, 5)
+
+
+def test_errors_are_raised_in_every_request_of_the_batch():
+    def fn(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(fn, max_batch_size=4, max_wait=0.05)
+    greenlets = [gevent.spawn(batcher, [f"text {i}"]) for i in range(2)]
+    gevent.joinall(greenlets)
+
+    assert all(isinstance(g.exception, RuntimeError) for g in greenlets)
+    # The worker keeps serving requests
+    batcher.fn = lambda texts: texts
+    assert batcher(["text"]) == ["text"]
@@ -0,0 +1,119 @@
+import gevent
+import pytest
+from gevent.event import Event
+from services.speech_translation.event_bus import EventBus
+
+
+def test_slow_listeners_only_delay_themselves():
+    bus = EventBus(gevent.spawn)
+    fast_events, slow_events = [], []
+
+    def slow_listener(request, response):
+        gevent.sleep(0.05)
+        slow_events.append(request)
+
+    bus.subscribe("captioning", slow_listener)
+    bus.subscribe("captioning", lambda request, response: fast_events.append(request))
+
+    for i in range(3):
+        bus.publish("captioning", i, None)
+    gevent.sleep(0.01)
+
+    assert fast_events == [0, 1, 2]
+    assert slow_events == []
+
+    gevent.sleep(0.2)
+
+    assert slow_events == [0, 1, 2]
+    assert not bus.subscriptions["captioning"][0].consumer_running
+
+
+def test_full_queues_drop_superseded_partials_but_not_finals():
+    bus = EventBus(gevent.spawn, max_queue_size=2)
+    unblocked = Event()
+    events = []
+
+    def blocked_listener(request, response):
+        unblocked.wait()
+        events.append(request)
+
+    bus.subscribe("asr", blocked_listener)
+
+    # The listener takes the first event and blocks, then the queue fills up
+    bus.publish("asr", "partial 1", None, is_final=False)
+    gevent.sleep(0)
+
+    for event in ["partial 2", "final 1", "partial 3", "final 2", "final 3"]:
+        bus.publish("asr", event, None, is_final=event.startswith("final"))
+    # Nothing newer supersedes the last partial
+    bus.publish("asr", "partial 4", None, is_final=False)
+
+    unblocked.set()
+    gevent.sleep(0.01)
+
+    assert events == ["partial 1", "final 1", "final 2", "final 3", "partial 4"]
+
+
+def test_full_queues_keep_the_newest_partial_of_each_key():
+    bus = EventBus(gevent.spawn, max_queue_size=2)
+    unblocked = Event()
+    events = []
+
+    def blocked_listener(request, response):
+        unblocked.wait()
+        events.append(request)
+
+    bus.subscribe("captioning", blocked_listener)
+    bus.publish("captioning", "en 1", None, is_final=False, key="en")
+    gevent.sleep(0)
+
+    for event in ["en 2", "zh 1", "es 1", "en 3", "zh 2"]:
+        bus.publish("captioning", event, None, is_final=False, key=event[:2])
+
+    unblocked.set()
+    gevent.sleep(0.01)
+
+    assert events == ["en 1", "es 1", "en 3", "zh 2"]
+
+
+def test_synchronous_listeners_are_called_before_publish_returns():
+    bus = EventBus(gevent.spawn)
+    events = []
+
+    def failing_listener(request, response):
+        raise ValueError(request)
+
+    bus.subscribe("translation", lambda request, response: events.append(request), True)
+    bus.publish("translation", "hello", None)
+
+    assert events == ["hello"]
+
+    bus.subscribe("translation", failing_listener, synchronous=True)
+
+    with pytest.raises(ValueError):
+        bus.publish("translation", "world", None)
+
+
+def test_superseding_events_keep_what_the_dropped_ones_changed():
+    bus = EventBus(
+        gevent.spawn,
+        max_queue_size=1,
+        supersede_fns={"captioning": lambda dropped, newer: dropped + newer},
+    )
+    unblocked = Event()
+    responses = []
+
+    def blocked_listener(request, response):
+        unblocked.wait()
+        responses.append(response)
+
+    bus.subscribe("captioning", blocked_listener)
+
+    for response in ["a", "b", "c", "d"]:
+        bus.publish("captioning", None, response, is_final=False, key="en")
+        gevent.sleep(0)
+
+    unblocked.set()
+    gevent.sleep(0.01)
+
+    assert responses == ["a", "bcd"]
@@ -0,0 +1,72 @@
+from services.asr import SpeechRecognitionResponse
+from services.speech_translation.partial_filter import PartialFilter
+
+
+def forwarded(partial_filter, transcripts):
+    return [
+        transcript
+        for transcript in transcripts
+        if partial_filter(
+            SpeechRecognitionResponse(
+                transcript=transcript,
+                relative_time_offset=0,
+                is_final=transcript.endswith("."),
+            )
+        )
+    ]
+
+
+def test_repeated_partials_are_skipped():
+    transcripts = [
+        "",
+        "so",
+        "So ",
+        "so um",
+        "so I think",
+        "so  I think",
+        "so I thing",
+        "so I",
+        "so I.",
+        "so I",
+        "嗯 好的",
+        "好的",
+    ]
+
+    assert forwarded(PartialFilter("en-US", min_growth=0), transcripts) == [
+        "so",
+        "so I think",
+        "so I thing",
+        "so I",
+        "so I.",
+        # Finals start a new utterance
+        "so I",
+        "嗯 好的",
+    ]
+
+
+def test_partials_are_held_back_until_they_grow_enough():
+    transcripts = [
+        "the",
+        "the meet",
+        "the meeting",
+        "the meeting we",
+        "the meeting we had",
+        "the meeting",
+        "the meeting we had yesterday",
+        "the meeting we had yesterday.",
+        "I thin",
+        "I than",
+        "I thank",
+    ]
+
+    assert forwarded(PartialFilter("en-US", min_growth=5), transcripts) == [
+        "the meet",
+        "the meeting we",
+        # Retractions are forwarded however short
+        "the meeting",
+        "the meeting we had yesterday",
+        "the meeting we had yesterday.",
+        "I thin",
+        # Corrections too
+        "I than",
+    ]
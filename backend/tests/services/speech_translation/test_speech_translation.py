@@ -0,0 +1,97 @@
+from unittest import mock
+
+import gevent
+from services.asr import SpeechRecognitionRequest, SpeechRecognitionResponse
+from services.post_translation import PostTranslationResponse
+from services.speech_translation import SpeechTranslationConfig
+from services.speech_translation.partial_filter import PartialFilter
+from services.speech_translation.service import SpeechTranslationService
+from services.speech_translation.session import Session
+from services.translation import TranslationRequest, TranslationResponse
+
+
+def make_service(languages):
+    return SpeechTranslationService(
+        SpeechTranslationConfig(),
+        mock.Mock(),
+        languages=lambda: languages,
+        start_background_task=gevent.spawn,
+    )
+
+
+def add_session(service, session_id):
+    service.sessions[session_id] = Session(
+        session_id=session_id,
+        language="en-US",
+        asr_service=mock.Mock(),
+        recognizer_thread=mock.Mock(),
+        language_id_thread=mock.Mock(),
+        partial_filter=PartialFilter("en-US", min_growth=0),
+    )
+
+
+def test_stopping_completes_finals_waiting_for_punctuation():
+    service = make_service(["en-US"])
+    captions, post_translations = [], []
+    service.add_listener(
+        "captioning",
+        lambda request, response: captions.append((request, response)),
+        synchronous=True,
+    )
+    service.add_listener(
+        "post-translation",
+        lambda request, response: post_translations.append(response.translation),
+        synchronous=True,
+    )
+    add_session(service, "alice")
+    # A final shown as still in progress until it's punctuated
+    service.post_translation_service = mock.Mock(
+        return_value=PostTranslationResponse(
+            translation="good morning everyone", punctuation_pending=True
+        )
+    )
+    service._on_translation(
+        TranslationRequest(
+            session_id="alice",
+            message_id=0,
+            text="good morning everyone",
+            source_language="en-US",
+            target_language="en-US",
+        ),
+        TranslationResponse(translation="good morning everyone"),
+    )
+    assert post_translations == []
+
+    service.stop_listening("alice", wait_for_final=False)
+
+    assert [
+        (request.utterance, request.utterance_complete) for request, _ in captions
+    ] == [("good morning everyone", False), ("good morning everyone", True)]
+    assert captions[-1][1].lines
+    assert post_translations == ["good morning everyone"]
+    assert not service.pending_finals
+
+
+def test_replayed_transcripts_skip_the_partial_filter():
+    service = make_service([])
+    transcripts = []
+    service.add_listener(
+        "asr",
+        lambda request, response: transcripts.append(response.transcript),
+        synchronous=True,
+    )
+    add_session(service, "alice")
+    request = SpeechRecognitionRequest(session_id="alice", chunk=b"")
+
+    def on_transcript(transcript, is_final=False, **kwargs):
+        response = SpeechRecognitionResponse(
+            transcript=transcript, relative_time_offset=0, is_final=is_final
+        )
+        service._on_transcript(request, response, **kwargs)
+
+    on_transcript("so I think")
+    # e.g. when catching up on a newly added language, in the middle of an utterance
+    on_transcript("good morning.", is_final=True, filter_partials=False)
+    on_transcript("so I think")
+
+    assert transcripts == ["so I think", "good morning."]
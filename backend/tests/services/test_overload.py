@@ -0,0 +1,93 @@
+from unittest import mock
+
+import gevent
+
+from services import overload
+from services.overload import OverloadController
+
+
+class FakeManager:
+    def __init__(self, pending_requests=0, num_speakers=1):
+        self.room = mock.Mock()
+        self.overload_level = overload.NORMAL
+        self.speech_translator = mock.Mock()
+        self.speech_translator.mt_service.pending_requests.return_value = (
+            pending_requests
+        )
+        self.speech_translator.sessions = [None] * num_speakers
+
+    def set_overload_level(self, level):
+        self.overload_level = level
+
+
+def test_overload_levels_with_hysteresis():
+    controller = OverloadController(rooms=None, max_loop_lag=0.2, recovery_time=10)
+    manager = FakeManager()
+
+    def update(loop_lag, now):
+        return controller.update("room", manager, loop_lag, queue_depth=0, now=now)
+
+    # Degrade one level per check while overloaded, up to finals only
+    assert [update(0.5, now) for now in range(5)] == [1, 2, 3, 4, 4]
+
+    # Recover one level at a time, once calm for recovery_time
+    assert update(0.0, now=10) == overload.FINALS_ONLY
+    assert update(0.0, now=14) == overload.PAUSE_LANGUAGE_ID
+    assert update(0.0, now=20) == overload.PAUSE_LANGUAGE_ID
+
+    # Lag between half and the full limit isn't calm, and restarts the wait
+    assert update(0.15, now=24) == overload.PAUSE_LANGUAGE_ID
+    assert update(0.0, now=30) == overload.PAUSE_LANGUAGE_ID
+    assert update(0.0, now=34) == overload.AUDIENCE_FINALS_ONLY
+
+    # A backlog of translations also counts as overload
+    assert (
+        controller.update("room", manager, loop_lag=0, queue_depth=11, now=35)
+        == overload.PAUSE_LANGUAGE_ID
+    )
+
+
+def test_loop_lag_degrades_the_heaviest_rooms_first():
+    controller = OverloadController(rooms=None, max_loop_lag=0.2, recovery_time=10)
+    managers = {
+        "lecture": FakeManager(pending_requests=8),
+        "meeting": FakeManager(pending_requests=2, num_speakers=4),
+        "standup": FakeManager(pending_requests=2, num_speakers=2),
+    }
+
+    def levels():
+        return [manager.overload_level for manager in managers.values()]
+
+    controller.check(managers, loop_lag=0.5, now=0)
+    assert levels() == [1, 0, 0]
+
+    # Until the heaviest room can't shed any more load
+    for now in range(1, 4):
+        controller.check(managers, loop_lag=0.5, now=now)
+    assert levels() == [overload.FINALS_ONLY, 0, 0]
+
+    controller.check(managers, loop_lag=0.5, now=4)
+    assert levels() == [overload.FINALS_ONLY, 1, 0]
+
+    # A room's own backlog degrades it regardless
+    managers["standup"] = FakeManager(pending_requests=11)
+    controller.check(managers, loop_lag=0.0, now=5)
+    assert levels() == [overload.FINALS_ONLY, 1, 1]
+
+
+def test_controller_keeps_running_when_a_check_fails():
+    controller = OverloadController({}, interval=0.01)
+    calls = []
+
+    def check(managers, loop_lag):
+        calls.append(loop_lag)
+
+        if len(calls) == 1:
+            raise RuntimeError("room torn down")
+
+    controller.check = check
+    controller.start()
+    gevent.sleep(0.1)
+    controller.stop()
+
+    assert len(calls) > 1
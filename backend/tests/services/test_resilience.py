@@ -0,0 +1,62 @@
+import gevent
+import pytest
+from services.resilience import CircuitBreaker, DependencyError, ResilientEndpoint
+
+
+def test_circuit_breaker_fails_fast_and_resets():
+    endpoint = ResilientEndpoint("test", failure_threshold=2, reset_timeout=0.05)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ConnectionError
+
+    for _ in range(3):
+        with pytest.raises(DependencyError):
+            endpoint(fail)
+
+    # The third call was rejected without calling the endpoint
+    assert len(calls) == 2
+    assert endpoint.breaker.state == CircuitBreaker.OPEN
+
+    gevent.sleep(0.05)
+    assert endpoint(lambda: "ok") == "ok"
+    assert endpoint.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_timeout():
+    endpoint = ResilientEndpoint("test", timeout=0.01)
+
+    with pytest.raises(DependencyError):
+        endpoint(lambda: gevent.sleep(1))
+
+
+def test_hedged_request():
+    endpoint = ResilientEndpoint("test", hedge_min_samples=1)
+    endpoint(lambda: gevent.sleep(0.001))
+    delays = [1, 0]
+
+    def call():
+        gevent.sleep(delays.pop(0))
+
+        return "hedged"
+
+    assert endpoint(call, hedge=True) == "hedged"
+
+
+def test_killed_trial_calls_reopen_the_breaker():
+    endpoint = ResilientEndpoint("test", failure_threshold=1, reset_timeout=0.01)
+
+    with pytest.raises(DependencyError):
+        endpoint(lambda: 1 / 0)
+
+    gevent.sleep(0.01)
+    trial = gevent.spawn(endpoint, lambda: gevent.sleep(1))
+    gevent.sleep(0.01)
+    assert endpoint.breaker.state == CircuitBreaker.HALF_OPEN
+
+    trial.kill()
+    assert endpoint.breaker.state == CircuitBreaker.OPEN
+
+    gevent.sleep(0.01)
+    assert endpoint(lambda: "ok") == "ok"
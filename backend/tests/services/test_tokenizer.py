@@ -1,6 +1,9 @@
+import os
+
 import pytest
 
-from services.tokenizer import get_tokenizer
+from services.tokenizer import Tokenizer, get_tokenizer
+from services.tokenizer_cache import get_cache_dir, load_or_build
 
 tokenizer_test_data = [
     (
@@ -33,3 +36,86 @@ def test_tokenize(s, language, expected):
 def test_detokenize(s, language, expected):
     tokenizer = get_tokenizer(language)
     assert tokenizer.detokenize(expected) == s
+
+
+incremental_test_data = [
+    (
+        "en-US",
+        "Mr. Smith said it's 5,300 dollars, isn't it? I can't say... "
+        + 'the U.S. team\'s "results" are great & so is the plan. ok. e.g. this',
+    ),
+    (
+        "es-ES",
+        "¿Dónde está el Sr. García? Dijo que 3,5 millones... no sé, "
+        + "la reunión de mañana es a las 10:30. ¡Vamos!",
+    ),
+    ("zh", "我们明天在洛杉矶开会，你能来吗？ 我觉得MeetDot的字幕很好。3.5个小时以后再说!"),
+]
+
+
+@pytest.mark.parametrize("language,text", incremental_test_data)
+def test_tokenize_incremental(language, text):
+    tokenizer = get_tokenizer(language)
+    key = ("test_session", "test")
+
+    # Partials that grow one character at a time, and revisions of their ends
+    for end in range(len(text) + 1):
+        for partial in (text[:end], text[: end // 2] + text[end // 2 : end].upper()):
+            assert tokenizer.tokenize_incremental(partial, key) == tokenizer.tokenize(
+                partial
+            )
+
+    assert key in tokenizer.incremental
+    tokenizer.end_session("test_session")
+    assert key not in tokenizer.incremental
+
+
+def test_tokenizer_cache():
+    tokenizer = Tokenizer("en-US", cache_size=2)
+    texts = ["it's a great day!", "isn't it?", "it's a great day!"]
+
+    tokens = tokenizer.tokenize_many(texts)
+    assert tokens[0] == tokens[2] == ["it", "'s", "a", "great", "day", "!"]
+    # Changing the returned tokens doesn't change the cached ones
+    tokens[0].append("?")
+    assert tokenizer.tokenize(texts[0]) == tokens[2]
+    assert tokenizer.detokenize_many(tokens[1:]) == texts[1:]
+
+    tokenizer.tokenize("a third text")
+    assert tokenizer.cache_stats()["tokenize"] == {
+        "size": 2,
+        "hits": 2,
+        "misses": 3,
+        "hit_rate": 0.4,
+    }
+
+
+def test_tokenizer_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("TOKENIZER_CACHE_DIR", str(tmp_path))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"洛杉矶": 3}, 3
+
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert len(builds) == 1
+    assert get_cache_dir().startswith(str(tmp_path))
+
+    # Unreadable caches are rebuilt
+    with open(f"{get_cache_dir()}/test.marshal", "wb") as f:
+        f.write(b"truncated")
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert len(builds) == 2
+
+    # Caches other users could have written are rebuilt
+    os.chmod(f"{get_cache_dir()}/test.marshal", 0o666)
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert len(builds) == 3
+
+    # As is every cache in a directory others can write to
+    os.chmod(get_cache_dir(), 0o777)
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert load_or_build("test", build) == ({"洛杉矶": 3}, 3)
+    assert len(builds) == 5
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from app import SpeechTranslationServer
+from services.tokenizer import TOKENIZERS
+from services.warmup import WarmUp
+
+
+def test_warm_up_loads_languages_in_background():
+    warm_up = WarmUp(["zh", "xx-XX"])
+    warm_up.start()
+    assert not warm_up.ready
+
+    warm_up.join()
+
+    assert warm_up.ready
+    assert "zh" in TOKENIZERS
+    assert set(warm_up.timings) == {
+        "tokenizer/zh",
+        "normalizer/zh",
+        "profanity/zh",
+        "tokenizer/xx-XX",
+        "total",
+    }
+    # Failed steps are reported, but don't keep the server from being ready
+    assert list(warm_up.errors) == ["tokenizer/xx-XX"]
+
+
+def test_ready_endpoint():
+    server = SpeechTranslationServer(None)
+    server.app.testing = True
+    server.warm_up.languages = ["en-US"]
+    client = server.app.test_client()
+
+    assert client.get("ready").status_code == 503
+
+    server.warm_up.start()
+    server.warm_up.join()
+    response = client.get("ready")
+
+    assert response.status_code == 200
+    assert response.get_json()["ready"]
+    assert "tokenizer/en-US" in response.get_json()["timings"]
+
+
+def test_warm_up_loads_the_language_id_model(monkeypatch):
+    from services.asr.language_id import language_id
+    from services.asr.language_id.config import LanguageIdConfig
+
+    from_pretrained = mock.Mock()
+    monkeypatch.setattr(
+        language_id.Wav2Vec2ForSpeechClassification, "from_pretrained", from_pretrained
+    )
+    monkeypatch.setattr(language_id.torch.hub, "load", mock.Mock())
+    monkeypatch.setattr(language_id, "MODELS", {})
+
+    warm_up = WarmUp([], load_models=True)
+    warm_up.start()
+    warm_up.join()
+
+    assert warm_up.errors == {}
+    from_pretrained.assert_called_once_with(LanguageIdConfig().model_path)
+
+    # Sessions' language detectors use the warm model
+    model = language_id.get_model(LanguageIdConfig().model_path)
+    assert model in (from_pretrained.return_value, from_pretrained.return_value.to())
+    assert from_pretrained.call_count == 1
@@ -0,0 +1,47 @@
+"""
+A local stand-in for the DiDi translation server, for tests
+"""
+import json
+
+from gevent import pywsgi
+
+
+class FakeDiDiServer:
+    """
+    "Translates" by upper-casing the text, and records the requests it received
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.server = pywsgi.WSGIServer(("127.0.0.1", 0), self.app, log=None)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/translate"
+
+    def start(self):
+        self.server.start()
+
+        return self
+
+    def stop(self):
+        self.server.stop()
+
+    def app(self, environ, start_response):
+        body = environ["wsgi.input"].read()
+        request = json.loads(body) if body else {}
+        path = environ["PATH_INFO"]
+        self.requests.append((path, request))
+
+        if path == "/translate":
+            data = {"translation": request["text"].upper()}
+        elif path == "/lang_detect":
+            data = {"lang": "en"}
+        else:
+            start_response("404 Not Found", [])
+
+            return [b""]
+
+        start_response("200 OK", [("Content-Type", "application/json")])
+
+        return [json.dumps({"code": 0, "data": data}).encode()]
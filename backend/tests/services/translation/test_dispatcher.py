@@ -0,0 +1,93 @@
+from unittest import mock
+
+import gevent
+from gevent.event import Event
+from services.translation import TranslationConfig, TranslationRequest
+from services.translation.dispatcher import PriorityDispatcher
+from services.translation.translator import Translator
+
+
+def test_finals_first_then_oldest_partials():
+    dispatcher = PriorityDispatcher("test", max_concurrency=1)
+    order = []
+
+    def translate(name, is_final):
+        with dispatcher.slot(is_final):
+            order.append(name)
+
+    with dispatcher.slot(is_final=False):
+        waiting = [
+            gevent.spawn(translate, "partial 1", False),
+            gevent.spawn(translate, "partial 2", False),
+            gevent.spawn(translate, "final", True),
+        ]
+        gevent.sleep(0.01)
+        assert dispatcher.queue_depth() == 3
+
+    gevent.joinall(waiting)
+
+    assert order == ["final", "partial 1", "partial 2"]
+    assert dispatcher.running == 0
+
+
+def test_killed_waiters_dont_take_the_slot():
+    dispatcher = PriorityDispatcher("test", max_concurrency=1)
+    order = []
+
+    def translate(name, is_final):
+        with dispatcher.slot(is_final):
+            order.append(name)
+
+    with dispatcher.slot(is_final=False):
+        killed = gevent.spawn(translate, "killed", True)
+        waiting = gevent.spawn(translate, "partial", False)
+        gevent.sleep(0.01)
+        killed.kill()
+        assert dispatcher.queue_depth() == 1
+
+    waiting.join()
+
+    assert order == ["partial"]
+    assert dispatcher.running == 0
+
+
+def test_finals_skip_their_sessions_waiting_partial():
+    translated = []
+    unblocked = Event()
+
+    class BlockingTranslator(Translator):
+        def translate(self, request):
+            unblocked.wait()
+            translated.append((request.session_id, request.text))
+
+            return request.text, None
+
+    translator = BlockingTranslator(
+        TranslationConfig(provider="test", scheduling="prioritized", max_concurrency=1),
+        callback_fn=lambda request, response: None,
+        logger=mock.Mock(),
+        start_background_task=gevent.spawn,
+    )
+
+    def request(session_id, text, is_final):
+        return TranslationRequest(session_id, 0, text, "en-US", "zh", is_final)
+
+    # a's partial takes the only slot, and b's partial waits for it
+    translator(request("a", "hello", False))
+    gevent.sleep(0.01)
+    translator(request("b", "good", False))
+    gevent.sleep(0.01)
+    assert translator.pending_requests() == 1
+
+    # b's final doesn't wait behind it
+    translator(request("b", "good morning", True))
+    gevent.sleep(0.01)
+    unblocked.set()
+    gevent.sleep(0.1)
+
+    assert translated == [("a", "hello"), ("b", "good morning")]
+    assert translator.pending_requests() == 0
+    assert translator.dispatcher.running == 0
+
+    for session_id in ("a", "b"):
+        translator.end_session(session_id)
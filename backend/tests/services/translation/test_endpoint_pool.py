@@ -0,0 +1,105 @@
+import gc
+import weakref
+from unittest import mock
+
+import gevent
+import pytest
+from services.resilience import DependencyError
+from services.translation import TranslationConfig, TranslationRequest
+from services.translation.didi_translator import DiDiTranslator
+
+from fake_didi_server import FakeDiDiServer
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    servers = [FakeDiDiServer().start() for _ in range(2)]
+    monkeypatch.setenv("DIDI_TRANSLATE_URL", ",".join(s.url for s in servers))
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURES", "1")
+
+    yield servers
+
+    for server in servers:
+        server.stop()
+
+
+def translate(translator, session_id, text="hello"):
+    request = TranslationRequest(
+        session_id=session_id,
+        message_id=0,
+        text=text,
+        source_language="en-US",
+        target_language="zh",
+    )
+
+    return translator.translate(request)[0]
+
+
+def num_translations(server):
+    return sum(path == "/translate" for path, _ in server.requests)
+
+
+def test_sessions_are_balanced_and_sticky(servers):
+    translator = DiDiTranslator(
+        TranslationConfig(provider="didi", bias_beta=0), None, mock.Mock(), None
+    )
+
+    for _ in range(3):
+        assert translate(translator, "alice") == "HELLO"
+        assert translate(translator, "bob") == "HELLO"
+
+    # Each session went to its own server, and stayed there
+    assert [num_translations(s) for s in servers] == [3, 3]
+
+    # Sessions move to the other server when theirs goes down
+    servers[1].stop()
+    assert translate(translator, "bob") == "HELLO"
+    assert translate(translator, "bob") == "HELLO"
+    assert num_translations(servers[0]) == 5
+
+    translator.end_session("bob")
+    assert translator.pool.sticky.keys() == {("alice", "en-US", "zh")}
+
+
+def test_health_checks_bypass_endpoints(servers, monkeypatch):
+    monkeypatch.setenv("DIDI_HEALTH_CHECK_SECONDS", "0.05")
+    translator = DiDiTranslator(
+        TranslationConfig(provider="didi", bias_beta=0), None, mock.Mock(), None
+    )
+    pool = translator.pool
+    translator_ref = weakref.ref(translator)
+    del translator
+    gc.collect()
+
+    # The process-wide pool doesn't keep the translator alive
+    assert translator_ref() is None
+
+    gevent.sleep(0.2)
+    assert all(("/lang_detect", {"text": "hello"}) in s.requests for s in servers)
+    assert all(b.endpoint.latency.count == 0 for b in pool.backends)
+
+    # Unhealthy backends are skipped, and become available again once healthy
+    servers[1].stop()
+    gevent.sleep(0.2)
+    assert [b.available() for b in pool.backends] == [True, False]
+
+    servers[1].start()
+    gevent.sleep(0.2)
+    assert [b.available() for b in pool.backends] == [True, True]
+
+
+@pytest.mark.parametrize("urls", [None, "", " , "])
+def test_missing_urls_are_reported(monkeypatch, urls):
+    if urls is None:
+        monkeypatch.delenv("DIDI_TRANSLATE_URL", raising=False)
+    else:
+        monkeypatch.setenv("DIDI_TRANSLATE_URL", urls)
+
+    translator = DiDiTranslator(
+        TranslationConfig(provider="didi", bias_beta=0), None, mock.Mock(), None
+    )
+
+    with pytest.raises(DependencyError, match="DIDI_TRANSLATE_URL"):
+        translate(translator, "alice")
+
+    translator.end_session("alice")
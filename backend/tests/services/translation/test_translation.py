@@ -1,12 +1,15 @@
 from unittest import mock
 
+import gevent
 import pytest
+from services.resilience import DependencyError
 from services.translation import (
     TranslationConfig,
     TranslationRequest,
     TranslationResponse,
     TranslationService,
 )
+from services.translation.translator import Translator
 
 translation_test_data = [
     # Test same language returns same string
@@ -67,3 +70,32 @@ def test_translation(
         assert response.translation == expected_translation
     if expected_raw_translation:
         assert response.raw_translation == expected_raw_translation
+
+
+def test_fallbacks_dont_bias_later_translations():
+    responses = []
+    failing = [False, True, False]
+
+    class FlakyTranslator(Translator):
+        def translate(self, request):
+            if failing.pop(0):
+                raise DependencyError("unavailable")
+
+            return f"translated {request.text}", None
+
+    translator = FlakyTranslator(
+        TranslationConfig(provider="test"),
+        callback_fn=lambda request, response: responses.append((request, response)),
+        logger=mock.Mock(),
+        start_background_task=None,
+    )
+
+    for text in ["good", "good morning", "good morning every"]:
+        translator(TranslationRequest("test", 0, text, "en-US", "zh", False))
+        gevent.sleep(0.1)
+    translator.end_session("test")
+
+    assert [response.fallback for _, response in responses] == [False, True, False]
+    assert responses[1][1].translation == "good morning"
+    # Biased towards the last translation, not the untranslated text
+    assert responses[2][0].previous_translation == "translated good"
@@ -39,7 +39,11 @@ parser.add_argument(
     help="target language(s) to translate to",
 )
 
-url = os.getenv("DIDI_TRANSLATE_URL")
+urls = [url.strip() for url in os.getenv("DIDI_TRANSLATE_URL", "").split(",")]
+urls = [url for url in urls if url]
+if not urls:
+    raise Exception("DIDI_TRANSLATE_URL is not set in .env")
+url = urls[0]
 apikey = os.getenv("DIDI_TRANSLATE_KEY")
 
 